@@ -1,109 +1,180 @@
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for, flash
-from google_auth_oauthlib.flow import InstalledAppFlow, Flow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from flask import Flask, Response, g, render_template, jsonify, request, session, redirect, url_for, flash
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 import json
-import pickle
-import glob
-import isodate
-from datetime import datetime, timedelta
+import logging
+import queue
+import threading
+import time
+from datetime import date, datetime, timedelta
 import config
 from config import config
-
-def clear_old_cache_files():
-    """Clear all old cache files to prevent structure mismatches"""
-    try:
-        cache_files = glob.glob("videos_cache_*.json")
-        for cache_file in cache_files:
-            try:
-                with open(cache_file, 'r') as f:
-                    cached_data = json.load(f)
-                
-                # Check if cache has the correct structure
-                videos = cached_data.get('videos', [])
-                if videos and len(videos) > 0:
-                    first_video = videos[0]
-                    required_fields = ['percentWatched', 'watchTime', 'subsGained', 'publishedAt', 'length']
-                    if not all(field in first_video for field in required_fields):
-                        print(f"🗑️ Removing old cache file with invalid structure: {cache_file}")
-                        os.remove(cache_file)
-            except Exception as e:
-                print(f"🗑️ Removing corrupted cache file: {cache_file}")
-                os.remove(cache_file)
-    except Exception as e:
-        print(f"❌ Error clearing old cache files: {e}")
-
-# Clear old cache files on app startup
-clear_old_cache_files()
+from services import get_youtube, get_youtube_analytics, authorized_http, set_api_root, set_quota_guard
+from cache import MemoryCache, create_cache
+from singleflight import SingleFlight
+from refresher import BackgroundRefresher
+from credential_store import CredentialStore
+from session_store import ServerSessionInterface, SessionStore
+from token_manager import TokenManager, credentials_from_dict, credentials_to_dict
+from metrics_store import MetricsStore, EMPTY_TOTALS, add_totals, totals_from_metrics, metrics_from_totals
+from video_index import build_sort_orders, ensure_index, merge_datasets, parse_filters, query_videos, sort_column
+from video_rows import build_video_rows
+from wire import EncodedResponses, sse_event, to_columnar
+from instrumentation import metrics as api_metrics, server_timing_header, timed_phase
+from logs import new_request_id, queued_records, sampled_logger, setup_logging
+from quota import QuotaExhausted, QuotaGuard
+from resource_store import VideoResourceStore
+from fetch_engine import (
+    AsyncFetchEngine, BatchAligner, FetchEngine, VideoRevalidator, VIDEO_PARTS,
+    cap_playlist_page, chunk_video_ids_for_filter, metrics_from_report, metrics_query_params
+)
 
 app = Flask(__name__)
 app.config.from_object(config[os.environ.get('FLASK_ENV', 'development')])
 
+# Structured logs through a non-blocking queue; per-request chatter is sampled
+setup_logging(app.config)
+logger = logging.getLogger(__name__)
+request_log = sampled_logger('app.requests')
+access_log = sampled_logger('app.access')
+
 # Enable sessions for user authentication
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 
 # Set session to last 30 days
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=30)
 
+# Session data lives server-side (shared by every worker); the cookie is an opaque ID
+app.session_interface = ServerSessionInterface(SessionStore(app.config['SESSION_DB_PATH']))
+
+# Shape of the cached video datasets; bump it whenever the rows or payload fields
+# change, and entries written by older code are read as misses
+VIDEO_CACHE_SCHEMA_VERSION = 1
+
+# Shared per-channel cache of processed video datasets
+video_cache = create_cache(app.config, VIDEO_CACHE_SCHEMA_VERSION)
+
+# Coalesces concurrent cache misses per channel, across threads and workers
+video_fetches = SingleFlight(app.config['FETCH_LOCK_DIR'], app.config['FETCH_WAIT_TIMEOUT'])
+
+# Signed-in users' credentials, and channels and refresh tokens known to the pre-warmer
+credential_store = CredentialStore(app.config['CREDENTIALS_DB_PATH'])
+
+# Live credentials per signed-in user, refreshed before they expire
+token_manager = TokenManager(
+    credential_store,
+    refresh_margin=app.config['TOKEN_REFRESH_MARGIN_SECONDS'],
+    lease_seconds=app.config['TOKEN_REFRESH_LEASE_SECONDS'],
+    sweep_interval=app.config['TOKEN_REFRESH_INTERVAL_SECONDS'],
+    active_window=app.config['TOKEN_ACTIVE_SECONDS'],
+    retention=int(app.config['PERMANENT_SESSION_LIFETIME'].total_seconds())
+)
+
+# Settled per-video Analytics totals for incremental refreshes
+metrics_store = MetricsStore(app.config['METRICS_DB_PATH'])
+
+# Last refresh's videos().list resources and ETags, for conditional refreshes
+resource_store = VideoResourceStore(app.config['VIDEO_RESOURCES_DB_PATH'])
+
+# Bounded pool that rebuilds stale caches off the request path
+background_refresher = BackgroundRefresher(
+    app.config['REFRESH_MAX_WORKERS'],
+    app.config['REFRESH_MAX_PENDING']
+)
+
+# Shared quota breaker and daily usage; every YouTube API request goes through it
+quota_guard = QuotaGuard(
+    app.config['QUOTA_DB_PATH'],
+    daily_budget=app.config['QUOTA_DAILY_BUDGET'],
+    max_retries=app.config['API_MAX_RETRIES'],
+    backoff_base=app.config['API_BACKOFF_BASE_SECONDS'],
+    backoff_cap=app.config['API_BACKOFF_CAP_SECONDS']
+)
+set_quota_guard(quota_guard)
+set_api_root(app.config['YOUTUBE_API_ROOT_URL'])
+
+# Serialized and gzipped /api/videos bodies, reused until the dataset changes
+encoded_responses = EncodedResponses(
+    app.config['RESPONSE_MEMO_ENTRIES'],
+    app.config['CACHE_TTL_SECONDS'] + app.config['CACHE_STALE_TTL_SECONDS'],
+    app.config['RESPONSE_MEMO_MAX_BYTES']
+)
+
+# Merged multi-channel datasets for /api/channels/aggregate, reused until a channel's dataset changes
+aggregate_datasets = MemoryCache(app.config['AGGREGATE_MEMO_ENTRIES'])
+
 SCOPES = [
     'https://www.googleapis.com/auth/youtube.readonly',
     'https://www.googleapis.com/auth/yt-analytics.readonly'
 ]
 
+# Seconds between keep-alive comments on an idle /api/videos/stream
+STREAM_KEEPALIVE_SECONDS = 15
+
+# YouTube Data API page/batch limits (both endpoints cap at 50 per call)
+PLAYLIST_PAGE_SIZE = 50
+VIDEOS_LIST_CHUNK_SIZE = 50
+
+# /api/videos response formats (?format=) and the query the dashboard sends on load
+VIDEO_RESPONSE_FORMATS = ('json', 'columnar')
+DEFAULT_VIDEOS_QUERY = {
+    'sort_by': 'published',
+    'sort_direction': 'desc',
+    'offset': 0,
+    'limit': None,
+    'filters': {}
+}
+
 def get_credentials():
-    """Get user credentials from session or start OAuth flow"""
-    # Check if user has valid credentials in session
+    """Get the signed-in user's credentials, or None if they need to sign in again"""
+    # Sessions from before server-side credentials carry the credentials themselves
     if 'user_credentials' in session:
         try:
-            # Reconstruct credentials from session data
-            from google.oauth2.credentials import Credentials
-            creds_data = session['user_credentials']
-            creds = Credentials(
-                token=creds_data['token'],
-                refresh_token=creds_data['refresh_token'],
-                token_uri=creds_data['token_uri'],
-                client_id=creds_data['client_id'],
-                client_secret=creds_data['client_secret'],
-                scopes=creds_data['scopes']
-            )
-            
-            # Check if credentials are still valid
-            if creds and creds.valid:
-                print("✅ Loaded credentials from session")
-                print("✅ Credentials are valid and ready to use")
-                return creds
-            
-            # Refresh if expired
-            if creds and creds.expired and creds.refresh_token:
-                print("🔄 Refreshing expired credentials...")
-                creds.refresh(Request())
-                
-                # Update session with new token
-                session['user_credentials'] = {
-                    'token': creds.token,
-                    'refresh_token': creds.refresh_token,
-                    'token_uri': creds.token_uri,
-                    'client_id': creds.client_id,
-                    'client_secret': creds.client_secret,
-                    'scopes': creds.scopes
-                }
-                session.modified = True
-                print("✅ Credentials refreshed and updated in session")
+            creds = credentials_from_dict(session.pop('user_credentials'))
+            session['credentials_id'] = token_manager.add(creds)
+            logger.info("Moved session credentials to the credential store")
+        except Exception as e:
+            logger.error("Error loading credentials from session: %s", e)
+    
+    credentials_id = session.get('credentials_id')
+    if credentials_id:
+        try:
+            creds = token_manager.get(credentials_id)
+            if creds:
                 return creds
-                
+            session.pop('credentials_id', None)
         except Exception as e:
-            print(f"❌ Error loading credentials from session: {e}")
-            # Clear invalid session data
-            session.pop('user_credentials', None)
+            logger.error("Error loading credentials: %s", e)
     
-    # No valid credentials in session - start OAuth flow
-    print("🔐 No valid credentials in session - starting OAuth flow")
+    logger.info("No valid credentials in session - starting OAuth flow")
     return None
 
-def authenticate():
-    """Start OAuth flow and store credentials in session"""
+def is_signed_in():
+    """True if the session references stored credentials (no token check)"""
+    return 'credentials_id' in session or 'user_credentials' in session
+
+def sign_in(creds):
+    """Start a fresh session for newly granted credentials"""
+    session.clear()
+    session['credentials_id'] = token_manager.add(creds)
+    store_session_channel(creds)
+
+def sign_out():
+    """Stop pre-warming the channels, drop the stored credentials and clear the session"""
+    forget_channel()
+    credentials_id = session.get('credentials_id')
+    if credentials_id:
+        try:
+            token_manager.forget(credentials_id)
+        except Exception as e:
+            logger.warning("Could not delete stored credentials: %s", e)
+    for linked in session.get('linked_channels', []):
+        forget_linked_channel(linked)
+    session.clear()
+
+def authenticate(link=False):
+    """Start OAuth flow and store credentials in session (or link them to it)"""
+    from google_auth_oauthlib.flow import InstalledAppFlow, Flow
     try:
         # Load client secrets
         client_secrets_file = os.environ.get('GOOGLE_CREDENTIALS', 'client_secret.json')
@@ -135,7 +206,7 @@ def authenticate():
                 prompt='consent'
             )
             
-            print(f"🔐 Production OAuth - redirecting to: {auth_url}")
+            logger.info("Production OAuth - redirecting to Google")
             return auth_url
         else:
             # Development: Use local server
@@ -146,35 +217,29 @@ def authenticate():
             )
             
             # Run OAuth flow
-            print("🔐 Starting OAuth flow...")
+            logger.info("Starting OAuth flow")
             try:
                 creds = flow.run_local_server(port=8080, access_type='offline', prompt='consent')
             except OSError as e:
                 if "Address already in use" in str(e):
-                    print("❌ Port 8080 is busy. Please close any other applications using port 8080 and try again.")
+                    logger.error("Port 8080 is busy. Please close any other applications using port 8080 and try again.")
                     raise e
                 else:
                     raise e
             
-            # Clear any existing session data for new user
-            session.clear()
-            
-            # Store credentials in session
-            session['user_credentials'] = {
-                'token': creds.token,
-                'refresh_token': creds.refresh_token,
-                'token_uri': creds.token_uri,
-                'client_id': creds.client_id,
-                'client_secret': creds.client_secret,
-                'scopes': creds.scopes
-            }
-            session.modified = True
+            if link:
+                # Add the channel to the signed-in session
+                session.pop('oauth_link', None)
+                link_channel(creds)
+            else:
+                # Start a fresh session for the new user
+                sign_in(creds)
             
-            print("✅ OAuth completed - credentials stored in session")
+            logger.info("OAuth completed - credentials stored")
             return creds
         
     except Exception as e:
-        print(f"❌ OAuth error: {e}")
+        logger.error("OAuth error: %s", e)
         return None
 
 @app.route('/')
@@ -187,36 +252,52 @@ def index():
 @app.route('/auth/google')
 def google_auth():
     """Handle Google OAuth"""
+    session.pop('oauth_link', None)
+    return start_oauth()
+
+@app.route('/auth/google/link')
+def link_google_account():
+    """Handle Google OAuth for another channel, linked to the signed-in session"""
+    if not is_signed_in():
+        return redirect(url_for('google_auth'))
+    # Read back by the production callback, which links instead of signing in
+    session['oauth_link'] = True
+    return start_oauth(link=True)
+
+def start_oauth(link=False):
+    """Run (development) or redirect to (production) the OAuth flow"""
     try:
-        print(f"🔐 OAuth request from: {request.host_url}")
-        result = authenticate()
+        logger.info("OAuth request from %s", request.host_url)
+        result = authenticate(link)
         
         # Check if we're in production (result is auth URL) or development (result is creds)
         if isinstance(result, str):
             # Production: redirect to Google OAuth
-            print(f"🔐 Production OAuth - redirecting to: {result}")
             return redirect(result)
         elif result:
             # Development: OAuth completed, redirect to dashboard
-            print("✅ Development OAuth completed")
+            logger.info("Development OAuth completed")
             return redirect(url_for('index'))
         else:
-            print("❌ Authentication failed - no result")
+            logger.error("Authentication failed - no result")
             flash('Authentication failed. Please try again.', 'error')
             return redirect(url_for('index'))
     except Exception as e:
-        print(f"❌ Authentication error: {e}")
+        logger.error("Authentication error: %s", e)
         flash('Authentication error. Please try again.', 'error')
         return redirect(url_for('index'))
 
 @app.route('/auth/google/callback')
 def google_auth_callback():
     """Handle Google OAuth callback (production only)"""
+    from google_auth_oauthlib.flow import InstalledAppFlow
     try:
-        print(f"🔄 OAuth callback received: {request.url}")
+        logger.info("OAuth callback received")
         
-        # Clear any existing session data for new user
-        session.clear()
+        # Clear any existing session data for new user, unless a channel is being linked to it
+        linking = session.pop('oauth_link', False) and is_signed_in()
+        if not linking:
+            session.clear()
         
         # Load client secrets
         if os.environ.get('GOOGLE_CREDENTIALS'):
@@ -236,22 +317,19 @@ def google_auth_callback():
         flow.fetch_token(authorization_response=request.url)
         creds = flow.credentials
         
-        # Store credentials in session
-        session['user_credentials'] = {
-            'token': creds.token,
-            'refresh_token': creds.refresh_token,
-            'token_uri': creds.token_uri,
-            'client_id': creds.client_id,
-            'client_secret': creds.client_secret,
-            'scopes': creds.scopes
-        }
-        session.modified = True
+        if linking:
+            link_channel(creds)
+            logger.info("Production OAuth completed - channel linked")
+            return redirect(url_for('index', just_linked='true'))
+        
+        # Start a fresh session for the new user
+        sign_in(creds)
         
-        print("✅ Production OAuth completed - credentials stored in session")
+        logger.info("Production OAuth completed - credentials stored")
         return redirect(url_for('index', just_signed_in='true'))
         
     except Exception as e:
-        print(f"❌ OAuth callback error: {e}")
+        logger.error("OAuth callback error: %s", e)
         flash('Authentication failed. Please try again.', 'error')
         return redirect(url_for('index'))
 
@@ -275,7 +353,54 @@ def sitemap_xml():
 @app.route('/health')
 def health_check():
     """Health check endpoint for ping services"""
-    return {'status': 'healthy', 'timestamp': datetime.now().isoformat()}, 200
+    return {
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'fetches': video_fetches.stats(),
+        'background_refresh': background_refresher.stats(),
+        'quota': quota_guard.status(),
+        'log_queue': queued_records()
+    }, 200
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Upstream API calls, quota units, latencies and request phase timings (Prometheus text format)"""
+    return Response(api_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.before_request
+def start_request():
+    """Give every request an ID (the caller's X-Request-ID if sane) and a start time"""
+    request_id = request.headers.get('X-Request-ID', '')
+    if not (0 < len(request_id) <= 64 and request_id.replace('-', '').isalnum()):
+        request_id = new_request_id()
+    g.request_id = request_id
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def log_request(response):
+    """Access log line with timing fields; sampled unless the request failed"""
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    duration_ms = (time.perf_counter() - g.get('request_start', time.perf_counter())) * 1000
+    level = logging.WARNING if response.status_code >= 500 else logging.INFO
+    if access_log.isEnabledFor(level):
+        # Already sampled above; logging through the adapter would flip the coin again
+        access_log.logger.log(level, "%s %s %d", request.method, request.path, response.status_code, extra={'fields': {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'bytes': response.content_length,
+            'phases_ms': {phase: round(seconds * 1000, 2) for phase, seconds in g.get('phase_timings', [])}
+        }})
+    return response
+
+@app.after_request
+def add_server_timing(response):
+    """Expose the request's phase timings (cache, fetch, sort, serialize, ...) to the browser"""
+    timings = g.get('phase_timings')
+    if timings:
+        response.headers['Server-Timing'] = server_timing_header(timings)
+    return response
 
 @app.route('/privacy')
 def privacy():
@@ -292,10 +417,8 @@ def not_found(e):
 @app.route('/api/channel')
 def get_channel():
     """Get channel information"""
-    print(f"🔍 DEBUG: Channel API - Session keys: {list(session.keys())}")
-    print(f"🔍 DEBUG: Channel API - Has user_credentials: {'user_credentials' in session}")
     
-    if 'user_credentials' not in session:
+    if not is_signed_in():
         return jsonify({'authenticated': False})
     
     try:
@@ -303,7 +426,7 @@ def get_channel():
         if not creds:
             return jsonify({'authenticated': False})
         
-        youtube = build('youtube', 'v3', credentials=creds)
+        youtube = get_youtube(creds)
         
         # Get channel info
         channels_response = youtube.channels().list(
@@ -313,306 +436,889 @@ def get_channel():
         
         if channels_response['items']:
             channel = channels_response['items'][0]
-            return jsonify({
-                'authenticated': True,
+            channel_info = {
                 'title': channel['snippet']['title'],
                 'thumbnail': channel['snippet']['thumbnails']['default']['url'],
                 'subscriberCount': channel['statistics']['subscriberCount']
-            })
+            }
+            # Kept so the header still renders while the quota breaker is open
+            if session.get('channel_info') != channel_info:
+                session['channel_info'] = channel_info
+            return jsonify({'authenticated': True, **channel_info})
         else:
             return jsonify({'authenticated': True, 'error': 'No channel found'}), 404
-            
+    
+    except QuotaExhausted as e:
+        logger.warning("Channel API skipped: %s", e)
+        return jsonify({'authenticated': True, 'degraded': True, 'error': str(e), **session.get('channel_info', {})})
     except Exception as e:
-        print(f"Channel API error: {e}")
+        logger.error("Channel API error: %s", e)
         return jsonify({'authenticated': False, 'error': str(e)})
 
-def get_test_videos(sort_by, sort_direction, force_refresh):
-    """Mock function to return test data when API quota is exceeded."""
-    print("🔄 Mocking YouTube API quota exceeded for testing refresh button.")
-    # Simulate a scenario where API quota is exceeded
-    # In a real application, you would handle this by redirecting to a maintenance page
-    # For now, we'll return a dummy response that indicates an error
-    return jsonify({
+def resolve_channel(youtube):
+    """Look up the signed-in user's channel ID, title and uploads playlist (1 quota unit)"""
+    channels_response = youtube.channels().list(
+        part='id,snippet,contentDetails',
+        mine=True
+    ).execute()
+    
+    if not channels_response.get('items'):
+        return None
+    
+    channel = channels_response['items'][0]
+    return {
+        'id': channel['id'],
+        'title': channel.get('snippet', {}).get('title'),
+        'uploads_playlist_id': channel['contentDetails']['relatedPlaylists']['uploads']
+    }
+
+def remember_channel(channel, creds):
+    """Store the channel in the session and register it for cache pre-warming"""
+    session['channel'] = channel
+    try:
+        credential_store.save(channel, credentials_to_dict(creds), session.get('credentials_id'))
+    except Exception as e:
+        logger.warning("Could not register channel %s for pre-warming: %s", channel['id'], e)
+
+def forget_channel():
+    """Stop pre-warming the signed-in channel unless another session still uses it (on logout)"""
+    channel = session.get('channel')
+    if channel:
+        try:
+            credential_store.release(channel['id'], session.get('credentials_id'))
+        except Exception as e:
+            logger.warning("Could not unregister channel %s: %s", channel['id'], e)
+
+def store_session_channel(creds):
+    """Resolve the channel once at sign-in so cache hits never need the API"""
+    try:
+        channel = resolve_channel(get_youtube(creds))
+        if channel:
+            remember_channel(channel, creds)
+    except Exception as e:
+        # Not fatal - /api/videos resolves it on first use instead
+        logger.warning("Could not resolve channel at sign-in: %s", e)
+
+def session_channels():
+    """The session's (channel, credentials ID) pairs: the signed-in channel first, then linked ones"""
+    channels = []
+    if session.get('channel') and session.get('credentials_id'):
+        channels.append((session['channel'], session['credentials_id']))
+    for linked in session.get('linked_channels', []):
+        channels.append((linked['channel'], linked['credentials_id']))
+    return channels
+
+def link_channel(creds):
+    """Add another channel's credentials to the signed-in session and return the channel"""
+    channel = resolve_channel(get_youtube(creds))
+    if not channel:
+        raise ValueError('No channel found for the linked account')
+    
+    primary = session.get('channel')
+    if primary and primary['id'] == channel['id']:
+        return channel
+    
+    linked = session.get('linked_channels', [])
+    relinked = [entry for entry in linked if entry['channel']['id'] == channel['id']]
+    others = [entry for entry in linked if entry['channel']['id'] != channel['id']]
+    if not relinked and len(others) >= app.config['MAX_LINKED_CHANNELS']:
+        raise ValueError(f"At most {app.config['MAX_LINKED_CHANNELS']} channels can be linked")
+    
+    # Linking a channel again replaces its credentials
+    for entry in relinked:
+        token_manager.forget(entry['credentials_id'])
+    
+    # Assigned, not appended: changes inside the list don't mark the session modified
+    credentials_id = token_manager.add(creds)
+    session['linked_channels'] = others + [{'credentials_id': credentials_id, 'channel': channel}]
+    try:
+        credential_store.save(channel, credentials_to_dict(creds), credentials_id)
+    except Exception as e:
+        logger.warning("Could not register channel %s for pre-warming: %s", channel['id'], e)
+    logger.info("Linked channel %s", channel['id'])
+    return channel
+
+def forget_linked_channel(linked):
+    """Drop a linked channel's stored credentials, and its pre-warming unless another session uses it"""
+    channel_id = linked['channel']['id']
+    try:
+        credential_store.release(channel_id, linked['credentials_id'])
+        token_manager.forget(linked['credentials_id'])
+    except Exception as e:
+        logger.warning("Could not unlink channel %s: %s", channel_id, e)
+
+def get_cache_key(channel_id):
+    """Cache key for a channel's video dataset"""
+    return f"videos:{channel_id}"
+
+def fresh_ttl_seconds(cached_data):
+    """How long a cached dataset counts as fresh; shorter when some of its metrics are incomplete"""
+    if cached_data.get('partial'):
+        return app.config['PARTIAL_CACHE_TTL_SECONDS']
+    return app.config['CACHE_TTL_SECONDS']
+
+def is_cache_stale(cached_data):
+    """True once a cached dataset is older than its fresh TTL"""
+    cache_time = datetime.fromisoformat(cached_data.get('cache_time', '2000-01-01'))
+    return datetime.now() - cache_time >= timedelta(seconds=fresh_ttl_seconds(cached_data))
+
+def load_cached_videos(channel_id, fresh_only=False):
+    """Return the channel's cached data if it is live and non-empty.
+
+    Stale datasets (past the fresh TTL but inside the stale window) are returned
+    too unless fresh_only is set.
+    """
+    cache_key = get_cache_key(channel_id)
+    try:
+        cached_data = video_cache.get(cache_key)
+        if cached_data is None:
+            request_log.debug("No live cache entry for %s", cache_key)
+            return None
+        
+        if fresh_only and is_cache_stale(cached_data):
+            return None
+        
+        # Structure is guaranteed by the cache's schema version; only empty datasets are rejected
+        if not cached_data.get('videos'):
+            logger.warning("Cached dataset for %s is empty, dropping it", cache_key)
+            video_cache.delete(cache_key)
+            return None
+        
+        request_log.debug("Using cached data for %s", cache_key)
+        return cached_data
+    except Exception as e:
+        logger.error("Cache error: %s", e)
+        return None
+
+def build_videos_payload(data, query, response_format, extra):
+    """Response payload with one sorted/filtered page of a cached dataset"""
+    with timed_phase('sort'):
+        videos, total_matching = query_videos(ensure_index(data), **query)
+    return {
         'authenticated': True,
-        'videos': [
-            {
-                'id': 'test_video_1',
-                'title': 'Test Video 1',
-                'thumbnail': 'https://via.placeholder.com/150',
-                'publishedAt': (datetime.now() - timedelta(days=1)).isoformat(),
-                'views': 1000,
-                'likes': 50,
-                'length': '05:00',
-                'watchTime': '00:30',
-                'percentWatched': 60.0,
-                'subsGained': 10
-            },
-            {
-                'id': 'test_video_2',
-                'title': 'Test Video 2',
-                'thumbnail': 'https://via.placeholder.com/150',
-                'publishedAt': (datetime.now() - timedelta(days=2)).isoformat(),
-                'views': 500,
-                'likes': 25,
-                'length': '03:00',
-                'watchTime': '00:15',
-                'percentWatched': 50.0,
-                'subsGained': 5
-            }
-        ],
-        'last_updated': (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d'),
-        'total_videos_fetched': 2,
-        'total_videos_available': 2
+        **extra,
+        'format': response_format,
+        'videos': to_columnar(videos) if response_format == 'columnar' else videos,
+        'last_updated': data.get('last_updated'),
+        'total_videos_fetched': len(videos),
+        'total_videos_available': data.get('total_videos_available', len(data['videos'])),
+        'total_matching': total_matching,
+        'offset': query['offset']
+    }
+
+def empty_videos_payload(cache_data):
+    """Response payload for a channel with no public videos"""
+    return {
+        'authenticated': True,
+        'videos': [],
+        'error': cache_data['error'],
+        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'total_videos_fetched': 0,
+        'total_videos_available': 0
+    }
+
+def encode_videos_response(channel_id, data, query, response_format='json', **extra):
+    """Serialized + gzipped body for a page of a dataset, memoized per dataset version"""
+    key = encoded_responses.key(channel_id, data, response_format, query, extra)
+    return encoded_responses.get_or_encode(
+        key,
+        lambda: build_videos_payload(data, query, response_format, extra)
+    )
+
+def videos_response(channel_id, data, query, response_format='json', **extra):
+    """Compressed, ETag-validated response with one page of a cached dataset"""
+    encoded = encode_videos_response(channel_id, data, query, response_format, **extra)
+    
+    # Each content coding is its own representation, so it gets its own strong ETag
+    use_gzip = request.accept_encodings['gzip'] > 0
+    etag = f"{encoded.etag}-gzip" if use_gzip else encoded.etag
+    
+    if request.if_none_match.contains(encoded.etag) or request.if_none_match.contains(f"{encoded.etag}-gzip"):
+        response = Response(status=304)
+    elif use_gzip:
+        response = Response(encoded.gzipped, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(encoded.body, mimetype='application/json')
+    
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    # Per-user data: browsers may keep it but must revalidate every time
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def degraded_videos_response(channel_id, query, response_format, error):
+    """Serve the last good dataset, flagged degraded, when YouTube can't be reached.
+
+    Used when the quota breaker is open or a fetch fails; without any cached
+    data there is nothing to show, so the error is returned as a 503.
+    """
+    quota_error = error if isinstance(error, QuotaExhausted) else error.__cause__
+    retry_after = None
+    if isinstance(quota_error, QuotaExhausted):
+        retry_after = max(0, int(quota_error.open_until - time.time()))
+    
+    cached_data = load_cached_videos(channel_id) if channel_id else None
+    if cached_data:
+        logger.warning("Serving last good data for %s (degraded): %s", channel_id, error)
+        return videos_response(channel_id, cached_data, query, response_format, cached=True, stale=True, degraded=True)
+    
+    response = jsonify({
+        'authenticated': True,
+        'degraded': True,
+        'videos': [],
+        'error': str(error),
+        'total_videos_fetched': 0,
+        'total_videos_available': 0
     })
+    response.status_code = 503
+    if retry_after is not None:
+        response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def parse_videos_query(args):
+    """Sort, page and filter query from request args (ValueError with a message for the client)"""
+    sort_direction = args.get('sort_direction', 'desc')
+    if sort_direction not in ('asc', 'desc'):
+        raise ValueError("sort_direction must be 'asc' or 'desc'")
+    try:
+        offset = max(0, int(args.get('offset', 0)))
+        limit = int(args['limit']) if args.get('limit') else None
+        filters = parse_filters(args)
+    except ValueError:
+        raise ValueError('offset, limit and range filters must be numeric')
+    if limit is not None and limit < 1:
+        raise ValueError('limit must be at least 1')
+    return {
+        # Canonical name, so aliases share memoized responses
+        'sort_by': sort_column(args.get('sort_by', 'published')),
+        'sort_direction': sort_direction,
+        'offset': offset,
+        'limit': limit,
+        'filters': filters
+    }
 
 @app.route('/api/videos')
 def get_videos():
     """Get videos with metrics"""
-    print(f"🔍 DEBUG: Session keys: {list(session.keys())}")
-    print(f"🔍 DEBUG: Has user_credentials: {'user_credentials' in session}")
-    print(f"🔍 DEBUG: Session content: {dict(session)}")
     
-    if 'user_credentials' not in session:
-        print(f"❌ No user_credentials in session!")
+    if not is_signed_in():
+        logger.debug("No credentials in session")
         return jsonify({'authenticated': False})
     
     try:
-        creds = get_credentials()
-        if not creds:
-            return jsonify({'authenticated': False})
-        
         # Get query parameters
-        sort_by = request.args.get('sort_by', 'published')
-        sort_direction = request.args.get('sort_direction', 'desc')
         force_refresh = request.args.get('refresh', 'false').lower() == 'true'
+        request_start = time.perf_counter()
+        response_format = request.args.get('format', 'json')
+        if response_format not in VIDEO_RESPONSE_FORMATS:
+            return jsonify({'error': f"format must be one of: {', '.join(VIDEO_RESPONSE_FORMATS)}"}), 400
         
-        # Build YouTube API client
-        youtube = build('youtube', 'v3', credentials=creds)
-        
-        # Get user's channel ID for cache identification
         try:
-            channels_response = youtube.channels().list(
-                part='id',
-                mine=True
-            ).execute()
-            
-            if not channels_response.get('items'):
-                return jsonify({'authenticated': False, 'error': 'No channel found'})
-            
-            channel_id = channels_response['items'][0]['id']
-        except Exception as e:
-            print(f"❌ Channel API error (likely quota exceeded): {e}")
-            # Use test mode with mock data
-            return get_test_videos(sort_by, sort_direction, force_refresh)
+            query = parse_videos_query(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Check cache first (unless force refresh) - make cache user-specific
-        cache_file = f"videos_cache_{channel_id}_{datetime.now().strftime('%Y-%m-%d')}_{'morning' if datetime.now().hour < 12 else 'afternoon'}.json"
+        creds = None
         
-        if not force_refresh and os.path.exists(cache_file):
-            print(f"🔍 DEBUG: Found cache file: {cache_file}")
+        # Channel ID is resolved at sign-in; sessions from before that resolve it once here
+        channel = session.get('channel')
+        if not channel:
+            creds = get_credentials()
+            if not creds:
+                return jsonify({'authenticated': False})
+            
             try:
-                with open(cache_file, 'r') as f:
-                    cached_data = json.load(f)
+                channel = resolve_channel(get_youtube(creds))
+                if not channel:
+                    return jsonify({'authenticated': False, 'error': 'No channel found'})
+                remember_channel(channel, creds)
+            except Exception as e:
+                logger.error("Channel API error: %s", e)
+                return degraded_videos_response(None, query, response_format, e)
+        
+        channel_id = channel['id']
+        
+        # Check cache first (unless force refresh) - cache is per channel
+        if not force_refresh:
+            with timed_phase('cache'):
+                cached_data = load_cached_videos(channel_id)
+            if cached_data:
+                # Serve the last good dataset now and rebuild it in the background
+                stale = is_cache_stale(cached_data)
+                if stale:
+                    creds = creds or get_credentials()
+                    if creds:
+                        schedule_background_refresh(creds, channel, session.get('credentials_id'))
+                
+                # Slice the precomputed sort order instead of sorting
+                response = videos_response(channel_id, cached_data, query, response_format, cached=True, stale=stale)
                 
-                # Check if cache is still valid (6 hours)
-                cache_time = datetime.fromisoformat(cached_data.get('cache_time', '2000-01-01'))
-                if datetime.now() - cache_time < timedelta(hours=6):
-                    print(f"🔍 DEBUG: Cache is valid, using cached data")
-                    # Validate cache structure - check if it has the correct field names
-                    videos = cached_data.get('videos', [])
-                    if videos and len(videos) > 0:
-                        # Check if the first video has the correct field structure
-                        first_video = videos[0]
-                        required_fields = ['percentWatched', 'watchTime', 'subsGained', 'publishedAt', 'length']
-                        if all(field in first_video for field in required_fields):
-                            print(f"✅ Using cached data from {cache_file}")
-                            
-                            # Sort cached data
-                            videos = sort_videos(videos, sort_by, sort_direction)
-                            
-                            return jsonify({
-                                'authenticated': True,
-                                'videos': videos,
-                                'last_updated': cached_data.get('last_updated'),
-                                'total_videos_fetched': len(videos),
-                                'total_videos_available': cached_data.get('total_videos_available', len(videos))
-                            })
-                        else:
-                            print(f"❌ Cache has invalid structure - missing required fields")
-                            # Remove invalid cache file
-                            os.remove(cache_file)
-                    else:
-                        print(f"❌ Cache is empty")
-                        # Remove empty cache file
-                        os.remove(cache_file)
+                elapsed_ms = (time.perf_counter() - request_start) * 1000
+                if elapsed_ms > app.config['CACHE_HIT_TARGET_MS']:
+                    logger.warning("Cache hit exceeded %dms target", app.config['CACHE_HIT_TARGET_MS'],
+                                   extra={'fields': {'channel_id': channel_id, 'duration_ms': round(elapsed_ms, 1)}})
                 else:
-                    print(f"🔍 DEBUG: Cache is expired, will fetch fresh data")
-            except Exception as e:
-                print(f"🔍 DEBUG: Cache error: {e}")
-                # Remove corrupted cache file
-                if os.path.exists(cache_file):
-                    os.remove(cache_file)
+                    request_log.info("Cache hit served with no upstream calls",
+                                     extra={'fields': {'channel_id': channel_id, 'stale': stale,
+                                                       'duration_ms': round(elapsed_ms, 1)}})
+                
+                return response
         else:
-            if force_refresh:
-                print(f"🔍 DEBUG: Force refresh requested, will fetch fresh data")
-            else:
-                print(f"🔍 DEBUG: No cache file found, will fetch fresh data")
-        
-        if force_refresh:
-            print("🔄 Force refresh requested - clearing cache...")
-            if os.path.exists(cache_file):
-                os.remove(cache_file)
+            # The old dataset stays cached until the new one replaces it, as the degraded fallback
+            logger.info("Force refresh requested - bypassing cache")
         
-        print("Fetching fresh data from YouTube APIs...")
+        if creds is None:
+            creds = get_credentials()
+            if not creds:
+                return jsonify({'authenticated': False})
         
-        # Build YouTube Analytics API client
-        youtube_analytics = build('youtubeAnalytics', 'v2', credentials=creds)
+        mark_channel_active(channel_id)
         
-        # Get all videos using search API, then filter by privacy status
+        # Coalesce concurrent misses for this channel into a single upstream fetch
+        credentials_id = session.get('credentials_id')
         try:
-            # Get all videos for the channel using search API
-            search_request = youtube.search().list(
-                part='snippet',
-                forMine=True,
-                type='video',
-                maxResults=100,  # Set to 100 videos maximum
-                order='date'
-            )
-            
-            response = search_request.execute()
-            
-            if not response.get('items'):
-                return jsonify({'videos': [], 'error': 'No videos found'})
-            
-            # Get all video IDs from search results
-            all_video_items = response.get("items", [])
-            all_video_ids = [item["id"]["videoId"] for item in all_video_items]
-            
-            # Get detailed video info including privacy status
-            videos_request = youtube.videos().list(
-                part='snippet,contentDetails,statistics,status',
-                id=','.join(all_video_ids)
+            with timed_phase('fetch'):
+                cache_data = coalesced_fetch(
+                    channel_id,
+                    lambda: refresh_channel_videos(creds, channel, credentials_id=credentials_id),
+                    None if force_refresh else lambda: load_cached_videos(channel_id, fresh_only=True)
+                )
+        except FetchError as e:
+            return degraded_videos_response(channel_id, query, response_format, e)
+        
+        if not cache_data['videos']:
+            return jsonify(empty_videos_payload(cache_data))
+        
+        return videos_response(channel_id, cache_data, query, response_format)
+        
+    except Exception as e:
+        logger.exception("Unhandled exception in /api/videos: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/channels')
+def get_channels():
+    """List the channels in the session: the signed-in one and any linked to it"""
+    if not is_signed_in():
+        return jsonify({'authenticated': False})
+    
+    primary_id = session.get('channel', {}).get('id')
+    return jsonify({
+        'authenticated': True,
+        'channels': [
+            {'id': channel['id'], 'title': channel.get('title'), 'primary': channel['id'] == primary_id}
+            for channel, _ in session_channels()
+        ],
+        'max_linked_channels': app.config['MAX_LINKED_CHANNELS']
+    })
+
+@app.route('/api/channels/<channel_id>/unlink', methods=['POST'])
+def unlink_channel(channel_id):
+    """Remove a linked channel from the session"""
+    if not is_signed_in():
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    linked = session.get('linked_channels', [])
+    remaining = [entry for entry in linked if entry['channel']['id'] != channel_id]
+    if len(remaining) == len(linked):
+        primary = session.get('channel')
+        if primary and primary['id'] == channel_id:
+            return jsonify({'error': 'The signed-in channel cannot be unlinked; log out instead'}), 400
+        return jsonify({'error': 'Channel is not linked'}), 404
+    
+    for entry in linked:
+        if entry['channel']['id'] == channel_id:
+            forget_linked_channel(entry)
+    session['linked_channels'] = remaining
+    logger.info("Unlinked channel %s", channel_id)
+    return jsonify({'message': 'Channel unlinked'})
+
+def channel_status(channel, **fields):
+    """Per-channel entry of an aggregate response"""
+    return {'id': channel['id'], 'title': channel.get('title'), **fields}
+
+def cached_channel_dataset(channel, credentials_id):
+    """A channel's cached dataset and status for the aggregate view, or None on a miss.
+
+    Stale datasets are served as they are and rebuilt in the background, as on /api/videos.
+    """
+    cached_data = load_cached_videos(channel['id'])
+    if not cached_data:
+        return None
+    stale = is_cache_stale(cached_data)
+    if stale:
+        creds = token_manager.get(credentials_id)
+        if creds:
+            schedule_background_refresh(creds, channel, credentials_id)
+    return cached_data, channel_status(channel, cached=True, stale=stale)
+
+def fetch_channel_dataset(channel, credentials_id, force_refresh=False):
+    """Fetch a channel's dataset for the aggregate view: (data or None, status).
+
+    Runs on a worker thread, so credentials come from the token manager rather
+    than the session. The fetch is coalesced with /api/videos and the
+    pre-warmer, and a failed one falls back to the last good dataset.
+    """
+    channel_id = channel['id']
+    try:
+        creds = token_manager.get(credentials_id)
+        if not creds:
+            return None, channel_status(channel, error='Credentials expired - link this channel again')
+        
+        mark_channel_active(channel_id)
+        cache_data = coalesced_fetch(
+            channel_id,
+            lambda: refresh_channel_videos(creds, channel, credentials_id=credentials_id),
+            None if force_refresh else lambda: load_cached_videos(channel_id, fresh_only=True)
+        )
+        if not cache_data['videos']:
+            return None, channel_status(channel, error=cache_data['error'])
+        return cache_data, channel_status(channel)
+    except FetchError as e:
+        last_good = load_cached_videos(channel_id)
+        if last_good:
+            logger.warning("Serving last good data for %s (degraded): %s", channel_id, e)
+            return last_good, channel_status(channel, cached=True, stale=True, degraded=True)
+        return None, channel_status(channel, error=str(e), stage=e.stage)
+    except Exception as e:
+        logger.exception("Could not load channel %s for the aggregate view: %s", channel_id, e)
+        return None, channel_status(channel, error=str(e))
+
+def aggregate_dataset(datasets):
+    """Merged dataset for [(channel ID, dataset)], memoized per combination of dataset versions"""
+    key = json.dumps([[channel_id, data.get('cache_time')] for channel_id, data in datasets])
+    merged = aggregate_datasets.get(key)
+    if merged is None:
+        merged = merge_datasets(datasets)
+        merged.update({
+            # Versions the encoded responses; changes whenever any channel's dataset does
+            'cache_time': key,
+            # The oldest channel's refresh time, so the view never looks fresher than it is
+            'last_updated': min((data.get('last_updated') or '' for _, data in datasets), default=None),
+            'total_videos_available': sum(
+                data.get('total_videos_available', len(data['videos'])) for _, data in datasets
             )
-            videos_response = videos_request.execute()
-            
-            # Filter to only public videos
-            all_videos = videos_response.get('items', [])
-            public_videos = [video for video in all_videos 
-                           if video.get('status', {}).get('privacyStatus') == 'public']
-            
-            if not public_videos:
-                return jsonify({
-                    'authenticated': True,
-                    'videos': [], 
-                    'error': 'No public videos found',
-                    'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'total_videos_fetched': 0,
-                    'total_videos_available': 0
-                })
-            
-            # Get video IDs for analytics (public videos only)
-            video_ids = [video['id'] for video in public_videos]
-            total_videos_fetched = len(video_ids)
-            
-            print(f"✅ Processing {len(public_videos)} public videos")
-            
-        except Exception as e:
-            print(f"❌ Search/Videos API error (likely quota exceeded): {e}")
-            # Use test mode with mock data
-            return get_test_videos(sort_by, sort_direction, force_refresh)
-        
-        print(f"Fetching metrics for {total_videos_fetched} videos")
-        
-        # Get analytics data for ALL videos using Groups API (single call)
-        print(f"🔄 Fetching metrics for all {total_videos_fetched} videos using Groups API...")
-        all_metrics = get_video_metrics_with_groups(youtube_analytics, video_ids)
-        
-        # If Groups API fails, return error instead of falling back
-        if not all_metrics:
-            print("❌ Groups API failed - no fallback to save API quota")
-            return jsonify({'error': 'Analytics API failed. Please try again later.'}), 500
-        
-        # Process videos with the fetched metrics
-        videos_with_metrics = []
-        for i, video in enumerate(public_videos, 1):
-            video_id = video['id']
-            print(f"Processing video {i}/{total_videos_fetched}: {video_id}")
-            
-            try:
-                # Get metrics for this video from the batch result
-                video_metrics = all_metrics.get(video_id, {})
-                
-                # Calculate video length
-                duration = isodate.parse_duration(video['contentDetails']['duration'])
-                video_length = f"{int(duration.total_seconds() // 60):02d}:{int(duration.total_seconds() % 60):02d}"
-                
-                # Calculate % watched
-                avg_view_duration = video_metrics.get('averageViewDuration', 0)
-                total_duration = duration.total_seconds()
-                percent_watched = (avg_view_duration / total_duration * 100) if total_duration > 0 else 0
-                
-                video_data = {
-                    'id': video_id,
-                    'title': video['snippet']['title'],
-                    'thumbnail': video['snippet']['thumbnails']['medium']['url'],
-                    'publishedAt': video['snippet']['publishedAt'],
-                    'views': video_metrics.get('views', 0),
-                    'likes': video_metrics.get('likes', 0),
-                    'length': video_length,
-                    'watchTime': f"{int(avg_view_duration // 60):02d}:{int(avg_view_duration % 60):02d}",
-                    'percentWatched': round(percent_watched, 1),
-                    'subsGained': video_metrics.get('subscribersGained', 0)
-                }
-                
-                videos_with_metrics.append(video_data)
-                print(f"  ✅ Success")
-                
-            except Exception as e:
-                print(f"  ❌ Error processing video {video_id}: {e}")
-                continue
+        })
+        aggregate_datasets.set(key, merged, app.config['CACHE_TTL_SECONDS'] + app.config['CACHE_STALE_TTL_SECONDS'])
+    return merged
+
+@app.route('/api/channels/aggregate')
+def get_aggregate_videos():
+    """Videos of every channel in the session, merged into one sortable dataset.
+
+    Cache hits are read on the request thread; channels that miss are fetched
+    concurrently, so a cold request takes as long as its slowest channel
+    rather than the sum. Rows carry a channelId; the per-channel outcome
+    (cached, stale, degraded or error) is listed in 'channels', and channels
+    that could not be loaded are left out of the rows.
+    """
+    if not is_signed_in():
+        return jsonify({'authenticated': False})
+    
+    try:
+        force_refresh = request.args.get('refresh', 'false').lower() == 'true'
+        response_format = request.args.get('format', 'json')
+        if response_format not in VIDEO_RESPONSE_FORMATS:
+            return jsonify({'error': f"format must be one of: {', '.join(VIDEO_RESPONSE_FORMATS)}"}), 400
+        try:
+            query = parse_videos_query(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        print(f"✅ Successfully processed {len(videos_with_metrics)}/{total_videos_fetched} videos")
+        # Sessions from before sign-in resolved the channel resolve it once here
+        if not session.get('channel'):
+            creds = get_credentials()
+            if not creds:
+                return jsonify({'authenticated': False})
+            store_session_channel(creds)
         
-        # Sort videos
-        videos_with_metrics = sort_videos(videos_with_metrics, sort_by, sort_direction)
+        channels = session_channels()
+        if not channels:
+            return jsonify({'authenticated': True, 'error': 'No channel found'}), 404
         
-        # Calculate last updated (yesterday's date)
-        last_updated = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        results = [None] * len(channels)
+        if not force_refresh:
+            with timed_phase('cache'):
+                results = [cached_channel_dataset(channel, credentials_id) for channel, credentials_id in channels]
         
-        # Cache the results
-        cache_data = {
-            'videos': videos_with_metrics,
-            'last_updated': last_updated,
-            'total_videos_available': total_videos_fetched,
-            'cache_time': datetime.now().isoformat()
-        }
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            with timed_phase('fetch'):
+                workers = min(len(misses), app.config['AGGREGATE_MAX_WORKERS'])
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='aggregate') as executor:
+                    fetched = executor.map(lambda i: fetch_channel_dataset(*channels[i], force_refresh), misses)
+                    for i, result in zip(misses, fetched):
+                        results[i] = result
+        
+        statuses = [status for _, status in results]
+        datasets = [(status['id'], data) for data, status in results if data]
+        if not datasets:
+            return jsonify({
+                'authenticated': True,
+                'degraded': True,
+                'videos': [],
+                'channels': statuses,
+                'error': 'No channel data available',
+                'total_videos_fetched': 0,
+                'total_videos_available': 0
+            }), 503
         
-        with open(cache_file, 'w') as f:
-            json.dump(cache_data, f, indent=2)
+        with timed_phase('merge'):
+            merged = aggregate_dataset(datasets)
         
-        print(f"Saved cache: {cache_file}")
+        return videos_response('aggregate', merged, query, response_format, channels=statuses)
         
+    except Exception as e:
+        logger.exception("Unhandled exception in /api/channels/aggregate: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/videos/stream')
+def stream_videos():
+    """Stream a load as Server-Sent Events: metadata pages, metrics patches, then done.
+
+    Cache hits (fresh or stale) are sent as a single done event. On a miss the
+    fetch runs on its own thread and its progress is relayed as it happens;
+    the done event carries the same payload as /api/videos.
+    """
+    if not is_signed_in():
+        return jsonify({'authenticated': False})
+    
+    # Legacy sessions without a resolved channel use /api/videos, which resolves it
+    channel = session.get('channel')
+    if not channel:
+        return jsonify({'authenticated': True, 'error': 'Channel not resolved yet'}), 409
+    
+    channel_id = channel['id']
+    force_refresh = request.args.get('refresh', 'false').lower() == 'true'
+    
+    if not force_refresh:
+        cached_data = load_cached_videos(channel_id)
+        if cached_data:
+            stale = is_cache_stale(cached_data)
+            if stale:
+                creds = get_credentials()
+                if creds:
+                    schedule_background_refresh(creds, channel, session.get('credentials_id'))
+            payload = build_videos_payload(cached_data, DEFAULT_VIDEOS_QUERY, 'json', {'cached': True, 'stale': stale})
+            return event_stream_response([sse_event('done', payload)])
+    else:
+        logger.info("Force refresh requested - bypassing cache")
+    
+    creds = get_credentials()
+    if not creds:
+        return jsonify({'authenticated': False})
+    
+    mark_channel_active(channel_id)
+    credentials_id = session.get('credentials_id')
+    events = queue.Queue()
+    
+    def run_fetch():
+        # Keeps running if the client disconnects, so the cache still gets written
+        try:
+            cache_data = coalesced_fetch(
+                channel_id,
+                lambda: refresh_channel_videos(
+                    creds, channel,
+                    on_progress=lambda event, rows: events.put((event, {'videos': rows})),
+                    credentials_id=credentials_id
+                ),
+                None if force_refresh else lambda: load_cached_videos(channel_id, fresh_only=True)
+            )
+            if cache_data['videos']:
+                events.put(('done', build_videos_payload(cache_data, DEFAULT_VIDEOS_QUERY, 'json', {})))
+            else:
+                events.put(('done', empty_videos_payload(cache_data)))
+        except FetchError as e:
+            # Fall back to the last good dataset, as /api/videos does
+            last_good = load_cached_videos(channel_id)
+            if last_good:
+                events.put(('done', build_videos_payload(
+                    last_good, DEFAULT_VIDEOS_QUERY, 'json', {'cached': True, 'stale': True, 'degraded': True}
+                )))
+            else:
+                events.put(('failed', {'error': str(e), 'stage': e.stage}))
+        except Exception as e:
+            logger.exception("Streamed fetch failed: %s", e)
+            events.put(('failed', {'error': str(e)}))
+    
+    threading.Thread(target=run_fetch, name=f"stream-{channel_id}", daemon=True).start()
+    
+    def generate():
+        while True:
+            try:
+                event, payload = events.get(timeout=STREAM_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            yield sse_event(event, payload)
+            if event in ('done', 'failed'):
+                return
+    
+    return event_stream_response(generate())
+
+def event_stream_response(messages):
+    """text/event-stream response that proxies must not buffer"""
+    response = Response(messages, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+class FetchError(Exception):
+    """A stage of the YouTube fetch pipeline failed ('discovery', 'analytics', or 'wait' on another fetch)"""
+    def __init__(self, stage, message):
+        super().__init__(message)
+        self.stage = stage
+
+def coalesced_fetch(channel_id, fetch, check=None):
+    """video_fetches.do for a channel; timing out on another caller's fetch is a FetchError"""
+    try:
+        return video_fetches.do(channel_id, fetch, check)
+    except TimeoutError as e:
+        raise FetchError('wait', str(e)) from e
+
+def refresh_channel_videos(creds, channel, on_progress=None, credentials_id=None):
+    """Fetch videos and metrics for a channel, process them and write the cache.
+
+    Returns the cache payload. Channels with no public videos get a payload with
+    an empty video list and an 'error' message, which is not cached.
+
+    on_progress(event, rows), if given, receives preview rows as they become
+    available: 'videos' per videos().list page (metrics still zero) and
+    'metrics' per completed Analytics chunk.
+
+    credentials_id, if given, is the sign-in creds came from; token refreshes
+    then go through the token manager.
+    """
+    logger.info("Fetching fresh data for %s from YouTube APIs", channel['id'])
+    
+    # Sync (googleapiclient) or async (httpx) engine, per FETCH_ENGINE
+    engine = create_fetch_engine(creds, credentials_id)
+    
+    on_page = None
+    if on_progress:
+        on_page = lambda page: on_progress('videos', build_video_rows([video for video in page if is_public(video)], {}))
+    
+    # Revalidate the last refresh's videos().list batches instead of re-downloading them
+    revalidator = VideoRevalidator()
+    if app.config['CONDITIONAL_REFRESH']:
+        try:
+            revalidator = VideoRevalidator(*resource_store.load(channel['id']))
+        except Exception as e:
+            logger.warning("Could not load stored video resources: %s", e)
+    
+    # Walk the uploads playlist page by page, then filter by privacy status
+    try:
+        with timed_phase('discovery'):
+            all_videos = engine.discover_videos(
+                channel['uploads_playlist_id'],
+                max_videos=app.config['MAX_VIDEOS'],
+                on_page=on_page,
+                revalidator=revalidator
+            )
+    except Exception as e:
+        logger.error("Playlist/Videos API error: %s", e)
+        raise FetchError('discovery', str(e)) from e
+    
+    logger.info("%s", revalidator.summary())
+    if app.config['CONDITIONAL_REFRESH']:
+        try:
+            resource_store.save(channel['id'], revalidator.resources, revalidator.batches)
+        except Exception as e:
+            logger.warning("Could not store video resources: %s", e)
+    
+    if not all_videos:
+        return {'videos': [], 'error': 'No videos found'}
+    
+    # Filter to only public videos
+    public_videos = [video for video in all_videos if is_public(video)]
+    
+    if not public_videos:
+        return {'videos': [], 'error': 'No public videos found'}
+    
+    # Get video IDs for analytics (public videos only)
+    video_ids = [video['id'] for video in public_videos]
+    total_videos_fetched = len(video_ids)
+    
+    logger.info("Processing %d public videos", len(public_videos))
+    
+    # Get analytics data for ALL videos using chunked batch queries
+    logger.info("Fetching metrics for all %d videos using batch queries", total_videos_fetched)
+    on_metrics = None
+    if on_progress:
+        videos_by_id = {video['id']: video for video in public_videos}
+        on_metrics = lambda chunk_metrics: on_progress('metrics', build_video_rows(
+            [videos_by_id[video_id] for video_id in chunk_metrics if video_id in videos_by_id],
+            chunk_metrics
+        ))
+    
+    with timed_phase('analytics'):
+        if app.config['METRICS_INCREMENTAL']:
+            all_metrics, incomplete_ids = get_video_metrics_incremental(engine, channel['id'], video_ids, on_metrics)
+        else:
+            all_metrics, incomplete_ids = get_video_metrics_with_groups(engine, video_ids, on_metrics)
+    
+    # If the batch queries fail, return error instead of falling back
+    if not all_metrics:
+        logger.error("Analytics batch queries failed - no fallback to save API quota")
+        raise FetchError('analytics', 'Analytics API failed. Please try again later.')
+    
+    # Process videos with the fetched metrics, column by column
+    with timed_phase('process'):
+        videos_with_metrics = build_video_rows(public_videos, all_metrics)
+    
+    logger.info("Processed %d videos", len(videos_with_metrics))
+    
+    # Append today's snapshot to the local time-series history; videos with incomplete
+    # metrics are left out rather than recorded as a dip
+    try:
+        metrics_store.record_snapshots(
+            channel['id'],
+            date.today().isoformat(),
+            [dict(video, averageViewDuration=all_metrics.get(video['id'], {}).get('averageViewDuration', 0))
+             for video in videos_with_metrics if video['id'] not in incomplete_ids]
+        )
+    except Exception as e:
+        logger.warning("Could not record metrics history: %s", e)
+    
+    # Calculate last updated (yesterday's date)
+    last_updated = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    
+    # Cache the results
+    cache_key = get_cache_key(channel['id'])
+    cache_data = {
+        'videos': videos_with_metrics,
+        'last_updated': last_updated,
+        'total_videos_available': total_videos_fetched,
+        'cache_time': datetime.now().isoformat(),
+        # Some videos' metrics are incomplete: goes stale after PARTIAL_CACHE_TTL_SECONDS instead
+        'partial': bool(incomplete_ids),
+        # Per-column sort orders, built once here so requests only slice them
+        'sort_orders': build_sort_orders(videos_with_metrics)
+    }
+    
+    # Keep the entry past its fresh TTL so it can be served stale while refreshing
+    video_cache.set(
+        cache_key,
+        cache_data,
+        app.config['CACHE_TTL_SECONDS'] + app.config['CACHE_STALE_TTL_SECONDS']
+    )
+    
+    logger.info("Saved cache: %s", cache_key)
+    
+    # Encode the dashboard's default view now so the first cache hits skip serialization and gzip
+    for response_format in VIDEO_RESPONSE_FORMATS:
+        encode_videos_response(channel['id'], cache_data, DEFAULT_VIDEOS_QUERY, response_format, cached=True, stale=False)
+    
+    return cache_data
+
+def is_public(video):
+    """True for videos whose privacy status is public"""
+    return video.get('privacyStatus') == 'public'
+
+def mark_channel_active(channel_id):
+    """Record that a channel is in use so the pre-warmer keeps it warm"""
+    try:
+        credential_store.touch(channel_id)
+    except Exception as e:
+        logger.warning("Could not mark channel %s active: %s", channel_id, e)
+
+def schedule_background_refresh(creds, channel, credentials_id=None):
+    """Queue a background rebuild of a channel's cache (deduplicated per channel)"""
+    channel_id = channel['id']
+    mark_channel_active(channel_id)
+    
+    # No point queueing a rebuild that can only fail fast
+    if quota_guard.is_open('youtube'):
+        return
+    
+    def refresh():
+        try:
+            video_fetches.do(
+                channel_id,
+                lambda: refresh_channel_videos(creds, channel, credentials_id=credentials_id),
+                lambda: load_cached_videos(channel_id, fresh_only=True)
+            )
+        except Exception as e:
+            logger.error("Background refresh failed for %s: %s", channel_id, e)
+    
+    if background_refresher.submit(channel_id, refresh):
+        logger.info("Scheduled background refresh for %s", channel_id)
+
+@app.route('/api/videos/<video_id>/history')
+def get_video_history(video_id):
+    """Get a video's recorded metric snapshots from the local history store"""
+    if not is_signed_in():
+        return jsonify({'authenticated': False}), 401
+    
+    channel = session.get('channel')
+    if not channel:
+        return jsonify({'authenticated': True, 'error': 'No channel found'}), 404
+    
+    start_date = request.args.get('start')
+    end_date = request.args.get('end')
+    try:
+        for value in (start_date, end_date):
+            if value:
+                date.fromisoformat(value)
+    except ValueError:
+        return jsonify({'error': 'start and end must be YYYY-MM-DD dates'}), 400
+    
+    try:
+        history = metrics_store.history(channel['id'], video_id, start_date, end_date)
         return jsonify({
             'authenticated': True,
-            'videos': videos_with_metrics,
-            'last_updated': last_updated,
-            'total_videos_fetched': len(videos_with_metrics),
-            'total_videos_available': total_videos_fetched
+            'video_id': video_id,
+            'history': history
         })
-        
     except Exception as e:
-        print(f"❌ Unhandled exception: {e}")
-        print(f"❌ Exception type: {type(e).__name__}")
-        print(f"❌ Traceback: {e}")
+        logger.error("History query error: %s", e)
         return jsonify({'error': str(e)}), 500
 
+def iter_upload_pages(youtube, uploads_playlist_id, max_videos=None):
+    """Yield (video_ids, total_results) per uploads playlist page, newest first.
+
+    Each playlistItems page costs 1 quota unit (vs 100 for search), and
+    pages are only requested as the caller consumes them.
+    """
+    yielded = 0
+    page_token = None
+
+    while True:
+        response = youtube.playlistItems().list(
+            part='contentDetails',
+            playlistId=uploads_playlist_id,
+            maxResults=PLAYLIST_PAGE_SIZE,
+            pageToken=page_token
+        ).execute()
+
+        page_token = response.get('nextPageToken')
+        video_ids, at_ceiling = cap_playlist_page(
+            [item['contentDetails']['videoId'] for item in response.get('items', [])], yielded, max_videos, page_token
+        )
+        yield video_ids, response.get('pageInfo', {}).get('totalResults')
+        yielded += len(video_ids)
+
+        if not page_token or at_ceiling:
+            return
+
+def list_video_details(youtube, video_ids, etag=None):
+    """videos().list response for up to 50 IDs; NOT_MODIFIED if it still matches etag"""
+    api_request = youtube.videos().list(
+        part=VIDEO_PARTS,
+        id=','.join(video_ids),
+        maxResults=VIDEOS_LIST_CHUNK_SIZE
+    )
+    if etag:
+        api_request.headers['If-None-Match'] = etag
+    return api_request.execute()
+
 def get_video_metrics(youtube_analytics, video_id):
     """Get analytics metrics for a single video"""
     try:
         # Query YouTube Analytics API for views, likes, and average view duration
         request = youtube_analytics.reports().query(
             ids=f'channel==MINE',
-            startDate='2024-01-01',
+            startDate=app.config['METRICS_START_DATE'],
             endDate=datetime.now().strftime('%Y-%m-%d'),
             metrics='views,likes,averageViewDuration',
             dimensions='video',
@@ -639,7 +1345,7 @@ def get_video_metrics(youtube_analytics, video_id):
         try:
             subs_request = youtube_analytics.reports().query(
                 ids=f'channel==MINE',
-                startDate='2024-01-01',
+                startDate=app.config['METRICS_START_DATE'],
                 endDate=datetime.now().strftime('%Y-%m-%d'),
                 metrics='subscribersGained',
                 dimensions='video',
@@ -653,13 +1359,13 @@ def get_video_metrics(youtube_analytics, video_id):
                 metrics['subscribersGained'] = subs_row[1]
                 
         except Exception as subs_error:
-            print(f"  ⚠️ Could not fetch subscribers gained for {video_id}: {subs_error}")
+            logger.warning("Could not fetch subscribers gained for %s: %s", video_id, subs_error)
             # Keep default value of 0
         
         return metrics
             
     except Exception as e:
-        print(f"  ❌ Analytics API error for {video_id}: {e}")
+        logger.error("Analytics API error for %s: %s", video_id, e)
         return {
             'views': 0,
             'likes': 0,
@@ -667,62 +1373,262 @@ def get_video_metrics(youtube_analytics, video_id):
             'subscribersGained': 0
         }
 
-def get_video_metrics_with_groups(youtube_analytics, video_ids):
-    """Get analytics metrics for multiple videos using efficient batch query"""
-    try:
-        print(f"🔄 Using efficient batch query for {len(video_ids)} videos...")
-        
-        # Check if filter string would be too long (YouTube video IDs are 11 chars each)
-        filter_string = f'video=={",".join(video_ids)}'
-        if len(filter_string) > 1500:  # Conservative limit to avoid API issues
-            print(f"⚠️ Filter string too long ({len(filter_string)} chars), limiting to first 100 videos")
-            video_ids = video_ids[:100]  # Limit to first 100 videos
-            filter_string = f'video=={",".join(video_ids)}'
-        
-        # Use the working approach that was already efficient
-        # This uses a single API call with video filters
-        group_query = {
-            'ids': 'channel==MINE',
-            'startDate': '2024-01-01',
-            'endDate': datetime.now().strftime('%Y-%m-%d'),
-            'metrics': 'views,likes,averageViewDuration,averageViewPercentage,subscribersGained',
-            'dimensions': 'video',
-            'filters': filter_string,
-            'sort': '-views'
+def _thread_http(api_request):
+    """Transport for executing a request off the calling thread.
+
+    httplib2 connections are not thread-safe, so each pool worker uses its own
+    pooled transport bound to the same credentials as the originating service.
+    """
+    credentials = getattr(api_request.http, 'credentials', None)
+    if credentials is None:
+        return None
+    return authorized_http(credentials)
+
+def query_video_metrics_chunk(youtube_analytics, video_ids, start_date, end_date, http=None):
+    """Run one Analytics reports().query for a chunk of videos and map rows by video ID"""
+    api_request = youtube_analytics.reports().query(**metrics_query_params(video_ids, start_date, end_date))
+
+    if http is None:
+        http = _thread_http(api_request)
+    response = api_request.execute(http=http) if http is not None else api_request.execute()
+    return metrics_from_report(response)
+
+def fetch_metrics_chunks(youtube_analytics, video_ids, start_date, end_date, on_chunk=None):
+    """Query metrics for a date range in filter-safe chunks on a bounded pool.
+
+    Returns (metrics_by_video, failed_ids); failed_ids holds videos whose chunk
+    still failed after ANALYTICS_CHUNK_RETRIES individual retries. on_chunk, if
+    given, is called with each chunk's metrics as it completes.
+    """
+    chunks = chunk_video_ids_for_filter(video_ids)
+    max_workers = max(1, min(app.config['ANALYTICS_MAX_WORKERS'], len(chunks)))
+    logger.info("Querying metrics %s..%s for %d videos in %d chunks (%d workers)",
+                start_date, end_date, len(video_ids), len(chunks), max_workers)
+
+    metrics_by_video = {}
+    failed_chunks = []
+
+    # Fan the chunks out over a bounded pool; each worker uses its own transport
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(query_video_metrics_chunk, youtube_analytics, chunk, start_date, end_date): chunk
+            for chunk in chunks
         }
+        for future in as_completed(futures):
+            try:
+                chunk_metrics = future.result()
+                metrics_by_video.update(chunk_metrics)
+                if on_chunk:
+                    on_chunk(chunk_metrics)
+            except Exception as e:
+                logger.warning("Metrics chunk of %d videos failed: %s", len(futures[future]), e)
+                failed_chunks.append(futures[future])
+
+    # Retry failed chunks one at a time so a single bad chunk can't sink the batch
+    failed_ids = set()
+    for chunk in failed_chunks:
+        for attempt in range(1, app.config['ANALYTICS_CHUNK_RETRIES'] + 1):
+            api_metrics.record_retry('youtubeAnalytics.reports.query')
+            try:
+                chunk_metrics = query_video_metrics_chunk(youtube_analytics, chunk, start_date, end_date)
+                metrics_by_video.update(chunk_metrics)
+                if on_chunk:
+                    on_chunk(chunk_metrics)
+                logger.info("Retried metrics chunk of %d videos (attempt %d)", len(chunk), attempt)
+                break
+            except Exception as e:
+                logger.warning("Retry %d for metrics chunk of %d videos failed: %s", attempt, len(chunk), e)
+        else:
+            failed_ids.update(chunk)
+
+    return metrics_by_video, failed_ids
+
+class SyncFetchEngine(FetchEngine):
+    """googleapiclient engine: blocking .execute() calls, metrics chunks on a thread pool"""
+
+    def __init__(self, creds):
+        self.youtube = get_youtube(creds)
+        self.youtube_analytics = get_youtube_analytics(creds)
+
+    def discover_videos(self, uploads_playlist_id, max_videos=None, on_page=None, revalidator=None):
+        revalidator = revalidator or VideoRevalidator()
+        aligner = BatchAligner(VIDEOS_LIST_CHUNK_SIZE)
+        videos = []
+
+        def load(batch):
+            # Detailed video info including privacy status, revalidated per batch of up to 50 IDs
+            etag = revalidator.etag_for(batch)
+            page = revalidator.records_for(batch, list_video_details(self.youtube, batch, etag))
+            videos.extend(page)
+            if on_page:
+                on_page(page)
+
+        # Stream pages from the uploads playlist (1 quota unit per page of 50)
+        for video_ids, total in iter_upload_pages(self.youtube, uploads_playlist_id, max_videos=max_videos):
+            for batch in aligner.add(video_ids, total):
+                load(batch)
+        for batch in aligner.flush():
+            load(batch)
+        return videos
+
+    def fetch_metrics(self, video_ids, start_date, end_date, on_chunk=None):
+        return fetch_metrics_chunks(self.youtube_analytics, video_ids, start_date, end_date, on_chunk)
+
+def create_fetch_engine(creds, credentials_id=None):
+    """Build the fetch engine selected by FETCH_ENGINE"""
+    engine = app.config['FETCH_ENGINE']
+    if engine == 'sync':
+        return SyncFetchEngine(creds)
+    if engine == 'async':
+        return AsyncFetchEngine(
+            creds,
+            max_concurrency=app.config['ANALYTICS_MAX_WORKERS'],
+            chunk_retries=app.config['ANALYTICS_CHUNK_RETRIES'],
+            max_connections=app.config['ASYNC_MAX_CONNECTIONS'],
+            quota_guard=quota_guard,
+            api_root=app.config['YOUTUBE_API_ROOT_URL'],
+            # Shared, deduplicated and persisted refreshes for sign-ins; in place otherwise (pre-warmer)
+            refresh_credentials=(lambda token: token_manager.refresh(credentials_id, token)) if credentials_id else None
+        )
+    raise ValueError(f"Unknown FETCH_ENGINE: {engine}")
+
+def get_video_metrics_with_groups(engine, video_ids, on_chunk=None):
+    """Get lifetime analytics metrics for multiple videos using chunked, concurrent batch queries.
+
+    Returns (metrics by video, IDs whose metrics are incomplete).
+    """
+    try:
+        metrics_by_video, failed_ids = engine.fetch_metrics(
+            video_ids,
+            app.config['METRICS_START_DATE'],
+            datetime.now().strftime('%Y-%m-%d'),
+            on_chunk
+        )
+
+        if not metrics_by_video:
+            logger.error("No data returned from batch query")
+            return {}, set()
+
+        logger.info("Batch query returned metrics for %d videos", len(metrics_by_video))
+        return metrics_by_video, set(failed_ids)
+
+    except Exception as e:
+        logger.error("Batch query error: %s", e)
+        return {}, set()
+
+def get_video_metrics_incremental(engine, channel_id, video_ids, on_chunk=None):
+    """Get lifetime metrics from stored settled totals plus queries over only recent days.
+
+    Days older than METRICS_LATE_DATA_DAYS are folded into each video's persisted
+    totals; the late-data window is re-queried on every refresh and never stored.
+    on_chunk receives lifetime metrics per completed late-window chunk.
+
+    Returns (metrics by video, IDs whose late-window query failed). Those videos'
+    metrics are missing the recent days.
+    """
+    try:
+        today = date.today()
+        settled_through = today - timedelta(days=app.config['METRICS_LATE_DATA_DAYS'])
+        stored = metrics_store.load_totals(channel_id)
+
+        # Group videos by where their settle window starts so each group is one date range
+        groups = {}
+        for video_id in video_ids:
+            if video_id in stored:
+                settle_from = date.fromisoformat(stored[video_id][0]) + timedelta(days=1)
+            else:
+                settle_from = date.fromisoformat(app.config['METRICS_START_DATE'])
+            groups.setdefault(settle_from, []).append(video_id)
+
+        settled = {}
+        # Videos whose settle query failed: first day their totals don't cover
+        unsettled_from = {}
+        any_success = bool(stored)
+        for settle_from, group_ids in groups.items():
+            base = {video_id: stored[video_id][1] if video_id in stored else dict(EMPTY_TOTALS)
+                    for video_id in group_ids}
+
+            if settle_from > settled_through:
+                # Already settled through the current cut-off
+                settled.update(base)
+                continue
+
+            window, failed_ids = engine.fetch_metrics(
+                group_ids, settle_from.isoformat(), settled_through.isoformat()
+            )
+            updated = {}
+            for video_id in group_ids:
+                if video_id in failed_ids:
+                    # Keep the old cut-off so the next refresh re-queries this window
+                    settled[video_id] = base[video_id]
+                    unsettled_from[video_id] = settle_from
+                    continue
+                totals = base[video_id]
+                if video_id in window:
+                    totals = add_totals(totals, totals_from_metrics(window[video_id]))
+                updated[video_id] = totals
+
+            if updated:
+                any_success = True
+                metrics_store.save_totals(channel_id, settled_through.isoformat(), updated)
+                settled.update(updated)
+
+        if unsettled_from:
+            logger.warning("%d videos kept their previous settled totals this refresh", len(unsettled_from))
+
+        # Late-data window: always re-queried, never persisted. Videos that failed to
+        # settle query from their own cut-off, so the days in between aren't lost
+        provisional = {}
+        provisional_from = settled_through + timedelta(days=1)
+        late_windows = {}
+        for video_id in video_ids:
+            late_windows.setdefault(unsettled_from.get(video_id, provisional_from), []).append(video_id)
         
-        # Execute the query
-        response = youtube_analytics.reports().query(**group_query).execute()
-        
-        if not response.get('rows'):
-            print("❌ No data returned from batch query")
-            return {}
-        
-        # Convert response to video_id -> metrics mapping
+        # Late-window chunks complete a video's lifetime totals, so they can be reported as they land
+        on_late_chunk = None
+        if on_chunk:
+            on_late_chunk = lambda chunk_metrics: on_chunk({
+                video_id: metrics_from_totals(add_totals(settled.get(video_id, EMPTY_TOTALS), totals_from_metrics(metrics)))
+                for video_id, metrics in chunk_metrics.items()
+            })
+        incomplete_ids = set()
+        for window_from, window_ids in late_windows.items():
+            if window_from > today:
+                continue
+            window, failed_ids = engine.fetch_metrics(
+                window_ids, window_from.isoformat(), today.isoformat(), on_late_chunk
+            )
+            provisional.update(window)
+            incomplete_ids.update(failed_ids)
+        any_success = any_success or bool(provisional)
+
+        if not any_success:
+            logger.error("No data returned from incremental metrics queries")
+            return {}, set()
+        if incomplete_ids:
+            logger.warning("%d videos are missing their late-window metrics this refresh", len(incomplete_ids))
+
         metrics_by_video = {}
-        for row in response['rows']:
-            video_id = row[0]  # First column is video ID
-            metrics_by_video[video_id] = {
-                'views': row[1],
-                'likes': row[2],
-                'averageViewDuration': row[3],
-                'averageViewPercentage': row[4],
-                'subscribersGained': row[5]
-            }
-        
-        print(f"✅ Batch query returned metrics for {len(metrics_by_video)} videos")
-        return metrics_by_video
-        
+        for video_id in video_ids:
+            totals = settled.get(video_id, EMPTY_TOTALS)
+            if video_id in provisional:
+                totals = add_totals(totals, totals_from_metrics(provisional[video_id]))
+            metrics_by_video[video_id] = metrics_from_totals(totals)
+
+        logger.info("Incremental metrics for %d videos (%d settle windows, late window from %s)",
+                    len(metrics_by_video), len(groups), provisional_from)
+        return metrics_by_video, incomplete_ids
+
     except Exception as e:
-        print(f"❌ Batch query error: {e}")
-        return {}
+        logger.error("Incremental metrics error: %s", e)
+        return {}, set()
 
 # Note: Groups API implementation removed due to API issues
 # Using efficient batch query approach instead
 
 def get_video_metrics_fallback(youtube_analytics, video_ids):
     """Fallback to individual API calls if Groups API fails"""
-    print(f"🔄 Falling back to individual API calls for {len(video_ids)} videos...")
+    logger.info("Falling back to individual API calls for %d videos", len(video_ids))
     
     metrics_by_video = {}
     for video_id in video_ids:
@@ -731,45 +1637,27 @@ def get_video_metrics_fallback(youtube_analytics, video_ids):
             if metrics:
                 metrics_by_video[video_id] = metrics
         except Exception as e:
-            print(f"❌ Failed to get metrics for video {video_id}: {e}")
+            logger.error("Failed to get metrics for video %s: %s", video_id, e)
             continue
     
     return metrics_by_video
 
-def sort_videos(videos, sort_by, sort_direction):
-    """Sort videos by specified field and direction"""
-    reverse = sort_direction == 'desc'
-    
-    if sort_by == 'published':
-        return sorted(videos, key=lambda x: x['publishedAt'], reverse=reverse)
-    elif sort_by == 'views':
-        return sorted(videos, key=lambda x: x['views'], reverse=reverse)
-    elif sort_by == 'likes':
-        return sorted(videos, key=lambda x: x['likes'], reverse=reverse)
-    elif sort_by == 'watched':
-        return sorted(videos, key=lambda x: x['percentWatched'], reverse=reverse)
-    elif sort_by == 'length':
-        return sorted(videos, key=lambda x: x['length'], reverse=reverse)
-    elif sort_by == 'watchTime':
-        return sorted(videos, key=lambda x: x['watchTime'], reverse=reverse)
-    elif sort_by == 'subsGained':
-        return sorted(videos, key=lambda x: x['subsGained'], reverse=reverse)
-    else:
-        return videos
-
 @app.route('/api/clear-cache')
 def clear_cache():
-    """Clear all cache files"""
-    if 'user_credentials' not in session:
+    """Clear the signed-in user's cached videos"""
+    if not is_signed_in():
         return jsonify({'error': 'Authentication required'}), 401
     
     try:
-        cache_files = [f for f in os.listdir('.') if f.startswith('videos_cache_') and f.endswith('.json')]
-        for cache_file in cache_files:
-            os.remove(cache_file)
-            print(f"🗑️ Deleted cache file: {cache_file}")
+        channel = session.get('channel')
+        if not channel:
+            return jsonify({'message': 'Cleared 0 cache entries'})
+        
+        video_cache.delete(get_cache_key(channel['id']))
+        resource_store.delete(channel['id'])
+        logger.info("Deleted cache entry for channel %s", channel['id'])
         
-        return jsonify({'message': f'Cleared {len(cache_files)} cache files'})
+        return jsonify({'message': 'Cleared 1 cache entry'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -777,9 +1665,9 @@ def clear_cache():
 def clear_session():
     """Clear user session data"""
     try:
-        # Clear all session data
-        session.clear()
-        print("🗑️ Cleared all session data")
+        # Stop pre-warming this channel, then clear all session data
+        sign_out()
+        logger.info("Cleared all session data")
         return jsonify({'message': 'Session cleared successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -788,9 +1676,9 @@ def clear_session():
 def logout():
     """Logout user and clear session"""
     try:
-        # Clear all session data
-        session.clear()
-        print("🚪 User logged out, session cleared")
+        # Stop pre-warming this channel, then clear all session data
+        sign_out()
+        logger.info("User logged out, session cleared")
         return jsonify({'message': 'Logged out successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -798,9 +1686,7 @@ def logout():
 @app.errorhandler(Exception)
 def handle_exception(e):
     """Global error handler"""
-    print(f"❌ Unhandled exception: {e}")
-    print(f"❌ Exception type: {type(e).__name__}")
-    print(f"❌ Traceback: {e}")
+    logger.exception("Unhandled exception: %s", e)
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
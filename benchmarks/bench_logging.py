@@ -0,0 +1,118 @@
+"""Per-call cost of the app's logging on a request thread, against print().
+
+Each case runs N calls on the calling thread and reports the mean cost per
+call in microseconds. Output goes to os.devnull, or to a "slow" sink that
+sleeps on every write, like a stdout pipe the log collector isn't draining.
+
+- print:            print() of a formatted line (the old logging)
+- debug_disabled:   logger.debug() at LOG_LEVEL=INFO
+- sampled_out:      hot-path logger.info() at LOG_SAMPLE_RATE (0.01 by default)
+- info_queued:      logger.info() with a structured field, through the queue
+- access_log:       the per-request access line, fields built only when sampled
+
+    python benchmarks/bench_logging.py --calls 100000
+    python benchmarks/bench_logging.py --slow-sink-ms 1 --calls 2000
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+import logs  # noqa: E402
+from instrumentation import metrics  # noqa: E402
+
+class SlowSink:
+    """File-like sink whose writes take a fixed time"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def write(self, text):
+        if self.delay:
+            time.sleep(self.delay)
+        return len(text)
+
+    def flush(self):
+        pass
+
+def per_call_us(run, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        run(i)
+    return (time.perf_counter() - start) / calls * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark logging cost per call on the request thread")
+    parser.add_argument('--calls', type=int, default=100000)
+    parser.add_argument('--sample-rate', type=float, default=0.01)
+    parser.add_argument('--format', default='json', choices=('json', 'text'))
+    parser.add_argument('--slow-sink-ms', type=float, default=0.0, help='Sleep per write (simulates a blocked stdout)')
+    parser.add_argument('--output-dir', default=os.path.join(BENCHMARK_DIR, 'results'))
+    parser.add_argument('--label', default='')
+    args = parser.parse_args()
+
+    sink = SlowSink(args.slow_sink_ms / 1000) if args.slow_sink_ms else open(os.devnull, 'w')
+    logs._sample_rate = args.sample_rate
+    pipeline = logs.LogPipeline(logs.JsonFormatter() if args.format == 'json' else logs.TextFormatter(), 10000, sink)
+    root = logging.getLogger()
+    root.handlers[:] = [pipeline.handler]
+    root.setLevel(logging.INFO)
+    pipeline.start()
+
+    logger = logging.getLogger('bench')
+    hot = logs.sampled_logger('bench.hot')
+    access = logs.sampled_logger('bench.access')
+
+    def access_line(i):
+        if access.isEnabledFor(logging.INFO):
+            access.logger.info("%s %s %d", 'GET', '/api/videos', 200, extra={'fields': {
+                'method': 'GET', 'path': '/api/videos', 'status': 200, 'duration_ms': 1.23,
+                'bytes': 51234, 'phases_ms': {'cache': 0.2, 'sort': 0.1, 'serialize': 0.4}
+            }})
+
+    cases = {
+        'print': lambda i: print(f"✅ Cache hit served in {1.23:.1f}ms with no upstream calls (stale: False) #{i}", file=sink),
+        'debug_disabled': lambda i: logger.debug("Using cached data for %s", i),
+        'sampled_out': lambda i: hot.info("Cache hit served with no upstream calls", extra={'fields': {'n': i}}),
+        'info_queued': lambda i: logger.info("Processed %d videos", i, extra={'fields': {'channel_id': 'UCbench'}}),
+        'access_log': access_line
+    }
+
+    results = {}
+    for name, run in cases.items():
+        before = metrics.log_dropped
+        results[name] = {'us_per_call': round(per_call_us(run, args.calls), 3)}
+        results[name]['dropped'] = metrics.log_dropped - before
+        print(f"  {name:<16} {results[name]['us_per_call']:>9.3f} us/call  "
+              f"(dropped on full queue: {results[name]['dropped']})", file=sys.__stdout__)
+        # Let the listener drain before the next case
+        while pipeline.queued():
+            time.sleep(0.01)
+
+    pipeline.stop()
+
+    output = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': {key: value for key, value in vars(args).items() if key != 'output_dir'}
+        },
+        'results': results
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    name = datetime.now().strftime('%Y%m%d-%H%M%S') + '-logging' + (f"-{args.label}" if args.label else '') + '.json'
+    path = os.path.join(args.output_dir, name)
+    with open(path, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"📊 Logging results saved to {path}")
+
+if __name__ == '__main__':
+    main()
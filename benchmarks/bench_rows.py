@@ -0,0 +1,177 @@
+"""Micro-benchmark of the post-fetch row transform on synthetic channels.
+
+Times, for each row count:
+
+- parse: videos().list resources -> records (duration parsing)
+- rows:  records + Analytics metrics -> dashboard rows
+
+for the batch transform in video_rows.py (memoized duration parser, column
+by column rows) against a per-row reference of the loop it replaced
+(isodate per video, one row at a time, two log lines per video written to
+os.devnull). Memo caches are cleared before every batch run, so it pays
+for its misses too.
+
+    python benchmarks/bench_rows.py --rows 10000,100000 --repeat 5
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+import isodate  # noqa: E402
+
+from resource_store import video_record  # noqa: E402
+from video_rows import build_video_rows, clock, parse_duration_seconds  # noqa: E402
+
+def synthetic_channel(count, seed=1):
+    """(videos().list resources, metrics by video ID) with realistic duration spread"""
+    rng = random.Random(seed)
+    published = datetime(2024, 1, 1)
+    resources, metrics = [], {}
+    for i in range(count):
+        video_id = f"v{i:010d}"
+        # Mostly shorts and 5-20 minute videos, some long streams
+        seconds = rng.choice((rng.randint(5, 60), rng.randint(300, 1200), rng.randint(1200, 4 * 3600)))
+        hours, rest = divmod(seconds, 3600)
+        minutes, secs = divmod(rest, 60)
+        duration = 'PT' + (f"{hours}H" if hours else '') + (f"{minutes}M" if minutes else '') + (f"{secs}S" if secs else '')
+        resources.append({
+            'id': video_id,
+            'etag': f"e{i}",
+            'snippet': {
+                'title': f"Video {i}",
+                'publishedAt': (published - timedelta(hours=i)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'thumbnails': {'medium': {'url': f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg"}}
+            },
+            'contentDetails': {'duration': duration},
+            'status': {'privacyStatus': 'public'}
+        })
+        metrics[video_id] = {
+            'views': rng.randint(0, 10 ** 6),
+            'likes': rng.randint(0, 10 ** 4),
+            'averageViewDuration': rng.randint(0, seconds),
+            'subscribersGained': rng.randint(0, 100)
+        }
+    return resources, metrics
+
+def reference_record(resource):
+    """video_record() with isodate, as before the memoized parser"""
+    duration = isodate.parse_duration(resource['contentDetails']['duration'])
+    return {
+        'id': resource['id'],
+        'title': resource['snippet']['title'],
+        'thumbnail': resource['snippet']['thumbnails']['medium']['url'],
+        'publishedAt': resource['snippet']['publishedAt'],
+        'lengthSeconds': int(duration.total_seconds()),
+        'privacyStatus': resource.get('status', {}).get('privacyStatus')
+    }
+
+def reference_rows(videos, metrics_by_video):
+    """The per-video processing loop the batch transform replaced"""
+    rows = []
+    for i, video in enumerate(videos, 1):
+        print(f"Processing video {i}/{len(videos)}: {video['id']}")
+        try:
+            video_metrics = metrics_by_video.get(video['id'], {})
+            total_duration = video['lengthSeconds']
+            avg_view_duration = video_metrics.get('averageViewDuration', 0)
+            percent_watched = (avg_view_duration / total_duration * 100) if total_duration > 0 else 0
+            rows.append({
+                'id': video['id'],
+                'title': video['title'],
+                'thumbnail': video['thumbnail'],
+                'publishedAt': video['publishedAt'],
+                'views': video_metrics.get('views', 0),
+                'likes': video_metrics.get('likes', 0),
+                'length': f"{int(total_duration // 60):02d}:{int(total_duration % 60):02d}",
+                'lengthSeconds': int(total_duration),
+                'watchTime': f"{int(avg_view_duration // 60):02d}:{int(avg_view_duration % 60):02d}",
+                'watchTimeSeconds': int(avg_view_duration),
+                'percentWatched': round(percent_watched, 1),
+                'subsGained': video_metrics.get('subscribersGained', 0)
+            })
+            print("  ✅ Success")
+        except Exception as e:
+            print(f"  ❌ Error processing video {video['id']}: {e}")
+    return rows
+
+def clear_memos():
+    parse_duration_seconds.cache_clear()
+    clock.cache_clear()
+
+def timed(run, repeat, before=None):
+    """Median seconds of `repeat` runs, and the last run's result"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        result = run()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+def bench(count, repeat):
+    resources, metrics = synthetic_channel(count)
+    results = {}
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        ref_parse, ref_records = timed(lambda: [reference_record(r) for r in resources], repeat)
+        ref_rows, ref_output = timed(lambda: reference_rows(ref_records, metrics), repeat)
+    batch_parse, records = timed(lambda: [video_record(r) for r in resources], repeat, clear_memos)
+    batch_rows, output = timed(lambda: build_video_rows(records, metrics), repeat, clock.cache_clear)
+
+    if output != ref_output:
+        raise AssertionError("Batch rows differ from the reference rows")
+
+    for stage, reference, batch in (('parse', ref_parse, batch_parse), ('rows', ref_rows, batch_rows),
+                                    ('total', ref_parse + ref_rows, batch_parse + batch_rows)):
+        results[stage] = {
+            'reference_ms': round(reference * 1000, 2),
+            'batch_ms': round(batch * 1000, 2),
+            'speedup': round(reference / batch, 2) if batch else None
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the batch row transform against the per-row loop')
+    parser.add_argument('--rows', default='10000,100000', help='Comma-separated row counts')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output-dir', default=os.path.join(BENCHMARK_DIR, 'results'))
+    parser.add_argument('--label', default='')
+    args = parser.parse_args()
+
+    results = {}
+    for count in (int(value) for value in args.rows.split(',')):
+        results[str(count)] = bench(count, args.repeat)
+        for stage, values in results[str(count)].items():
+            print(f"  {count:>7} rows {stage:<6} reference {values['reference_ms']:>9.1f}ms  "
+                  f"batch {values['batch_ms']:>9.1f}ms  x{values['speedup']}")
+
+    output = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': {key: value for key, value in vars(args).items() if key != 'output_dir'}
+        },
+        'results': results
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    name = datetime.now().strftime('%Y%m%d-%H%M%S') + '-rows' + (f"-{args.label}" if args.label else '') + '.json'
+    path = os.path.join(args.output_dir, name)
+    with open(path, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"📊 Row transform results saved to {path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Worker startup benchmark: cold import of the WSGI app and the first /health request.
+
+Each run is a fresh interpreter (like a new gunicorn worker or a Render cold
+start) in a scratch directory, optionally seeded with legacy
+videos_cache_*.json files. It records:
+
+- import_seconds:       `import wsgi` (app, stores, pre-warmer)
+- first_health_seconds: first GET /health through the WSGI app
+- google_modules:       google*/httplib2 modules loaded after /health (0 = client stack still unloaded)
+
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --repo /path/to/older/checkout --label before
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+
+# Runs inside each fresh interpreter
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import wsgi
+imported = time.perf_counter()
+response = wsgi.app.test_client().get('/health')
+assert response.status_code == 200, response.status_code
+done = time.perf_counter()
+print(json.dumps({
+    'import_seconds': imported - start,
+    'first_health_seconds': done - imported,
+    'google_modules': sum(1 for name in sys.modules if name.startswith(('google', 'googleapiclient', 'httplib2')))
+}))
+'''
+
+def write_legacy_cache_files(directory, files, videos_per_file):
+    """videos_cache_*.json files like the ones the old file cache left behind"""
+    video = {
+        'id': 'xxxxxxxxxxx', 'title': 'Legacy cached video', 'thumbnail': 'https://i.ytimg.com/vi/x/mqdefault.jpg',
+        'publishedAt': '2024-01-01T00:00:00Z', 'views': 1000, 'likes': 50, 'length': '10:00',
+        'watchTime': '04:00', 'percentWatched': 40.0, 'subsGained': 3
+    }
+    for i in range(files):
+        with open(os.path.join(directory, f"videos_cache_{i}.json"), 'w') as f:
+            json.dump({'videos': [video] * videos_per_file, 'cache_time': '2024-01-01T00:00:00'}, f)
+
+def run_probe(repo, legacy_files, videos_per_file):
+    with tempfile.TemporaryDirectory(prefix='yt-startup-') as work_dir:
+        write_legacy_cache_files(work_dir, legacy_files, videos_per_file)
+        env = dict(
+            os.environ,
+            PYTHONPATH=repo,
+            CACHE_DB_PATH=os.path.join(work_dir, 'cache.db'),
+            METRICS_DB_PATH=os.path.join(work_dir, 'metrics.db'),
+            CREDENTIALS_DB_PATH=os.path.join(work_dir, 'credentials.db'),
+            QUOTA_DB_PATH=os.path.join(work_dir, 'quota.db'),
+            SESSION_DB_PATH=os.path.join(work_dir, 'sessions.db'),
+            VIDEO_RESOURCES_DB_PATH=os.path.join(work_dir, 'resources.db'),
+            FETCH_LOCK_DIR=os.path.join(work_dir, 'locks'),
+            PREWARM_ENABLED='0',
+            LOG_LEVEL='WARNING'
+        )
+        completed = subprocess.run(
+            [sys.executable, '-c', PROBE], cwd=work_dir, env=env, capture_output=True, text=True, check=True
+        )
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def summarize(samples):
+    summary = {}
+    for key in ('import_seconds', 'first_health_seconds'):
+        values = [sample[key] for sample in samples]
+        summary[key] = {
+            'median': round(statistics.median(values), 4),
+            'min': round(min(values), 4),
+            'max': round(max(values), 4)
+        }
+    summary['google_modules'] = samples[-1]['google_modules']
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cold worker startup and the first /health request')
+    parser.add_argument('--repo', default=REPO_DIR, help='Checkout to measure (default: this one)')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--legacy-files', type=int, default=10, help='videos_cache_*.json files in the working directory')
+    parser.add_argument('--legacy-videos', type=int, default=2000, help='Videos per legacy cache file')
+    parser.add_argument('--output-dir', default=os.path.join(BENCHMARK_DIR, 'results'))
+    parser.add_argument('--label', default='')
+    args = parser.parse_args()
+
+    # Warm the OS page cache and bytecode so runs measure import work, not disk
+    run_probe(args.repo, 0, 0)
+
+    results = {}
+    for scenario, files in (('clean', 0), ('legacy_cache_files', args.legacy_files)):
+        samples = [run_probe(args.repo, files, args.legacy_videos) for _ in range(args.runs)]
+        results[scenario] = summarize(samples)
+        print(f"  {scenario:<20} import {results[scenario]['import_seconds']['median'] * 1000:.0f}ms, "
+              f"first /health {results[scenario]['first_health_seconds']['median'] * 1000:.1f}ms, "
+              f"google modules loaded: {results[scenario]['google_modules']}")
+
+    output = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'repo': os.path.abspath(args.repo),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': {key: value for key, value in vars(args).items() if key not in ('output_dir', 'repo')}
+        },
+        'results': results
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    name = datetime.now().strftime('%Y%m%d-%H%M%S') + '-startup' + (f"-{args.label}" if args.label else '') + '.json'
+    path = os.path.join(args.output_dir, name)
+    with open(path, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"📊 Startup results saved to {path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,480 @@
+"""Load and latency benchmark for /api/videos against the fake YouTube API.
+
+Starts benchmarks/fake_youtube.py in a subprocess (so its CPU time stays off
+the app's GIL), points the app at it with YOUTUBE_API_ROOT_URL, and drives
+the app in-process through Flask test clients. For each synthetic channel
+size it measures:
+
+- cold:        first load (no cache, no stored Analytics totals)
+- warm:        repeated cache hits for the dashboard's default query
+- stale:       hits past the fresh TTL, plus the background rebuild they trigger
+- incremental: reload after the cache is dropped, with Analytics totals and
+               video resources stored (videos().list batches revalidate with ETags)
+- edited:      forced refresh after 1% of the videos were edited upstream
+- token:       forced refresh while the access token is inside the refresh
+               margin (it should be refreshed in the background, not by the request)
+
+then throughput with concurrent users on a warm cache, a stampede of
+concurrent users on a cold one, and /api/channels/aggregate over several
+linked channels (cold, against the slowest and the sum of single-channel
+cold loads, and warm). Every phase records upstream calls and Data
+API quota units (as counted by the fake server) and the process RSS.
+
+Results are written as JSON to benchmarks/results/ and can be compared:
+
+    python benchmarks/bench_videos.py --sizes 10,1000,10000,50000 --latency-ms 40
+    python benchmarks/bench_videos.py --engine async --compare benchmarks/results/<previous>.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+from fake_youtube import channel_for_token  # noqa: E402
+from token_manager import EXPIRY_SKEW_SECONDS  # noqa: E402
+
+# What the dashboard sends on load
+DASHBOARD_QUERY = '/api/videos?sort_by=published&sort_direction=desc&format=columnar'
+DASHBOARD_HEADERS = {'Accept-Encoding': 'gzip'}
+AGGREGATE_QUERY = '/api/channels/aggregate?sort_by=published&sort_direction=desc&format=columnar'
+
+# Metrics shown in the summary and by --compare
+COMPARED_METRICS = (
+    'seconds', 'p50_ms', 'p95_ms', 'requests_per_second', 'upstream_calls', 'upstream_bytes', 'quota_units', 'rss_mb'
+)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def fetch_json(url, payload=None):
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)
+
+class FakeServer:
+    """benchmarks/fake_youtube.py running in a subprocess"""
+
+    def __init__(self, args):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        command = [
+            sys.executable, os.path.join(BENCHMARK_DIR, 'fake_youtube.py'),
+            '--port', str(self.port),
+            '--latency-ms', str(args.latency_ms),
+            '--jitter-ms', str(args.jitter_ms),
+            '--error-rate', str(args.error_rate),
+            '--rate-limit-rate', str(args.rate_limit_rate)
+        ]
+        if args.analytics_latency_ms is not None:
+            command += ['--analytics-latency-ms', str(args.analytics_latency_ms)]
+        self.process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.time() + 15
+        while True:
+            try:
+                self.stats()
+                return
+            except OSError:
+                if time.time() > deadline or self.process.poll() is not None:
+                    self.stop()
+                    raise RuntimeError("Fake YouTube API did not start")
+                time.sleep(0.1)
+
+    def stats(self):
+        return fetch_json(f"{self.url}/_fake/stats")
+
+    def configure(self, **settings):
+        return fetch_json(f"{self.url}/_fake/config", settings)
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait(timeout=10)
+
+def rss_mb():
+    """Current resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return round(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20, 1)
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10, 1)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def latency_summary(seconds):
+    """Latency distribution in milliseconds"""
+    return {
+        'requests': len(seconds),
+        'mean_ms': round(sum(seconds) / len(seconds) * 1000, 2) if seconds else None,
+        'p50_ms': round(percentile(seconds, 0.50) * 1000, 2) if seconds else None,
+        'p95_ms': round(percentile(seconds, 0.95) * 1000, 2) if seconds else None,
+        'p99_ms': round(percentile(seconds, 0.99) * 1000, 2) if seconds else None,
+        'max_ms': round(max(seconds) * 1000, 2) if seconds else None
+    }
+
+class Bench:
+    """Drives the app in-process against the fake server"""
+
+    def __init__(self, app_module, fake, args):
+        self.app_module = app_module
+        self.app = app_module.app
+        self.fake = fake
+        self.args = args
+
+    def credentials(self, token, expires_in=3600):
+        """Stored credentials for a bench token; the token refreshes against the fake server"""
+        from google.oauth2.credentials import Credentials
+        creds = Credentials(
+            token=token,
+            refresh_token=token,
+            token_uri=f"{self.fake.url}/token",
+            client_id='benchmark',
+            client_secret='benchmark',
+            scopes=self.app_module.SCOPES,
+            expiry=datetime.utcnow() + timedelta(seconds=expires_in)
+        )
+        return self.app_module.token_manager.add(creds)
+
+    def client(self, token, channel, expires_in=3600):
+        """Test client signed in as the token's channel"""
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['credentials_id'] = self.credentials(token, expires_in)
+            session['channel'] = {'id': channel.id, 'uploads_playlist_id': channel.uploads_playlist_id}
+        return client
+
+    def linked_client(self, tokens):
+        """Test client signed in as the first token's channel, with the others' channels linked"""
+        client = self.client(tokens[0], channel_for_token(tokens[0]))
+        with client.session_transaction() as session:
+            session['linked_channels'] = [
+                {
+                    'credentials_id': self.credentials(token),
+                    'channel': {'id': channel.id, 'uploads_playlist_id': channel.uploads_playlist_id}
+                }
+                for token, channel in ((token, channel_for_token(token)) for token in tokens[1:])
+            ]
+        return client
+
+    def get(self, client, path=DASHBOARD_QUERY):
+        start = time.perf_counter()
+        response = client.get(path, headers=DASHBOARD_HEADERS)
+        body = response.get_data()
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}: {body[:200]!r}")
+        return elapsed, len(body)
+
+    def measure(self, run):
+        """Run a phase and attach upstream call/quota deltas and memory"""
+        before = self.fake.stats()
+        result = run()
+        after = self.fake.stats()
+        result['upstream_calls'] = after['calls'] - before['calls']
+        result['quota_units'] = after['quota_units'] - before['quota_units']
+        for counter in ('errors', 'not_modified', 'bytes'):
+            result[f'upstream_{counter}'] = sum(e[counter] for e in after['endpoints'].values()) - \
+                sum(e[counter] for e in before['endpoints'].values())
+        result['rss_mb'] = rss_mb()
+        return result
+
+    def wait_for_refreshes(self, timeout=300):
+        deadline = time.time() + timeout
+        while self.app_module.background_refresher.stats()['pending'] and time.time() < deadline:
+            time.sleep(0.05)
+
+    def single_load(self, client, path=DASHBOARD_QUERY):
+        def run():
+            seconds, size = self.get(client, path)
+            return {'seconds': round(seconds, 3), 'response_bytes': size}
+        return run
+
+    def token_refresh_load(self, client):
+        """A forced refresh (which needs credentials) with the token inside the refresh margin"""
+        def run():
+            seconds, size = self.get(client, DASHBOARD_QUERY + '&refresh=true')
+            # Wait for the background token refresh so its call is counted in this phase
+            with client.session_transaction() as session:
+                credentials_id = session['credentials_id']
+            margin = EXPIRY_SKEW_SECONDS + self.app.config['TOKEN_REFRESH_MARGIN_SECONDS']
+            deadline = time.time() + 30
+            while self.app_module.credential_store.load_user(credentials_id)[1] < time.time() + margin:
+                if time.time() > deadline:
+                    raise RuntimeError("Access token was not refreshed in the background")
+                time.sleep(0.01)
+            return {'seconds': round(seconds, 3), 'response_bytes': size}
+        return run
+
+    def repeated_hits(self, client, requests, path=DASHBOARD_QUERY):
+        def run():
+            timings = [self.get(client, path)[0] for _ in range(requests)]
+            return latency_summary(timings)
+        return run
+
+    def stale_hits(self, client, requests):
+        def run():
+            ttl = self.app.config['CACHE_TTL_SECONDS']
+            self.app.config['CACHE_TTL_SECONDS'] = 0
+            try:
+                timings = [self.get(client)[0] for _ in range(requests)]
+                start = time.perf_counter()
+                self.wait_for_refreshes()
+                refresh_seconds = time.perf_counter() - start
+            finally:
+                self.app.config['CACHE_TTL_SECONDS'] = ttl
+            result = latency_summary(timings)
+            result['background_refresh_wait_seconds'] = round(refresh_seconds, 3)
+            return result
+        return run
+
+    def concurrent(self, clients, duration=None, requests_per_user=1):
+        """Each client in its own thread; either for `duration` seconds or requests_per_user requests"""
+        def run():
+            timings = []
+            errors = []
+            lock = threading.Lock()
+            barrier = threading.Barrier(len(clients))
+
+            def user(client):
+                barrier.wait()
+                deadline = time.perf_counter() + duration if duration else None
+                sent = 0
+                while (deadline and time.perf_counter() < deadline) or (not deadline and sent < requests_per_user):
+                    try:
+                        elapsed = self.get(client)[0]
+                        with lock:
+                            timings.append(elapsed)
+                    except Exception as e:
+                        with lock:
+                            errors.append(str(e))
+                    sent += 1
+
+            threads = [threading.Thread(target=user, args=(client,)) for client in clients]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            wall = time.perf_counter() - start
+
+            result = latency_summary(timings)
+            result.update({
+                'users': len(clients),
+                'seconds': round(wall, 3),
+                'requests_per_second': round(len(timings) / wall, 1) if wall else None,
+                'errors': len(errors)
+            })
+            return result
+        return run
+
+    def channel_size(self, size):
+        token = f"bench-{size}"
+        channel = channel_for_token(token)
+        client = self.client(token, channel)
+        results = {}
+
+        results['cold'] = self.measure(self.single_load(client))
+        results['warm'] = self.measure(self.repeated_hits(client, self.args.warm_requests))
+        results['stale'] = self.measure(self.stale_hits(client, max(1, self.args.warm_requests // 4)))
+        self.app_module.video_cache.clear()
+        results['incremental'] = self.measure(self.single_load(client))
+
+        revision = self.fake.stats()['settings']['revision'] + 1
+        self.fake.configure(revision=revision, edit_rate=0.01)
+        results['edited'] = self.measure(self.single_load(client, DASHBOARD_QUERY + '&refresh=true'))
+
+        # Halfway into the refresh margin: still valid, so the load must not wait on /token
+        expires_in = EXPIRY_SKEW_SECONDS + self.app.config['TOKEN_REFRESH_MARGIN_SECONDS'] // 2
+        results['token'] = self.measure(self.token_refresh_load(self.client(token, channel, expires_in)))
+        return results
+
+    def concurrency(self, size, users, duration):
+        results = {}
+
+        # Warm cache: every user on the same channel
+        token = f"bench-{size}-shared"
+        channel = channel_for_token(token)
+        self.get(self.client(token, channel))
+        clients = [self.client(token, channel) for _ in range(users)]
+        results['warm_throughput'] = self.measure(self.concurrent(clients, duration=duration))
+
+        # Cold stampede: every user misses at once; the fetch should run once
+        token = f"bench-{size}-stampede"
+        channel = channel_for_token(token)
+        clients = [self.client(token, channel) for _ in range(users)]
+        results['cold_stampede'] = self.measure(self.concurrent(clients, requests_per_user=1))
+        return results
+
+    def aggregate(self, size, channels):
+        """Aggregate view over `channels` linked channels against single-channel loads of the same size"""
+        results = {}
+        single = [
+            self.measure(self.single_load(self.client(token, channel_for_token(token))))
+            for token in (f"bench-{size}-single-{i}" for i in range(channels))
+        ]
+        results['single_cold_slowest'] = max(single, key=lambda result: result['seconds'])
+        results['single_cold_sum'] = {
+            key: round(sum(result[key] for result in single), 3)
+            for key in ('seconds', 'upstream_calls', 'quota_units')
+        }
+
+        client = self.linked_client([f"bench-{size}-aggregate-{i}" for i in range(channels)])
+        results['cold'] = self.measure(self.single_load(client, AGGREGATE_QUERY))
+        results['warm'] = self.measure(self.repeated_hits(client, self.args.warm_requests, AGGREGATE_QUERY))
+        return results
+
+def configure_environment(args, fake_url, work_dir):
+    """Point the app's stores at a scratch directory and its API calls at the fake server"""
+    os.environ.update({
+        'YOUTUBE_API_ROOT_URL': fake_url,
+        'FETCH_ENGINE': args.engine,
+        'CACHE_DB_PATH': os.path.join(work_dir, 'cache.db'),
+        'METRICS_DB_PATH': os.path.join(work_dir, 'metrics.db'),
+        'CREDENTIALS_DB_PATH': os.path.join(work_dir, 'credentials.db'),
+        'QUOTA_DB_PATH': os.path.join(work_dir, 'quota.db'),
+        'SESSION_DB_PATH': os.path.join(work_dir, 'sessions.db'),
+        'VIDEO_RESOURCES_DB_PATH': os.path.join(work_dir, 'resources.db'),
+        'FETCH_LOCK_DIR': os.path.join(work_dir, 'locks'),
+        'MAX_VIDEOS': str(max(args.sizes)),
+        'QUOTA_DAILY_BUDGET': str(10 ** 9),
+        'API_BACKOFF_BASE_SECONDS': '0.05',
+        'PREWARM_ENABLED': '0',
+        # Only warnings unless asked, so the app's logging stays out of the timings
+        'LOG_LEVEL': 'DEBUG' if args.verbose else 'WARNING',
+        'LOG_SAMPLE_RATE': '1'
+    })
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def flatten(results, prefix=''):
+    """{'10': {'cold': {...}}} -> {'10.cold': {...}}"""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict) and any(isinstance(v, dict) for v in value.values()):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+def print_summary(results):
+    for phase, values in flatten(results).items():
+        shown = ', '.join(f"{key}={values[key]}" for key in COMPARED_METRICS if values.get(key) is not None)
+        print(f"  {phase:<40} {shown}")
+
+def print_comparison(results, previous_path):
+    with open(previous_path) as f:
+        previous = flatten(json.load(f)['results'])
+    print(f"\nCompared with {previous_path}:")
+    for phase, values in flatten(results).items():
+        before = previous.get(phase)
+        if not before:
+            continue
+        changes = []
+        for key in COMPARED_METRICS:
+            old, new = before.get(key), values.get(key)
+            if old is None or new is None:
+                continue
+            change = f" ({(new - old) / old * 100:+.0f}%)" if old else ''
+            changes.append(f"{key} {old} -> {new}{change}")
+        print(f"  {phase:<40} {'; '.join(changes)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /api/videos against the fake YouTube API')
+    parser.add_argument('--sizes', default='10,1000,10000', help='Comma-separated channel sizes (videos)')
+    parser.add_argument('--engine', default='sync', choices=('sync', 'async'))
+    parser.add_argument('--latency-ms', type=float, default=30.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--analytics-latency-ms', type=float, default=None)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--warm-requests', type=int, default=200)
+    parser.add_argument('--users', type=int, default=8, help='Concurrent users for the throughput phases')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds of warm throughput load')
+    parser.add_argument('--aggregate-channels', type=int, default=4,
+                        help='Linked channels for the aggregate phase (0 to skip)')
+    parser.add_argument('--concurrency-size', type=int, default=None,
+                        help='Channel size for the concurrency phases (default: largest of --sizes)')
+    parser.add_argument('--output-dir', default=os.path.join(BENCHMARK_DIR, 'results'))
+    parser.add_argument('--label', default='')
+    parser.add_argument('--compare', help='Previous results file to compare against')
+    parser.add_argument('--verbose', action='store_true', help="Keep the app's logging")
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(',')]
+
+    fake = FakeServer(args)
+    work_dir = tempfile.mkdtemp(prefix='yt-bench-')
+    try:
+        configure_environment(args, fake.url, work_dir)
+        import_start = time.perf_counter()
+        import app as app_module
+        import_seconds = time.perf_counter() - import_start
+
+        bench = Bench(app_module, fake, args)
+        results = {'startup': {'seconds': round(import_seconds, 3), 'rss_mb': rss_mb()}, 'channels': {}}
+        for size in args.sizes:
+            print(f"⏱️ Channel with {size} videos...")
+            results['channels'][str(size)] = bench.channel_size(size)
+
+        concurrency_size = args.concurrency_size or max(args.sizes)
+        print(f"⏱️ {args.users} concurrent users on a {concurrency_size}-video channel...")
+        results['concurrency'] = bench.concurrency(concurrency_size, args.users, args.duration)
+        if args.aggregate_channels:
+            print(f"⏱️ Aggregate view over {args.aggregate_channels} {concurrency_size}-video channels...")
+            results['aggregate'] = bench.aggregate(concurrency_size, args.aggregate_channels)
+        results['peak_rss_mb'] = {'rss_mb': peak_rss_mb()}
+    finally:
+        fake.stop()
+
+    output = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'args': {key: value for key, value in vars(args).items() if key not in ('output_dir', 'compare', 'verbose')}
+        },
+        'results': results
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    name = datetime.now().strftime('%Y%m%d-%H%M%S') + (f"-{args.label}" if args.label else '') + '.json'
+    path = os.path.join(args.output_dir, name)
+    with open(path, 'w') as f:
+        json.dump(output, f, indent=2)
+
+    print(f"\n📊 Results ({args.engine} engine) saved to {path}")
+    print_summary(results)
+    if args.compare:
+        print_comparison(results, args.compare)
+
+if __name__ == '__main__':
+    main()
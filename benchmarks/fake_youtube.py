@@ -0,0 +1,485 @@
+"""Local stand-in for the YouTube Data v3 and Analytics v2 endpoints the dashboard calls.
+
+Serves channels.list, search.list, playlistItems.list, videos.list and
+reports.query for synthetic channels, with configurable latency and error
+injection, and counts calls and Data API quota units per endpoint so runs
+can be compared without spending real quota.
+
+The bearer token picks the channel: "bench-<n>" (optionally "bench-<n>-<name>")
+signs in as a channel with n uploads, e.g. bench-50000. Every field is derived
+from the video's index, so responses are deterministic and nothing is stored.
+
+    python benchmarks/fake_youtube.py --port 8765 --latency-ms 80 --error-rate 0.01
+    YOUTUBE_API_ROOT_URL=http://127.0.0.1:8765 python app.py
+
+List responses carry ETags and answer If-None-Match with 304. Bumping the
+"revision" setting edits a deterministic edit_rate fraction of the videos.
+
+POST /token stands in for Google's OAuth token endpoint: a refresh grant
+returns the refresh token itself as the new access token, valid for
+token_lifetime seconds, so benchmark credentials can point their token_uri
+here and refresh without leaving the machine.
+
+Control endpoints: GET /_fake/stats, POST /_fake/reset, POST /_fake/config (JSON).
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+
+from flask import Flask, jsonify, request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from instrumentation import QUOTA_COSTS  # noqa: E402
+
+# Largest channel the token may ask for
+MAX_CHANNEL_VIDEOS = 100000
+
+# videos.list / playlistItems.list / search.list page limit
+PAGE_SIZE = 50
+
+# Uploads are spread over at most this many days before "today"
+CHANNEL_HISTORY_DAYS = 10 * 365
+
+# Path -> API method ID, for per-endpoint counters
+ENDPOINTS = {
+    '/youtube/v3/channels': 'youtube.channels.list',
+    '/youtube/v3/playlistItems': 'youtube.playlistItems.list',
+    '/youtube/v3/videos': 'youtube.videos.list',
+    '/youtube/v3/search': 'youtube.search.list',
+    '/v2/reports': 'youtubeAnalytics.reports.query',
+    '/token': 'oauth2.token'
+}
+
+ANALYTICS_METRICS = ('views', 'likes', 'averageViewDuration', 'averageViewPercentage', 'subscribersGained')
+
+app = Flask(__name__)
+
+settings = {
+    'latency_ms': 0.0,             # added to every API response
+    'jitter_ms': 0.0,              # uniform extra latency on top of latency_ms
+    'analytics_latency_ms': None,  # reports.query latency (None = latency_ms)
+    'error_rate': 0.0,             # fraction of calls answered 503 backendError
+    'rate_limit_rate': 0.0,        # fraction of calls answered 403 rateLimitExceeded
+    'quota_limit': 0,              # Data API units before 403 quotaExceeded (0 = unlimited)
+    'revision': 0,                 # bump to edit edit_rate of the videos (changes their ETags)
+    'edit_rate': 0.01,
+    'token_lifetime': 3600         # seconds an access token from /token is valid
+}
+
+_lock = threading.Lock()
+_stats = {}        # endpoint -> {'calls', 'errors', 'units', 'not_modified', 'bytes'}
+_units_spent = 0
+
+TODAY = date.today()
+
+class Channel:
+    """A synthetic channel; video i = 0 is the newest upload"""
+
+    def __init__(self, key, video_count):
+        self.key = key
+        self.video_count = video_count
+        digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+        self.id = 'UC' + digest[:22]
+        self.uploads_playlist_id = 'UU' + digest[:22]
+        # Video IDs are an 11-character prefix + index, like real ones
+        self.video_prefix = digest[:4]
+        self.spacing = timedelta(days=CHANNEL_HISTORY_DAYS) / max(video_count, 1)
+
+    def video_id(self, index):
+        return f"{self.video_prefix}{index:07d}"
+
+    def index_of(self, video_id):
+        """Index for one of this channel's video IDs, else None"""
+        if len(video_id) != 11 or not video_id.startswith(self.video_prefix):
+            return None
+        try:
+            index = int(video_id[4:])
+        except ValueError:
+            return None
+        return index if index < self.video_count else None
+
+    def video(self, index):
+        """Attributes of one video, derived from its index"""
+        video_id = self.video_id(index)
+        seed = zlib.crc32(video_id.encode('utf-8'))
+        published = datetime.combine(TODAY, datetime.min.time(), timezone.utc) - self.spacing * index \
+            - timedelta(seconds=seed % 3600)
+        if seed % 5 == 0:
+            duration = 15 + seed % 45                      # Shorts
+        else:
+            duration = 120 + seed % 3480
+        privacy = {8: 'unlisted', 9: 'private'}.get(seed % 10, 'public')
+        return {
+            'id': video_id,
+            'seed': seed,
+            'published': published,
+            'duration': duration,
+            'privacy': privacy,
+            'daily_views': 5 + seed % 500,
+            'retention': (20 + seed % 50) / 100
+        }
+
+    def video_resource(self, index, parts):
+        """videos.list resource for the requested parts"""
+        video = self.video(index)
+        days_live = max((TODAY - video['published'].date()).days, 1)
+        views = video['daily_views'] * days_live
+        resource = {'kind': 'youtube#video', 'id': video['id']}
+        if 'snippet' in parts:
+            thumbnail = f"https://i.ytimg.com/vi/{video['id']}"
+            edited = last_edit(video['id'])
+            resource['snippet'] = {
+                'publishedAt': video['published'].strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'channelId': self.id,
+                'title': f"Synthetic upload #{self.video_count - index} ({self.key})" + (f" [edit {edited}]" if edited else ''),
+                'description': '',
+                'thumbnails': {
+                    'default': {'url': f"{thumbnail}/default.jpg", 'width': 120, 'height': 90},
+                    'medium': {'url': f"{thumbnail}/mqdefault.jpg", 'width': 320, 'height': 180},
+                    'high': {'url': f"{thumbnail}/hqdefault.jpg", 'width': 480, 'height': 360}
+                },
+                'channelTitle': f"Benchmark channel {self.key}"
+            }
+        if 'contentDetails' in parts:
+            minutes, seconds = divmod(video['duration'], 60)
+            resource['contentDetails'] = {
+                'duration': f"PT{minutes}M{seconds}S" if minutes else f"PT{seconds}S",
+                'dimension': '2d',
+                'definition': 'hd'
+            }
+        if 'statistics' in parts:
+            resource['statistics'] = {
+                'viewCount': str(views),
+                'likeCount': str(views * (10 + video['seed'] % 40) // 1000),
+                'commentCount': str(views // 500)
+            }
+        if 'status' in parts:
+            resource['status'] = {'privacyStatus': video['privacy'], 'uploadStatus': 'processed'}
+        resource['etag'] = etag_of(resource)
+        return resource
+
+    def video_report(self, index, start, end):
+        """reports.query metrics for one video over [start, end], or None if it had no views"""
+        video = self.video(index)
+        first_day = max(start, video['published'].date())
+        last_day = min(end, TODAY)
+        days = (last_day - first_day).days + 1
+        if days <= 0:
+            return None
+        views = video['daily_views'] * days
+        return {
+            'views': views,
+            'likes': views * (10 + video['seed'] % 40) // 1000,
+            'averageViewDuration': int(video['duration'] * video['retention']),
+            'averageViewPercentage': round(video['retention'] * 100, 1),
+            'subscribersGained': views // (150 + video['seed'] % 200)
+        }
+
+def last_edit(video_id):
+    """The latest revision that edited this video (0 = never edited)"""
+    threshold = settings['edit_rate'] * 10000
+    for revision in range(settings['revision'], 0, -1):
+        if zlib.crc32(f"{video_id}:{revision}".encode('utf-8')) % 10000 < threshold:
+            return revision
+    return 0
+
+def etag_of(payload):
+    return hashlib.md5(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+def channel_for_token(token):
+    """Channel signed in by a "bench-<n>[-<name>]" access token, else None"""
+    if not token or not token.startswith('bench-'):
+        return None
+    key = token[len('bench-'):]
+    try:
+        video_count = int(key.split('-', 1)[0])
+    except ValueError:
+        return None
+    if not 0 <= video_count <= MAX_CHANNEL_VIDEOS:
+        return None
+    return Channel(key, video_count)
+
+class FakeApiError(Exception):
+    def __init__(self, status, reason, message, domain='youtube.api'):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.domain = domain
+
+@app.errorhandler(FakeApiError)
+def api_error(e):
+    # Same body shape as Google's, so error_details / reasons parse identically
+    return jsonify({'error': {
+        'code': e.status,
+        'message': str(e),
+        'errors': [{'message': str(e), 'domain': e.domain, 'reason': e.reason}]
+    }}), e.status
+
+def api_call(endpoint):
+    """Apply latency and error injection, count the call, and return the caller's channel"""
+    global _units_spent
+    latency = settings['latency_ms']
+    if endpoint.startswith('youtubeAnalytics.') and settings['analytics_latency_ms'] is not None:
+        latency = settings['analytics_latency_ms']
+    latency += random.uniform(0, settings['jitter_ms'])
+    if latency > 0:
+        time.sleep(latency / 1000)
+
+    cost = QUOTA_COSTS.get(endpoint, 0)
+    with _lock:
+        stats = _stats.setdefault(endpoint, {'calls': 0, 'errors': 0, 'units': 0, 'not_modified': 0, 'bytes': 0})
+        stats['calls'] += 1
+        error = None
+        if settings['quota_limit'] and cost and _units_spent + cost > settings['quota_limit']:
+            error = FakeApiError(403, 'quotaExceeded', 'The request cannot be completed because you have exceeded your quota.',
+                                 'youtube.quota')
+        elif random.random() < settings['error_rate']:
+            error = FakeApiError(503, 'backendError', 'Backend Error', 'global')
+        elif random.random() < settings['rate_limit_rate']:
+            error = FakeApiError(403, 'rateLimitExceeded', 'Rate Limit Exceeded', 'usageLimits')
+        # Google charges quota for failed requests too (except quota errors)
+        if error is None or error.reason != 'quotaExceeded':
+            stats['units'] += cost
+            _units_spent += cost
+        if error is not None:
+            stats['errors'] += 1
+
+    auth = request.headers.get('Authorization', '')
+    channel = channel_for_token(auth[len('Bearer '):] if auth.startswith('Bearer ') else None)
+    if channel is None:
+        raise FakeApiError(401, 'authError', 'Invalid Credentials', 'global')
+    if error is not None:
+        raise error
+    return channel
+
+def page_bounds(total):
+    """(start, end, next_page_token) for the request's pageToken and maxResults"""
+    page_size = min(int(request.args.get('maxResults', 5)), PAGE_SIZE)
+    token = request.args.get('pageToken')
+    start = int(token[1:]) if token and token.startswith('p') and token[1:].isdigit() else 0
+    end = min(start + page_size, total)
+    return start, end, (f"p{end}" if end < total else None)
+
+def list_response(kind, items, total=None, next_page_token=None):
+    """List response with a list-level ETag; 304 when it matches If-None-Match"""
+    etag = etag_of([item.get('etag') for item in items] + [total, next_page_token])
+    if request.headers.get('If-None-Match', '').strip('"') == etag:
+        return '', 304, {'ETag': f'"{etag}"'}
+    response = {
+        'kind': kind,
+        'etag': etag,
+        'pageInfo': {'totalResults': len(items) if total is None else total, 'resultsPerPage': len(items)},
+        'items': items
+    }
+    if next_page_token:
+        response['nextPageToken'] = next_page_token
+    return jsonify(response), 200, {'ETag': f'"{etag}"'}
+
+@app.after_request
+def count_response(response):
+    endpoint = ENDPOINTS.get(request.path)
+    if endpoint:
+        with _lock:
+            stats = _stats.get(endpoint)
+            if stats is not None:
+                stats['bytes'] += response.calculate_content_length() or 0
+                if response.status_code == 304:
+                    stats['not_modified'] += 1
+    return response
+
+@app.route('/youtube/v3/channels')
+def channels_list():
+    channel = api_call('youtube.channels.list')
+    if request.args.get('mine') != 'true' and channel.id not in request.args.get('id', '').split(','):
+        return list_response('youtube#channelListResponse', [])
+
+    parts = set(request.args.get('part', '').split(','))
+    resource = {'kind': 'youtube#channel', 'id': channel.id}
+    if 'snippet' in parts:
+        resource['snippet'] = {
+            'title': f"Benchmark channel {channel.key}",
+            'thumbnails': {'default': {'url': f"https://yt3.ggpht.com/{channel.id}=s88", 'width': 88, 'height': 88}}
+        }
+    if 'statistics' in parts:
+        resource['statistics'] = {
+            'viewCount': str(channel.video_count * 1000),
+            'subscriberCount': str(channel.video_count * 10),
+            'hiddenSubscriberCount': False,
+            'videoCount': str(channel.video_count)
+        }
+    if 'contentDetails' in parts:
+        resource['contentDetails'] = {'relatedPlaylists': {'likes': '', 'uploads': channel.uploads_playlist_id}}
+    resource['etag'] = etag_of(resource)
+    return list_response('youtube#channelListResponse', [resource])
+
+@app.route('/youtube/v3/playlistItems')
+def playlist_items_list():
+    channel = api_call('youtube.playlistItems.list')
+    if request.args.get('playlistId') != channel.uploads_playlist_id:
+        raise FakeApiError(404, 'playlistNotFound', 'The playlist identified with the request\'s playlistId parameter cannot be found.')
+
+    start, end, next_page_token = page_bounds(channel.video_count)
+    items = []
+    for index in range(start, end):
+        video = channel.video(index)
+        item = {
+            'kind': 'youtube#playlistItem',
+            'id': f"{channel.uploads_playlist_id}.{video['id']}",
+            'contentDetails': {
+                'videoId': video['id'],
+                'videoPublishedAt': video['published'].strftime('%Y-%m-%dT%H:%M:%SZ')
+            }
+        }
+        item['etag'] = etag_of(item)
+        items.append(item)
+    return list_response('youtube#playlistItemListResponse', items, channel.video_count, next_page_token)
+
+@app.route('/youtube/v3/videos')
+def videos_list():
+    channel = api_call('youtube.videos.list')
+    video_ids = [video_id for video_id in request.args.get('id', '').split(',') if video_id]
+    if len(video_ids) > PAGE_SIZE:
+        raise FakeApiError(400, 'invalidFilters', f"At most {PAGE_SIZE} video IDs may be requested at once.")
+
+    parts = set(request.args.get('part', '').split(','))
+    items = []
+    for video_id in video_ids:
+        index = channel.index_of(video_id)
+        if index is not None:   # unknown IDs are silently omitted, as upstream
+            items.append(channel.video_resource(index, parts))
+    return list_response('youtube#videoListResponse', items)
+
+@app.route('/youtube/v3/search')
+def search_list():
+    channel = api_call('youtube.search.list')
+    query = request.args.get('q', '').lower()
+    matches = [
+        index for index in range(channel.video_count)
+        if not query or query in f"synthetic upload #{channel.video_count - index}"
+    ]
+    start, end, next_page_token = page_bounds(len(matches))
+    items = []
+    for index in matches[start:end]:
+        video = channel.video_resource(index, {'snippet'})
+        item = {
+            'kind': 'youtube#searchResult',
+            'id': {'kind': 'youtube#video', 'videoId': video['id']},
+            'snippet': video['snippet']
+        }
+        item['etag'] = etag_of(item)
+        items.append(item)
+    return list_response('youtube#searchListResponse', items, len(matches), next_page_token)
+
+@app.route('/v2/reports')
+def reports_query():
+    channel = api_call('youtubeAnalytics.reports.query')
+    try:
+        start = date.fromisoformat(request.args['startDate'])
+        end = date.fromisoformat(request.args['endDate'])
+    except (KeyError, ValueError):
+        raise FakeApiError(400, 'badRequest', 'startDate and endDate are required (YYYY-MM-DD).')
+    metric_names = [name for name in request.args.get('metrics', '').split(',') if name]
+    unknown = [name for name in metric_names if name not in ANALYTICS_METRICS]
+    if not metric_names or unknown:
+        raise FakeApiError(400, 'badRequest', f"Unknown metrics: {','.join(unknown) or '(none)'}")
+
+    filters = request.args.get('filters', '')
+    if filters.startswith('video=='):
+        indexes = [channel.index_of(video_id) for video_id in filters[len('video=='):].split(',')]
+        indexes = [index for index in indexes if index is not None]
+    else:
+        indexes = range(channel.video_count)
+
+    rows = []
+    for index in indexes:
+        report = channel.video_report(index, start, end)
+        if report:
+            rows.append([channel.video_id(index)] + [report[name] for name in metric_names])
+
+    sort = request.args.get('sort', '')
+    if sort.lstrip('-') in metric_names:
+        column = metric_names.index(sort.lstrip('-')) + 1
+        rows.sort(key=lambda row: row[column], reverse=sort.startswith('-'))
+
+    if request.args.get('dimensions') != 'video':
+        # Channel-level report: one row of sums (averages are not meaningful here)
+        rows = [[sum(row[i] for row in rows) for i in range(1, len(metric_names) + 1)]] if rows else []
+        headers = []
+    else:
+        headers = [{'name': 'video', 'columnType': 'DIMENSION', 'dataType': 'STRING'}]
+
+    headers += [{'name': name, 'columnType': 'METRIC', 'dataType': 'INTEGER'} for name in metric_names]
+    return jsonify({'kind': 'youtubeAnalytics#resultTable', 'columnHeaders': headers, 'rows': rows})
+
+@app.route('/token', methods=['POST'])
+def token():
+    latency = settings['latency_ms'] + random.uniform(0, settings['jitter_ms'])
+    if latency > 0:
+        time.sleep(latency / 1000)
+    with _lock:
+        stats = _stats.setdefault('oauth2.token', {'calls': 0, 'errors': 0, 'units': 0, 'not_modified': 0, 'bytes': 0})
+        stats['calls'] += 1
+        if request.form.get('grant_type') != 'refresh_token' or not request.form.get('refresh_token'):
+            stats['errors'] += 1
+            return jsonify({'error': 'invalid_grant', 'error_description': 'Bad Request'}), 400
+    return jsonify({
+        'access_token': request.form['refresh_token'],
+        'expires_in': settings['token_lifetime'],
+        'token_type': 'Bearer'
+    })
+
+@app.route('/_fake/stats')
+def fake_stats():
+    with _lock:
+        return jsonify({
+            'settings': settings,
+            'endpoints': _stats,
+            'calls': sum(stats['calls'] for stats in _stats.values()),
+            'quota_units': _units_spent
+        })
+
+@app.route('/_fake/reset', methods=['POST'])
+def fake_reset():
+    global _units_spent
+    with _lock:
+        _stats.clear()
+        _units_spent = 0
+    return jsonify({'reset': True})
+
+@app.route('/_fake/config', methods=['POST'])
+def fake_config():
+    updates = request.get_json(force=True) or {}
+    unknown = [key for key in updates if key not in settings]
+    if unknown:
+        return jsonify({'error': f"Unknown settings: {', '.join(unknown)}"}), 400
+    settings.update(updates)
+    return jsonify(settings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--analytics-latency-ms', type=float, default=None)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--quota-limit', type=int, default=0)
+    parser.add_argument('--revision', type=int, default=0)
+    parser.add_argument('--edit-rate', type=float, default=0.01)
+    parser.add_argument('--token-lifetime', type=int, default=3600)
+    args = parser.parse_args()
+
+    settings.update({name: getattr(args, name) for name in settings})
+    print(f"🧪 Fake YouTube API on http://{args.host}:{args.port} ({json.dumps(settings)})")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""Cache backends for per-channel video datasets.
+
+Entries are JSON-serialisable values stored under string keys with a TTL.
+SQLiteCache (WAL mode) is shared by every worker process on the host;
+MemoryCache is a per-process LRU; TieredCache puts the LRU in front of
+SQLite so repeat hits in a worker skip the JSON decode entirely.
+
+Persisted entries are stamped with the writer's schema version and only read
+back by code with the same version, so a deploy that changes the cached
+data's shape simply misses on older entries instead of validating them.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from db import SQLiteStore
+
+class CacheBackend:
+    """Interface shared by all cache backends"""
+
+    def get(self, key):
+        """Return the live value stored under key, or None"""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        """Store value under key for ttl seconds"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Remove key if present"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove every entry, returning how many were removed"""
+        raise NotImplementedError
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache bounded by entry count and, given size_of(key, value), by total bytes"""
+
+    def __init__(self, max_entries=32, max_bytes=None, size_of=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self._entries = OrderedDict()  # key -> (stored_at, expires_at, value)
+        self._sizes = {}               # key -> bytes, when sized
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get_entry(self, key):
+        """Return (stored_at, expires_at, value) for a live entry, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return entry[2] if entry else None
+
+    def put_entry(self, key, stored_at, expires_at, value):
+        """Insert an entry with explicit timestamps, evicting the least recently used"""
+        size = self.size_of(key, value) if self.size_of else 0
+        with self._lock:
+            self._drop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return  # Would evict everything else and still not fit
+            self._entries[key] = (stored_at, expires_at, value)
+            if self.size_of:
+                self._sizes[key] = size
+                self.total_bytes += size
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self.total_bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        self.put_entry(key, now, now + ttl, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+            return count
+
+    def _drop(self, key):
+        # Caller holds the lock
+        if self._entries.pop(key, None) is not None:
+            self.total_bytes -= self._sizes.pop(key, 0)
+
+class SQLiteCache(SQLiteStore, CacheBackend):
+    """SQLite-backed cache shared across worker processes.
+
+    WAL mode lets readers proceed while one writer commits, and each write is a
+    single INSERT OR REPLACE so readers never see a half-written entry. Expired
+    rows and, past max_bytes, the oldest rows are evicted on write.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, schema_version=0):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+        self.schema_version = schema_version
+
+    def create_schema(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                schema_version INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        # Caches created before entries were versioned
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(cache)')]
+        if 'schema_version' not in columns:
+            conn.execute('ALTER TABLE cache ADD COLUMN schema_version INTEGER NOT NULL DEFAULT 0')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache (expires_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_stored ON cache (stored_at)')
+
+    def get_stamp(self, key):
+        """Return (stored_at, expires_at) for a live entry of this schema version without loading its value"""
+        row = self._connect().execute(
+            'SELECT stored_at, expires_at FROM cache WHERE key = ? AND expires_at > ? AND schema_version = ?',
+            (key, time.time(), self.schema_version)
+        ).fetchone()
+        return row
+
+    def get_entry(self, key):
+        """Return (stored_at, expires_at, value) for a live entry of this schema version, or None"""
+        row = self._connect().execute(
+            'SELECT stored_at, expires_at, value FROM cache WHERE key = ? AND expires_at > ? AND schema_version = ?',
+            (key, time.time(), self.schema_version)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return entry[2] if entry else None
+
+    def set(self, key, value, ttl):
+        self.set_entry(key, value, ttl)
+
+    def set_entry(self, key, value, ttl):
+        """Store value and return the (stored_at, expires_at) it was written with"""
+        payload = json.dumps(value, separators=(',', ':'))
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, size, stored_at, expires_at, schema_version) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, payload, len(payload), now, now + ttl, self.schema_version)
+            )
+            self._evict(conn, now)
+        return now, now + ttl
+
+    def _evict(self, conn, now):
+        """Drop expired rows, then the oldest rows until under max_bytes"""
+        conn.execute('DELETE FROM cache WHERE expires_at <= ?', (now,))
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute('SELECT key, size FROM cache ORDER BY stored_at').fetchall():
+            conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def delete(self, key):
+        self._connect().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        return self._connect().execute('DELETE FROM cache').rowcount
+
+class TieredCache(CacheBackend):
+    """Per-process LRU in front of the shared SQLite cache.
+
+    A memory hit is only trusted if SQLite still holds the same version
+    (same stored_at), so a refresh or delete in another worker is seen at
+    the cost of one indexed lookup instead of a full JSON decode.
+    """
+
+    def __init__(self, memory, shared):
+        self.memory = memory
+        self.shared = shared
+
+    def get(self, key):
+        stamp = self.shared.get_stamp(key)
+        if stamp is None:
+            self.memory.delete(key)
+            return None
+
+        entry = self.memory.get_entry(key)
+        if entry is not None and entry[0] == stamp[0]:
+            return entry[2]
+
+        entry = self.shared.get_entry(key)
+        if entry is None:
+            return None
+        self.memory.put_entry(key, *entry)
+        return entry[2]
+
+    def set(self, key, value, ttl):
+        stored_at, expires_at = self.shared.set_entry(key, value, ttl)
+        self.memory.put_entry(key, stored_at, expires_at, value)
+
+    def delete(self, key):
+        self.shared.delete(key)
+        self.memory.delete(key)
+
+    def clear(self):
+        self.memory.clear()
+        return self.shared.clear()
+
+def create_cache(app_config, schema_version=0):
+    """Build the cache backend selected by CACHE_BACKEND for values of the given schema version"""
+    backend = app_config['CACHE_BACKEND']
+    if backend == 'memory':
+        return MemoryCache(app_config['CACHE_MEMORY_ENTRIES'])
+    if backend == 'sqlite':
+        return SQLiteCache(app_config['CACHE_DB_PATH'], app_config['CACHE_MAX_BYTES'], schema_version)
+    if backend == 'tiered':
+        return TieredCache(
+            MemoryCache(app_config['CACHE_MEMORY_ENTRIES']),
+            SQLiteCache(app_config['CACHE_DB_PATH'], app_config['CACHE_MAX_BYTES'], schema_version)
+        )
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
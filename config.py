@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,11 +8,107 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     DEBUG = False
 
+    # Ceiling on videos pulled from the uploads playlist per refresh
+    MAX_VIDEOS = int(os.environ.get('MAX_VIDEOS', 5000))
+
+    # YouTube API quota: shared breaker/usage store, local daily budget (Data API units)
+    # and jittered exponential backoff for rate limits and 5xx responses
+    QUOTA_DB_PATH = os.environ.get('QUOTA_DB_PATH', 'yt_quota.db')
+    QUOTA_DAILY_BUDGET = int(os.environ.get('QUOTA_DAILY_BUDGET', 10000))
+    API_MAX_RETRIES = int(os.environ.get('API_MAX_RETRIES', 3))
+    API_BACKOFF_BASE_SECONDS = float(os.environ.get('API_BACKOFF_BASE_SECONDS', 0.5))
+    API_BACKOFF_CAP_SECONDS = float(os.environ.get('API_BACKOFF_CAP_SECONDS', 8))
+
+    # Concurrent Analytics queries per refresh, and retries for failed chunks
+    ANALYTICS_MAX_WORKERS = int(os.environ.get('ANALYTICS_MAX_WORKERS', 4))
+    ANALYTICS_CHUNK_RETRIES = int(os.environ.get('ANALYTICS_CHUNK_RETRIES', 2))
+
+    # Fetch engine: 'sync' (googleapiclient + thread pool) or 'async' (httpx + asyncio)
+    FETCH_ENGINE = os.environ.get('FETCH_ENGINE', 'sync')
+    # Keep-alive connections the async engine's shared client may hold open
+    ASYNC_MAX_CONNECTIONS = int(os.environ.get('ASYNC_MAX_CONNECTIONS', 20))
+    # Send Data/Analytics API calls to another root URL instead of Google
+    # (e.g. the stand-in server in benchmarks/fake_youtube.py)
+    YOUTUBE_API_ROOT_URL = os.environ.get('YOUTUBE_API_ROOT_URL')
+
+    # Stored videos().list resources and ETags, so refreshes revalidate them with
+    # conditional requests and only re-parse videos that changed
+    CONDITIONAL_REFRESH = os.environ.get('CONDITIONAL_REFRESH', '1') == '1'
+    VIDEO_RESOURCES_DB_PATH = os.environ.get('VIDEO_RESOURCES_DB_PATH', 'yt_resources.db')
+
+    # Analytics history: lifetime totals start here; with incremental refresh only
+    # days since the last sync (plus the late-data window) are re-queried
+    METRICS_START_DATE = os.environ.get('METRICS_START_DATE', '2024-01-01')
+    METRICS_INCREMENTAL = os.environ.get('METRICS_INCREMENTAL', '1') == '1'
+    METRICS_LATE_DATA_DAYS = int(os.environ.get('METRICS_LATE_DATA_DAYS', 3))
+    METRICS_DB_PATH = os.environ.get('METRICS_DB_PATH', 'yt_metrics.db')
+
+    # Latency budget for /api/videos cache hits (logged when exceeded)
+    CACHE_HIT_TARGET_MS = int(os.environ.get('CACHE_HIT_TARGET_MS', 50))
+
+    # Video cache: 'tiered' (in-process LRU over SQLite), 'sqlite' or 'memory'
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'tiered')
+    CACHE_DB_PATH = os.environ.get('CACHE_DB_PATH', 'yt_cache.db')
+    CACHE_TTL_SECONDS = int(os.environ.get('CACHE_TTL_SECONDS', 6 * 60 * 60))
+    # Fresh TTL for datasets where some videos' metrics queries failed, so they are retried soon
+    PARTIAL_CACHE_TTL_SECONDS = int(os.environ.get('PARTIAL_CACHE_TTL_SECONDS', 15 * 60))
+    # How long past the fresh TTL a dataset may still be served while it refreshes
+    CACHE_STALE_TTL_SECONDS = int(os.environ.get('CACHE_STALE_TTL_SECONDS', 7 * 24 * 60 * 60))
+    CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    CACHE_MEMORY_ENTRIES = int(os.environ.get('CACHE_MEMORY_ENTRIES', 32))
+    # Encoded (JSON + gzip) /api/videos bodies kept per worker, keyed by dataset version
+    RESPONSE_MEMO_ENTRIES = int(os.environ.get('RESPONSE_MEMO_ENTRIES', 128))
+    RESPONSE_MEMO_MAX_BYTES = int(os.environ.get('RESPONSE_MEMO_MAX_BYTES', 64 * 1024 * 1024))
+
+    # Lock files used to coalesce concurrent fetches across worker processes
+    FETCH_LOCK_DIR = os.environ.get('FETCH_LOCK_DIR', os.path.join(tempfile.gettempdir(), 'yt-dashboard-locks'))
+    FETCH_WAIT_TIMEOUT = int(os.environ.get('FETCH_WAIT_TIMEOUT', 120))
+
+    # Background refresh pool for stale caches
+    REFRESH_MAX_WORKERS = int(os.environ.get('REFRESH_MAX_WORKERS', 2))
+    REFRESH_MAX_PENDING = int(os.environ.get('REFRESH_MAX_PENDING', 50))
+
+    # Signed-in users' credentials and channels (used by sessions and the pre-warmer)
+    CREDENTIALS_DB_PATH = os.environ.get('CREDENTIALS_DB_PATH', 'yt_credentials.db')
+    # Server-side session data; the cookie only carries an opaque session ID
+    SESSION_DB_PATH = os.environ.get('SESSION_DB_PATH', 'yt_sessions.db')
+
+    # Access tokens are refreshed in the background once they expire within the
+    # margin, for users seen in the active window; the lease dedupes refreshes across workers
+    TOKEN_REFRESH_MARGIN_SECONDS = int(os.environ.get('TOKEN_REFRESH_MARGIN_SECONDS', 5 * 60))
+    TOKEN_REFRESH_INTERVAL_SECONDS = int(os.environ.get('TOKEN_REFRESH_INTERVAL_SECONDS', 60))
+    TOKEN_REFRESH_LEASE_SECONDS = int(os.environ.get('TOKEN_REFRESH_LEASE_SECONDS', 30))
+    TOKEN_ACTIVE_SECONDS = int(os.environ.get('TOKEN_ACTIVE_SECONDS', 2 * 60 * 60))
+
+    # Logging: records go through a bounded queue to a writer thread (full = dropped);
+    # hot-path logs below WARNING are kept at LOG_SAMPLE_RATE
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 0.01))
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+
+    # Channels linked to one session, and the aggregate view's per-request fetch pool
+    MAX_LINKED_CHANNELS = int(os.environ.get('MAX_LINKED_CHANNELS', 10))
+    AGGREGATE_MAX_WORKERS = int(os.environ.get('AGGREGATE_MAX_WORKERS', 8))
+    # Merged multi-channel datasets kept per worker, keyed by their channels' dataset versions
+    AGGREGATE_MEMO_ENTRIES = int(os.environ.get('AGGREGATE_MEMO_ENTRIES', 16))
+
+    # Off-peak cache pre-warming (see prewarm.py)
+    PREWARM_ENABLED = os.environ.get('PREWARM_ENABLED', '0') == '1'
+    PREWARM_HOURS = [int(h) for h in os.environ.get('PREWARM_HOURS', '5').split(',')]
+    PREWARM_ACTIVE_DAYS = int(os.environ.get('PREWARM_ACTIVE_DAYS', 14))
+    PREWARM_MAX_WORKERS = int(os.environ.get('PREWARM_MAX_WORKERS', 2))
+    PREWARM_JITTER_SECONDS = int(os.environ.get('PREWARM_JITTER_SECONDS', 300))
+    PREWARM_QUOTA_BUDGET = int(os.environ.get('PREWARM_QUOTA_BUDGET', 2000))
+    PREWARM_LOOKAHEAD_SECONDS = int(os.environ.get('PREWARM_LOOKAHEAD_SECONDS', 3 * 60 * 60))
+
 class DevelopmentConfig(Config):
     DEBUG = True
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG').upper()
 
 class ProductionConfig(Config):
     DEBUG = False
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,217 @@
+"""Server-side store of signed-in users' OAuth credentials and channels.
+
+- user_credentials: one row per sign-in, referenced from the server-side
+  session by an opaque ID. token_manager.TokenManager refreshes them ahead
+  of expiry; the refresh lease makes sure only one worker refreshes a row.
+- channels: channel details and refresh token for anything that works on a
+  channel outside a request (the cache pre-warmer). The token is copied from
+  one of the sign-ins using the channel, and handed to another when that
+  sign-in goes away.
+- channel_users: which sign-ins use a channel. Several sessions can share
+  one channel, so its row is only dropped when the last of them lets go.
+
+Stored in SQLite so every worker and the CLI pre-warmer see the same rows.
+"""
+import json
+import secrets
+import time
+
+from db import SQLiteStore
+
+class CredentialStore(SQLiteStore):
+    """SQLite-backed user credentials and channel -> credentials registry"""
+
+    def create_schema(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS channels (
+                channel_id TEXT PRIMARY KEY,
+                channel TEXT NOT NULL,
+                credentials TEXT NOT NULL,
+                last_seen_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_channels_last_seen ON channels (last_seen_at)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS user_credentials (
+                credentials_id TEXT PRIMARY KEY,
+                credentials TEXT NOT NULL,
+                expires_at REAL,
+                refresh_lease_until REAL NOT NULL DEFAULT 0,
+                last_used_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_user_credentials_expires ON user_credentials (expires_at)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS channel_users (
+                channel_id TEXT NOT NULL,
+                credentials_id TEXT NOT NULL,
+                PRIMARY KEY (channel_id, credentials_id)
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_channel_users_credentials ON channel_users (credentials_id)')
+
+    def add_user(self, credentials, expires_at):
+        """Store a new sign-in's credentials dict and return its opaque ID"""
+        credentials_id = secrets.token_urlsafe(24)
+        now = time.time()
+        self._connect().execute(
+            'INSERT INTO user_credentials (credentials_id, credentials, expires_at, last_used_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (credentials_id, json.dumps(credentials), expires_at, now, now)
+        )
+        return credentials_id
+
+    def load_user(self, credentials_id):
+        """Return (credentials dict, expires_at, updated_at) for a sign-in, or None"""
+        row = self._connect().execute(
+            'SELECT credentials, expires_at, updated_at FROM user_credentials WHERE credentials_id = ?',
+            (credentials_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def claim_refresh(self, credentials_id, lease_seconds):
+        """Take the refresh lease for a sign-in; False if another worker holds it"""
+        now = time.time()
+        return self._connect().execute(
+            'UPDATE user_credentials SET refresh_lease_until = ? '
+            'WHERE credentials_id = ? AND refresh_lease_until <= ?',
+            (now + lease_seconds, credentials_id, now)
+        ).rowcount == 1
+
+    def update_user(self, credentials_id, credentials, expires_at):
+        """Store refreshed credentials and release the refresh lease"""
+        self._connect().execute(
+            'UPDATE user_credentials SET credentials = ?, expires_at = ?, refresh_lease_until = 0, updated_at = ? '
+            'WHERE credentials_id = ?',
+            (json.dumps(credentials), expires_at, time.time(), credentials_id)
+        )
+
+    def release_refresh(self, credentials_id):
+        """Give up the refresh lease after a failed refresh"""
+        self._connect().execute(
+            'UPDATE user_credentials SET refresh_lease_until = 0 WHERE credentials_id = ?', (credentials_id,)
+        )
+
+    def touch_user(self, credentials_id):
+        """Mark a sign-in as recently used (keeps its token refreshed proactively)"""
+        self._connect().execute(
+            'UPDATE user_credentials SET last_used_at = ? WHERE credentials_id = ?', (time.time(), credentials_id)
+        )
+
+    def expiring_users(self, before, used_since):
+        """IDs of recently used sign-ins whose access token expires before the given epoch time"""
+        rows = self._connect().execute(
+            'SELECT credentials_id FROM user_credentials '
+            'WHERE expires_at IS NOT NULL AND expires_at < ? AND last_used_at >= ? AND refresh_lease_until <= ?',
+            (before, used_since, time.time())
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete_user(self, credentials_id):
+        """Forget a sign-in's credentials and channel references (on logout)"""
+        with self._transaction() as conn:
+            channel_ids = self._referenced_channels(conn, 'credentials_id = ?', (credentials_id,))
+            conn.execute('DELETE FROM user_credentials WHERE credentials_id = ?', (credentials_id,))
+            conn.execute('DELETE FROM channel_users WHERE credentials_id = ?', (credentials_id,))
+            self._settle_channels(conn, channel_ids)
+
+    def delete_unused_users(self, used_before):
+        """Drop sign-ins nobody has used since the given epoch time, returning how many"""
+        with self._transaction() as conn:
+            deleted = conn.execute(
+                'DELETE FROM user_credentials WHERE last_used_at < ?', (used_before,)
+            ).rowcount
+            orphaned = 'credentials_id NOT IN (SELECT credentials_id FROM user_credentials)'
+            channel_ids = self._referenced_channels(conn, orphaned, ())
+            conn.execute(f'DELETE FROM channel_users WHERE {orphaned}')
+            self._settle_channels(conn, channel_ids)
+        return deleted
+
+    def _referenced_channels(self, conn, where, params):
+        rows = conn.execute(f'SELECT DISTINCT channel_id FROM channel_users WHERE {where}', params).fetchall()
+        return [row[0] for row in rows]
+
+    def _settle_channels(self, conn, channel_ids):
+        """After references were dropped: hand each channel to a remaining sign-in, or delete it.
+
+        The channel row holds a copy of whichever sign-in saved it last, which may be the one
+        that just went away; the pre-warmer must not keep using (and refreshing) its token.
+        Returns the IDs of the deleted channels.
+        """
+        deleted = []
+        for channel_id in channel_ids:
+            remaining = conn.execute(
+                'SELECT COUNT(*) FROM channel_users WHERE channel_id = ?', (channel_id,)
+            ).fetchone()[0]
+            if not remaining:
+                conn.execute('DELETE FROM channels WHERE channel_id = ?', (channel_id,))
+                deleted.append(channel_id)
+                continue
+            row = conn.execute(
+                'SELECT u.credentials FROM channel_users c '
+                'JOIN user_credentials u ON u.credentials_id = c.credentials_id '
+                'WHERE c.channel_id = ? ORDER BY u.updated_at DESC LIMIT 1',
+                (channel_id,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    'UPDATE channels SET credentials = ?, updated_at = ? WHERE channel_id = ?',
+                    (row[0], time.time(), channel_id)
+                )
+        return deleted
+
+    def save(self, channel, credentials, credentials_id=None):
+        """Store (or replace) a channel's details and credentials dict, referenced by a sign-in if given"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO channels (channel_id, channel, credentials, last_seen_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (channel['id'], json.dumps(channel), json.dumps(credentials), now, now)
+            )
+            if credentials_id:
+                conn.execute(
+                    'INSERT OR IGNORE INTO channel_users (channel_id, credentials_id) VALUES (?, ?)',
+                    (channel['id'], credentials_id)
+                )
+
+    def release(self, channel_id, credentials_id):
+        """Drop a sign-in's reference to a channel, and the channel once nothing references it.
+
+        Returns True if the channel was deleted.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                'DELETE FROM channel_users WHERE channel_id = ? AND credentials_id = ?', (channel_id, credentials_id)
+            )
+            return bool(self._settle_channels(conn, [channel_id]))
+
+    def update_credentials(self, channel_id, credentials):
+        """Replace a channel's credentials after a token refresh"""
+        self._connect().execute(
+            'UPDATE channels SET credentials = ?, updated_at = ? WHERE channel_id = ?',
+            (json.dumps(credentials), time.time(), channel_id)
+        )
+
+    def touch(self, channel_id):
+        """Mark a channel as recently used"""
+        self._connect().execute(
+            'UPDATE channels SET last_seen_at = ? WHERE channel_id = ?',
+            (time.time(), channel_id)
+        )
+
+    def delete(self, channel_id):
+        """Forget a channel"""
+        self._connect().execute('DELETE FROM channels WHERE channel_id = ?', (channel_id,))
+
+    def active_channels(self, since):
+        """Return (channel, credentials) for channels used since the given epoch time"""
+        rows = self._connect().execute(
+            'SELECT channel, credentials FROM channels WHERE last_seen_at >= ? ORDER BY last_seen_at DESC',
+            (since,)
+        ).fetchall()
+        return [(json.loads(channel), json.loads(credentials)) for channel, credentials in rows]
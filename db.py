@@ -0,0 +1,54 @@
+"""Shared SQLite plumbing for the on-disk stores.
+
+Each store keeps one connection per thread (sqlite3 connections can't be
+shared across threads) and reconnects after a fork, so gunicorn workers
+never reuse the parent's handle. All stores run in WAL mode so readers in
+other workers aren't blocked by a writer.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+class SQLiteStore:
+    """Base class for SQLite-backed stores; subclasses implement create_schema"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialised = False
+
+    def create_schema(self, conn):
+        """Create tables and indexes (called once per process)"""
+        raise NotImplementedError
+
+    def _connect(self):
+        """Return this thread's connection, creating the schema on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and getattr(self._local, 'pid', None) == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with self._init_lock:
+            if not self._initialised:
+                self.create_schema(conn)
+                self._initialised = True
+
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Yield this thread's connection inside a single immediate (write) transaction"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
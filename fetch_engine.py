@@ -0,0 +1,443 @@
+"""Fetch engines: how a channel's uploads and Analytics metrics are retrieved.
+
+refresh_channel_videos only talks to the FetchEngine interface. The default
+'sync' engine (SyncFetchEngine in app.py) issues blocking googleapiclient
+.execute() calls and fans metrics chunks out over a thread pool. The 'async'
+engine below speaks the same REST endpoints over one shared httpx.AsyncClient
+running on a per-process event loop thread:
+
+- connections are pooled and kept alive across every fetch in the worker,
+- videos().list calls start as soon as each playlist page arrives, and
+- all metrics chunks are in flight together.
+
+Request threads only block on a future while the loop does the I/O, so
+threaded workers (gunicorn --threads) serve many cold loads on one pool.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+
+from instrumentation import metrics, timed_call
+from quota import backoff_delay, is_retryable
+from resource_store import batch_key, video_record
+
+logger = logging.getLogger(__name__)
+
+DATA_API_URL = 'https://www.googleapis.com/youtube/v3'
+ANALYTICS_API_URL = 'https://youtubeanalytics.googleapis.com/v2'
+
+# Paths of the two APIs under a custom root URL (as in their discovery documents)
+DATA_API_PATH = 'youtube/v3'
+ANALYTICS_API_PATH = 'v2'
+
+# YouTube Data API page/batch limit (playlistItems and videos both cap at 50)
+PAGE_SIZE = 50
+
+# videos().list parts; statistics are left out because the dashboard's numbers come
+# from Analytics, and view counts would change nearly every response's ETag
+VIDEO_PARTS = 'snippet,contentDetails,status'
+
+# Returned instead of a response body when a conditional request gets 304 Not Modified
+NOT_MODIFIED = object()
+
+# Conservative cap on the Analytics `video==a,b,c` filter length per query
+ANALYTICS_FILTER_MAX_CHARS = 1500
+
+ANALYTICS_METRICS = 'views,likes,averageViewDuration,averageViewPercentage,subscribersGained'
+
+# Socket timeout (seconds), matching the sync transports
+HTTP_TIMEOUT = 60
+
+def chunk_video_ids_for_filter(video_ids, max_chars=ANALYTICS_FILTER_MAX_CHARS):
+    """Split video IDs into chunks whose `video==a,b,c` filter stays under max_chars"""
+    prefix_length = len('video==')
+    chunks = []
+    chunk = []
+    length = prefix_length
+
+    for video_id in video_ids:
+        added = len(video_id) + (1 if chunk else 0)  # +1 for the comma separator
+        if chunk and length + added > max_chars:
+            chunks.append(chunk)
+            chunk = []
+            length = prefix_length
+            added = len(video_id)
+        chunk.append(video_id)
+        length += added
+
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def metrics_query_params(video_ids, start_date, end_date):
+    """reports.query parameters for one chunk of videos"""
+    return {
+        'ids': 'channel==MINE',
+        'startDate': start_date,
+        'endDate': end_date,
+        'metrics': ANALYTICS_METRICS,
+        'dimensions': 'video',
+        'filters': f'video=={",".join(video_ids)}',
+        'sort': '-views'
+    }
+
+def metrics_from_report(response):
+    """Map a reports.query response's rows by video ID"""
+    metrics_by_video = {}
+    for row in response.get('rows', []):
+        video_id = row[0]  # First column is video ID
+        metrics_by_video[video_id] = {
+            'views': row[1],
+            'likes': row[2],
+            'averageViewDuration': row[3],
+            'averageViewPercentage': row[4],
+            'subscribersGained': row[5]
+        }
+    return metrics_by_video
+
+def cap_playlist_page(video_ids, collected, max_videos, next_page_token):
+    """Cut a playlist page at the video ceiling: (IDs to keep, True once the walk should stop)"""
+    if not max_videos or collected + len(video_ids) < max_videos:
+        return video_ids, False
+    # Only a warning if videos were actually left out
+    if collected + len(video_ids) > max_videos or next_page_token:
+        logger.warning("Reached video ceiling (%d), stopping playlist walk", max_videos)
+    return video_ids[:max_videos - collected], True
+
+class BatchAligner:
+    """Groups playlist positions into videos().list batches counted from the oldest upload.
+
+    New uploads are prepended to the uploads playlist, so batches aligned to its
+    end keep the same video IDs (and so the same list ETags) from one refresh
+    to the next; only the newest, partial batch changes.
+    """
+
+    def __init__(self, size=PAGE_SIZE):
+        self.size = size
+        self.total = None
+        self.position = 0
+        self.batch = []
+        self.batch_index = None
+
+    def add(self, video_ids, total):
+        """Add a playlist page (total = pageInfo.totalResults); return the batches it completes"""
+        if self.total is None:
+            self.total = total or 0
+        ready = []
+        for video_id in video_ids:
+            index = (self.total - 1 - self.position) // self.size
+            if self.batch and index != self.batch_index:
+                ready.append(self.batch)
+                self.batch = []
+            self.batch_index = index
+            self.batch.append(video_id)
+            self.position += 1
+        return ready
+
+    def flush(self):
+        """Return the last, incomplete batch"""
+        ready = [self.batch] if self.batch else []
+        self.batch = []
+        return ready
+
+class VideoRevalidator:
+    """Resolves videos().list batches to video records against the copies stored by the last refresh.
+
+    etag_for() gives the If-None-Match value for a batch seen before. A 304 reuses
+    the batch's stored records as-is; on a 200 only resources whose ETag changed
+    are parsed again. What this refresh saw is collected in `resources` and
+    `batches` for resource_store.VideoResourceStore.save().
+    """
+
+    def __init__(self, stored_resources=None, stored_batches=None):
+        self.stored_resources = stored_resources or {}   # video_id -> (etag, record)
+        self.stored_batches = stored_batches or {}       # batch key -> (etag, returned video IDs)
+        self.resources = {}
+        self.batches = {}
+        self.requests = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.changed = 0
+
+    def etag_for(self, video_ids):
+        stored = self.stored_batches.get(batch_key(video_ids))
+        if stored and all(video_id in self.stored_resources for video_id in stored[1]):
+            return stored[0]
+        return None
+
+    def records_for(self, video_ids, response):
+        """Video records for one batch's response (or NOT_MODIFIED)"""
+        key = batch_key(video_ids)
+        self.requests += 1
+        if response is NOT_MODIFIED:
+            etag, returned_ids = self.stored_batches[key]
+            self.not_modified += 1
+            self.unchanged += len(returned_ids)
+            self.batches[key] = (etag, returned_ids)
+            records = []
+            for video_id in returned_ids:
+                self.resources[video_id] = self.stored_resources[video_id]
+                records.append(self.stored_resources[video_id][1])
+            return records
+
+        records = []
+        for item in response.get('items', []):
+            stored = self.stored_resources.get(item['id'])
+            if stored and item.get('etag') and stored[0] == item['etag']:
+                record = stored[1]
+                self.unchanged += 1
+            else:
+                try:
+                    record = video_record(item)
+                except Exception as e:
+                    logger.warning("Error processing video %s: %s", item.get('id'), e)
+                    continue
+                self.changed += 1
+            self.resources[item['id']] = (item.get('etag'), record)
+            records.append(record)
+        if response.get('etag'):
+            self.batches[key] = (response['etag'], [record['id'] for record in records])
+        return records
+
+    def summary(self):
+        """One-line log summary of what the refresh could reuse"""
+        return (f"{self.changed} videos parsed, {self.unchanged} reused "
+                f"({self.not_modified}/{self.requests} videos().list batches not modified)")
+
+class FetchEngine:
+    """Interface shared by the fetch engines (one instance per fetch)"""
+
+    def discover_videos(self, uploads_playlist_id, max_videos=None, on_page=None, revalidator=None):
+        """Return video records (see resource_store.video_record) for the uploads playlist,
+        newest first; on_page(records) is called per videos().list batch.
+
+        Batches are requested conditionally with the revalidator's stored ETags and
+        resolved to records through it (a fresh VideoRevalidator if none is given).
+        """
+        raise NotImplementedError
+
+    def fetch_metrics(self, video_ids, start_date, end_date, on_chunk=None):
+        """Return (metrics_by_video, failed_ids) for a date range; on_chunk(metrics)
+        is called as each chunk completes"""
+        raise NotImplementedError
+
+class ApiError(Exception):
+    """Non-2xx response from a Google API"""
+    def __init__(self, status, body):
+        super().__init__(f"HTTP {status}: {body[:500]}")
+        self.status = status
+        self.body = body
+        # Same shape as googleapiclient's HttpError.error_details ([{'reason': ...}, ...])
+        try:
+            self.error_details = json.loads(body)['error']['errors']
+        except (ValueError, KeyError, TypeError):
+            self.error_details = []
+
+class _EventLoopThread:
+    """One asyncio loop and httpx client per process, shared by every fetch"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self.loop = None
+        self.client = None
+
+    def run(self, coroutine, max_connections):
+        """Run a coroutine on the shared loop and block until it finishes"""
+        self._ensure_started(max_connections)
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def _ensure_started(self, max_connections):
+        with self._lock:
+            # A forked worker inherits the attributes but not the thread
+            if self._pid == os.getpid():
+                return
+            self.loop = asyncio.new_event_loop()
+            threading.Thread(target=self.loop.run_forever, name='fetch-engine-loop', daemon=True).start()
+            self.client = asyncio.run_coroutine_threadsafe(self._create_client(max_connections), self.loop).result()
+            self._pid = os.getpid()
+
+    @staticmethod
+    async def _create_client(max_connections):
+        import httpx
+        return httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+_shared_loop = _EventLoopThread()
+
+class AsyncFetchEngine(FetchEngine):
+    """httpx + asyncio engine over the YouTube Data v3 and Analytics v2 REST APIs"""
+
+    def __init__(self, credentials, max_concurrency=4, chunk_retries=2, max_connections=20, quota_guard=None,
+                 api_root=None, refresh_credentials=None):
+        try:
+            import httpx  # noqa: F401 (only needed for FETCH_ENGINE=async; loaded on first use)
+        except ImportError:
+            raise RuntimeError("FETCH_ENGINE=async requires the httpx package")
+        self.credentials = credentials
+        # refresh_credentials(rejected_token) -> Credentials or None, blocking (e.g. through the
+        # TokenManager, so the new token is shared and persisted); default: refresh in place
+        self.refresh_credentials = refresh_credentials or self._refresh_in_place
+        self._refresh_lock = asyncio.Lock()
+        self.quota_guard = quota_guard
+        if api_root:
+            self.data_api_url = f"{api_root.rstrip('/')}/{DATA_API_PATH}"
+            self.analytics_api_url = f"{api_root.rstrip('/')}/{ANALYTICS_API_PATH}"
+        else:
+            self.data_api_url = DATA_API_URL
+            self.analytics_api_url = ANALYTICS_API_URL
+        self.max_concurrency = max_concurrency
+        self.chunk_retries = chunk_retries
+        self.max_connections = max_connections
+
+    def discover_videos(self, uploads_playlist_id, max_videos=None, on_page=None, revalidator=None):
+        return _shared_loop.run(
+            self._discover_videos(uploads_playlist_id, max_videos, on_page, revalidator or VideoRevalidator()),
+            self.max_connections
+        )
+
+    def fetch_metrics(self, video_ids, start_date, end_date, on_chunk=None):
+        return _shared_loop.run(self._fetch_metrics(video_ids, start_date, end_date, on_chunk), self.max_connections)
+
+    def _refresh_in_place(self, rejected_token):
+        from google.auth.transport.requests import Request
+        self.credentials.refresh(Request())
+        return self.credentials
+
+    async def _refresh(self, rejected_token):
+        """Replace a rejected or expired token once, however many requests are waiting on it"""
+        async with self._refresh_lock:
+            if self.credentials.token != rejected_token:
+                return  # Another request already got a new one
+            credentials = await asyncio.to_thread(self.refresh_credentials, rejected_token)
+            if credentials is None:
+                raise ApiError(401, 'Credentials could not be refreshed')
+            self.credentials = credentials
+
+    async def _get(self, endpoint, url, params, headers=None):
+        """GET with the bearer token through the quota guard; endpoint names the API method.
+
+        A 401 refreshes the token once; rate limits and 5xx back off and retry.
+        A 304 to a conditional request returns NOT_MODIFIED. Quota accounting is
+        SQLite I/O, so it runs on worker threads rather than the event loop.
+        """
+        refreshed = False
+        attempt = 0
+        while True:
+            if self.quota_guard:
+                await asyncio.to_thread(self.quota_guard.check, endpoint)
+            if not self.credentials.valid and self.credentials.refresh_token:
+                await self._refresh(self.credentials.token)
+            token = self.credentials.token
+            try:
+                with timed_call(endpoint):
+                    response = await _shared_loop.client.get(
+                        url,
+                        params=params,
+                        headers={**(headers or {}), 'Authorization': f'Bearer {token}'}
+                    )
+                    if response.status_code == 304:
+                        data = NOT_MODIFIED
+                    elif response.status_code >= 400:
+                        raise ApiError(response.status_code, response.text)
+                    else:
+                        data = response.json()
+            except ApiError as e:
+                if self.quota_guard:
+                    await asyncio.to_thread(self.quota_guard.record, endpoint, e)
+                if e.status == 401 and not refreshed and self.credentials.refresh_token:
+                    refreshed = True
+                    metrics.record_retry(endpoint)
+                    await self._refresh(token)
+                    continue
+                if self.quota_guard and attempt < self.quota_guard.max_retries and is_retryable(e):
+                    metrics.record_retry(endpoint)
+                    await asyncio.sleep(backoff_delay(attempt, self.quota_guard.backoff_base, self.quota_guard.backoff_cap))
+                    attempt += 1
+                    continue
+                raise
+            if self.quota_guard:
+                await asyncio.to_thread(self.quota_guard.record, endpoint)
+            return data
+
+    async def _discover_videos(self, uploads_playlist_id, max_videos, on_page, revalidator):
+        """Walk the playlist sequentially, starting each batch's videos().list call as soon as it is complete"""
+        aligner = BatchAligner()
+        detail_tasks = []
+        collected = 0
+        page_token = None
+
+        while True:
+            params = {
+                'part': 'contentDetails',
+                'playlistId': uploads_playlist_id,
+                'maxResults': PAGE_SIZE
+            }
+            if page_token:
+                params['pageToken'] = page_token
+            page = await self._get('youtube.playlistItems.list', f'{self.data_api_url}/playlistItems', params)
+
+            page_token = page.get('nextPageToken')
+            video_ids, at_ceiling = cap_playlist_page(
+                [item['contentDetails']['videoId'] for item in page.get('items', [])], collected, max_videos, page_token
+            )
+            collected += len(video_ids)
+            for batch in aligner.add(video_ids, page.get('pageInfo', {}).get('totalResults')):
+                detail_tasks.append(asyncio.create_task(self._video_details(batch, on_page, revalidator)))
+
+            if not page_token or at_ceiling:
+                break
+
+        for batch in aligner.flush():
+            detail_tasks.append(asyncio.create_task(self._video_details(batch, on_page, revalidator)))
+        pages = await asyncio.gather(*detail_tasks)
+        return [video for page in pages for video in page]
+
+    async def _video_details(self, video_ids, on_page, revalidator):
+        etag = revalidator.etag_for(video_ids)
+        response = await self._get('youtube.videos.list', f'{self.data_api_url}/videos', {
+            'part': VIDEO_PARTS,
+            'id': ','.join(video_ids),
+            'maxResults': PAGE_SIZE
+        }, {'If-None-Match': etag} if etag else None)
+        videos = revalidator.records_for(video_ids, response)
+        if on_page:
+            on_page(videos)
+        return videos
+
+    async def _fetch_metrics(self, video_ids, start_date, end_date, on_chunk):
+        """All chunks in flight at once (bounded), each retried up to chunk_retries times"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        metrics_by_video = {}
+        failed_ids = set()
+
+        async def query_chunk(chunk):
+            for attempt in range(self.chunk_retries + 1):
+                try:
+                    async with semaphore:
+                        response = await self._get(
+                            'youtubeAnalytics.reports.query',
+                            f'{self.analytics_api_url}/reports',
+                            metrics_query_params(chunk, start_date, end_date)
+                        )
+                except Exception as e:
+                    logger.warning("Metrics chunk of %d videos failed (attempt %d): %s", len(chunk), attempt + 1, e)
+                    if attempt < self.chunk_retries:
+                        metrics.record_retry('youtubeAnalytics.reports.query')
+                    continue
+                chunk_metrics = metrics_from_report(response)
+                metrics_by_video.update(chunk_metrics)
+                if on_chunk:
+                    on_chunk(chunk_metrics)
+                return
+            failed_ids.update(chunk)
+
+        chunks = chunk_video_ids_for_filter(video_ids)
+        logger.info("Querying metrics %s..%s for %d videos in %d chunks (async)",
+                    start_date, end_date, len(video_ids), len(chunks))
+        await asyncio.gather(*(query_chunk(chunk) for chunk in chunks))
+        return metrics_by_video, failed_ids
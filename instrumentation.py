@@ -0,0 +1,167 @@
+"""Upstream API and request-phase instrumentation, exported in Prometheus text format.
+
+Every YouTube API call (googleapiclient requests via services.instrumented_request_class(),
+async engine requests directly) is recorded with its endpoint, outcome, error
+class, latency and Data API quota cost. Request handlers time their phases
+(cache lookup, fetch, processing, sort, serialization) with timed_phase(),
+which feeds a histogram and the response's Server-Timing header.
+
+Metrics are per worker process; Prometheus scrapes each worker it can reach.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+# Data API quota units per call (Analytics queries draw on a separate quota and are counted as calls)
+QUOTA_COSTS = {
+    'youtube.channels.list': 1,
+    'youtube.playlistItems.list': 1,
+    'youtube.videos.list': 1,
+    'youtube.search.list': 100
+}
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def error_class(error):
+    """Short label for an upstream failure: the API's error reason, else the exception type"""
+    for detail in getattr(error, 'error_details', None) or []:
+        if isinstance(detail, dict) and detail.get('reason'):
+            return detail['reason']
+    status = getattr(error, 'status', None) or getattr(getattr(error, 'resp', None), 'status', None)
+    if status:
+        return f"http_{status}"
+    return type(error).__name__
+
+class Histogram:
+    """Cumulative-bucket histogram for one label set"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+class Metrics:
+    """Thread-safe registry of counters and histograms keyed by label tuples"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.api_calls = {}       # (endpoint, outcome) -> count
+        self.api_errors = {}      # (endpoint, error class) -> count
+        self.api_retries = {}     # endpoint -> count
+        self.quota_units = {}     # endpoint -> units
+        self.api_latency = {}     # endpoint -> Histogram
+        self.phase_latency = {}   # (route, phase) -> Histogram
+        self.log_dropped = 0      # log records dropped on a full queue
+
+    def record_call(self, endpoint, seconds, error=None):
+        """Record one upstream call and its quota cost"""
+        with self._lock:
+            outcome = 'error' if error is not None else 'ok'
+            self.api_calls[(endpoint, outcome)] = self.api_calls.get((endpoint, outcome), 0) + 1
+            if error is not None:
+                key = (endpoint, error_class(error))
+                self.api_errors[key] = self.api_errors.get(key, 0) + 1
+            self.quota_units[endpoint] = self.quota_units.get(endpoint, 0) + QUOTA_COSTS.get(endpoint, 0)
+            self.api_latency.setdefault(endpoint, Histogram()).observe(seconds)
+
+    def record_retry(self, endpoint):
+        """Record that a failed call to endpoint is being retried"""
+        with self._lock:
+            self.api_retries[endpoint] = self.api_retries.get(endpoint, 0) + 1
+
+    def record_log_dropped(self):
+        """Record a log record dropped because the logging queue was full"""
+        with self._lock:
+            self.log_dropped += 1
+
+    def record_phase(self, route, phase, seconds):
+        """Record how long one phase of a request took"""
+        with self._lock:
+            self.phase_latency.setdefault((route, phase), Histogram()).observe(seconds)
+
+    def render(self):
+        """Prometheus text exposition of every metric"""
+        with self._lock:
+            lines = []
+            _counter(lines, 'yt_api_calls_total', 'Upstream YouTube API calls by outcome',
+                     ('endpoint', 'outcome'), self.api_calls)
+            _counter(lines, 'yt_api_errors_total', 'Failed upstream calls by error class',
+                     ('endpoint', 'error'), self.api_errors)
+            _counter(lines, 'yt_api_retries_total', 'Retried upstream calls',
+                     ('endpoint',), {(k,): v for k, v in self.api_retries.items()})
+            _counter(lines, 'yt_api_quota_units_total', 'YouTube Data API quota units spent',
+                     ('endpoint',), {(k,): v for k, v in self.quota_units.items()})
+            _histogram(lines, 'yt_api_call_duration_seconds', 'Upstream call latency',
+                       ('endpoint',), {(k,): v for k, v in self.api_latency.items()})
+            _histogram(lines, 'yt_request_phase_duration_seconds', 'Time spent per request phase',
+                       ('route', 'phase'), self.phase_latency)
+            _counter(lines, 'yt_log_records_dropped_total', 'Log records dropped on a full logging queue',
+                     (), {(): self.log_dropped})
+            return '\n'.join(lines) + '\n'
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}'
+
+def _counter(lines, name, help_text, label_names, values):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} counter')
+    for labels, value in sorted(values.items()):
+        lines.append(f'{name}{_labels(label_names, labels)} {value}')
+
+def _histogram(lines, name, help_text, label_names, histograms):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for labels, histogram in sorted(histograms.items()):
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            bucket_labels = _labels(label_names, labels, 'le="%s"' % bound)
+            lines.append(f'{name}_bucket{bucket_labels} {count}')
+        inf_labels = _labels(label_names, labels, 'le="+Inf"')
+        lines.append(f'{name}_bucket{inf_labels} {histogram.total}')
+        lines.append(f'{name}_sum{_labels(label_names, labels)} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{_labels(label_names, labels)} {histogram.total}')
+
+metrics = Metrics()
+
+@contextmanager
+def timed_call(endpoint):
+    """Time one upstream call and record it (re-raising any error)"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        metrics.record_call(endpoint, time.perf_counter() - start, e)
+        raise
+    metrics.record_call(endpoint, time.perf_counter() - start)
+
+@contextmanager
+def timed_phase(phase):
+    """Time a request phase; inside a request it is also added to the Server-Timing header"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if has_request_context():
+            route = request.endpoint or 'unknown'
+            g.setdefault('phase_timings', []).append((phase, seconds))
+        else:
+            route = 'background'
+        metrics.record_phase(route, phase, seconds)
+
+def server_timing_header(timings):
+    """Server-Timing header value for a request's recorded phases"""
+    return ', '.join(f'{phase};dur={seconds * 1000:.1f}' for phase, seconds in timings)
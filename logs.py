@@ -0,0 +1,195 @@
+"""Structured, non-blocking logging.
+
+Log calls on request threads only build a record and put it on a bounded
+in-memory queue; a listener thread formats it (JSON lines, or plain text in
+development) and writes it to stdout. When the queue is full the record is
+dropped instead of blocking the request, and counted in /metrics.
+
+Records logged inside a request carry its request ID (the incoming
+X-Request-ID header, else a fresh one) and route. Structured fields are
+passed as extra={'fields': {...}}.
+
+Hot-path loggers (from sampled_logger(), e.g. cache hits and the access
+log) keep only LOG_SAMPLE_RATE of their records below WARNING. The coin is
+flipped in isEnabledFor(), before a record is built, so a sampled-out call
+costs about as much as a disabled debug call; warnings and errors always
+pass. Callers that build expensive fields check isEnabledFor() first and
+then log through .logger, so each record gets exactly one coin flip.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+from instrumentation import metrics
+
+# Development format; fields are appended as key=value
+TEXT_FORMAT = '%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s'
+
+_sample_rate = 1.0
+
+def new_request_id():
+    """Short random request ID"""
+    return uuid.uuid4().hex[:16]
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the current request ID and route (on the calling thread, before queueing)"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id', '-')
+            record.route = request.endpoint or '-'
+        else:
+            record.request_id = '-'
+            record.route = '-'
+        return True
+
+def sampled(level):
+    """True if a hot-path record at this level should be kept (always for WARNING and above)"""
+    return level >= logging.WARNING or _sample_rate >= 1 or random.random() < _sample_rate
+
+class SampledLogger(logging.LoggerAdapter):
+    """Logger wrapper that keeps LOG_SAMPLE_RATE of its records below WARNING"""
+
+    def __init__(self, logger):
+        super().__init__(logger, None)
+
+    def isEnabledFor(self, level):
+        return self.logger.isEnabledFor(level) and sampled(level)
+
+    def process(self, msg, kwargs):
+        # Pass extra= through untouched (LoggerAdapter would replace it)
+        return msg, kwargs
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records instead of waiting on a full queue"""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.record_log_dropped()
+
+    def prepare(self, record):
+        # Resolve the message and traceback here (they may reference mutable objects);
+        # formatting into JSON/text happens on the listener thread
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request, fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+            'route': getattr(record, 'route', '-')
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Readable single lines for development, with fields as key=value"""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = '-'
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+class LogPipeline:
+    """The queue handler on the root logger and the listener thread draining it"""
+
+    def __init__(self, formatter, queue_size, stream=None):
+        self.formatter = formatter
+        self.queue_size = queue_size
+        self.stream_handler = logging.StreamHandler(stream or sys.stdout)
+        self.stream_handler.setFormatter(formatter)
+        self.handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+        self.handler.addFilter(RequestContextFilter())
+        self.listener = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.listener = QueueListener(self.handler.queue, self.stream_handler, respect_handler_level=False)
+            self.listener.start()
+
+    def restart_after_fork(self):
+        """A forked worker inherits the queue but not the listener thread: start fresh"""
+        self.handler.queue = queue.Queue(self.queue_size)
+        self._lock = threading.Lock()
+        self.start()
+
+    def stop(self):
+        """Flush queued records and stop the listener (at exit)"""
+        with self._lock:
+            if self.listener is not None:
+                self.listener.stop()
+                self.listener = None
+
+    def queued(self):
+        return self.handler.queue.qsize()
+
+_pipeline = None
+
+def setup_logging(app_config):
+    """Route every logger through the non-blocking queue (idempotent)"""
+    global _pipeline, _sample_rate
+    _sample_rate = app_config['LOG_SAMPLE_RATE']
+    if _pipeline is not None:
+        return _pipeline
+
+    formatter = JsonFormatter() if app_config['LOG_FORMAT'] == 'json' else TextFormatter()
+    _pipeline = LogPipeline(formatter, app_config['LOG_QUEUE_SIZE'])
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_pipeline.handler)
+    root.setLevel(app_config['LOG_LEVEL'])
+    # Werkzeug's own per-request line duplicates the access log
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    _pipeline.start()
+    atexit.register(_pipeline.stop)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_pipeline.restart_after_fork)
+    return _pipeline
+
+def sampled_logger(name):
+    """Logger for hot-path records, which are sampled below WARNING"""
+    return SampledLogger(logging.getLogger(name))
+
+def queued_records():
+    """Records waiting for the listener thread (0 before setup_logging)"""
+    return _pipeline.queued() if _pipeline is not None else 0
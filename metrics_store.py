@@ -0,0 +1,147 @@
+"""Persisted per-video Analytics totals for incremental refreshes.
+
+Instead of re-querying lifetime totals from METRICS_START_DATE on every
+refresh, each video keeps "settled" totals through a date old enough that
+Analytics won't revise it any more. A refresh only queries:
+
+- the settle window (last settled date, new settled date], added to the
+  stored totals and persisted, and
+- the provisional window (new settled date, today], added on top for the
+  response only, because late-arriving data can still change it.
+
+Averages can't be summed, so durations and percentages are stored as
+view-weighted sums and divided back out by total views.
+"""
+from db import SQLiteStore
+
+EMPTY_TOTALS = {
+    'views': 0,
+    'likes': 0,
+    'watch_seconds': 0.0,       # sum of views * averageViewDuration
+    'weighted_percentage': 0.0, # sum of views * averageViewPercentage
+    'subscribersGained': 0
+}
+
+def totals_from_metrics(metrics):
+    """Convert one Analytics row's metrics into additive totals"""
+    views = metrics.get('views', 0)
+    return {
+        'views': views,
+        'likes': metrics.get('likes', 0),
+        'watch_seconds': views * metrics.get('averageViewDuration', 0),
+        'weighted_percentage': views * metrics.get('averageViewPercentage', 0),
+        'subscribersGained': metrics.get('subscribersGained', 0)
+    }
+
+def add_totals(a, b):
+    """Sum two additive totals dicts"""
+    return {field: a[field] + b[field] for field in EMPTY_TOTALS}
+
+def metrics_from_totals(totals):
+    """Convert additive totals back into the metrics shape used by get_videos"""
+    views = totals['views']
+    return {
+        'views': views,
+        'likes': totals['likes'],
+        'averageViewDuration': totals['watch_seconds'] / views if views else 0,
+        'averageViewPercentage': totals['weighted_percentage'] / views if views else 0,
+        'subscribersGained': totals['subscribersGained']
+    }
+
+class MetricsStore(SQLiteStore):
+    """SQLite store of settled per-video totals and daily metric snapshots"""
+
+    def create_schema(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS video_totals (
+                channel_id TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                settled_through TEXT NOT NULL,
+                views INTEGER NOT NULL,
+                likes INTEGER NOT NULL,
+                watch_seconds REAL NOT NULL,
+                weighted_percentage REAL NOT NULL,
+                subscribers_gained INTEGER NOT NULL,
+                PRIMARY KEY (channel_id, video_id)
+            )
+        ''')
+        # One lifetime snapshot per video per day; the key doubles as the range-query index
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS video_history (
+                channel_id TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                views INTEGER NOT NULL,
+                likes INTEGER NOT NULL,
+                average_view_duration REAL NOT NULL,
+                percent_watched REAL NOT NULL,
+                subscribers_gained INTEGER NOT NULL,
+                PRIMARY KEY (channel_id, video_id, date)
+            ) WITHOUT ROWID
+        ''')
+
+    def load_totals(self, channel_id):
+        """Return {video_id: (settled_through, totals)} for a channel"""
+        rows = self._connect().execute(
+            'SELECT video_id, settled_through, views, likes, watch_seconds, weighted_percentage, subscribers_gained '
+            'FROM video_totals WHERE channel_id = ?',
+            (channel_id,)
+        ).fetchall()
+        return {
+            row[0]: (row[1], {
+                'views': row[2],
+                'likes': row[3],
+                'watch_seconds': row[4],
+                'weighted_percentage': row[5],
+                'subscribersGained': row[6]
+            })
+            for row in rows
+        }
+
+    def save_totals(self, channel_id, settled_through, totals_by_video):
+        """Persist settled totals for many videos in one transaction"""
+        with self._transaction() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO video_totals '
+                '(channel_id, video_id, settled_through, views, likes, watch_seconds, weighted_percentage, subscribers_gained) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (channel_id, video_id, settled_through, totals['views'], totals['likes'],
+                     totals['watch_seconds'], totals['weighted_percentage'], totals['subscribersGained'])
+                    for video_id, totals in totals_by_video.items()
+                ]
+            )
+
+    def record_snapshots(self, channel_id, snapshot_date, snapshots):
+        """Append today's lifetime metrics for each video (a later refresh the same day replaces them)"""
+        with self._transaction() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO video_history '
+                '(channel_id, video_id, date, views, likes, average_view_duration, percent_watched, subscribers_gained) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (channel_id, snapshot['id'], snapshot_date, snapshot['views'], snapshot['likes'],
+                     snapshot['averageViewDuration'], snapshot['percentWatched'], snapshot['subsGained'])
+                    for snapshot in snapshots
+                ]
+            )
+
+    def history(self, channel_id, video_id, start_date=None, end_date=None):
+        """Return a video's snapshots between two ISO dates (inclusive), oldest first"""
+        rows = self._connect().execute(
+            'SELECT date, views, likes, average_view_duration, percent_watched, subscribers_gained '
+            'FROM video_history WHERE channel_id = ? AND video_id = ? AND date >= ? AND date <= ? '
+            'ORDER BY date',
+            (channel_id, video_id, start_date or '0000-00-00', end_date or '9999-99-99')
+        ).fetchall()
+        return [
+            {
+                'date': row[0],
+                'views': row[1],
+                'likes': row[2],
+                'averageViewDuration': row[3],
+                'percentWatched': row[4],
+                'subsGained': row[5]
+            }
+            for row in rows
+        ]
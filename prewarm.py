@@ -0,0 +1,176 @@
+"""Off-peak cache pre-warmer.
+
+Rebuilds the video cache for recently active channels before their users
+show up, so the first load of the day is a cache hit. Runs either inside
+the web app (PREWARM_ENABLED=1, started from wsgi.py) or from the CLI:
+
+    python prewarm.py             # warm once and exit
+    python prewarm.py --schedule  # keep running, warming at PREWARM_HOURS
+"""
+import argparse
+import logging
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from app import (
+    app, credential_store, quota_guard, video_cache, video_fetches, fresh_ttl_seconds, get_cache_key,
+    load_cached_videos, refresh_channel_videos
+)
+from token_manager import credentials_from_dict, credentials_to_dict
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Non-POSIX dev machines: no cross-process run lock
+    fcntl = None
+
+# Assumed channel size when there is no cached dataset to estimate from
+DEFAULT_VIDEO_ESTIMATE = 50
+
+def estimate_quota_cost(channel_id):
+    """Estimate Data API units to rebuild a channel (playlistItems + videos pages)"""
+    cached = video_cache.get(get_cache_key(channel_id))
+    video_count = (cached or {}).get('total_videos_available') or DEFAULT_VIDEO_ESTIMATE
+    pages = max(1, math.ceil(min(video_count, app.config['MAX_VIDEOS']) / 50))
+    return 2 * pages
+
+def needs_warming(channel_id):
+    """True if the channel's cache is missing or goes stale within the lookahead window"""
+    cached = load_cached_videos(channel_id, fresh_only=True)
+    if cached is None:
+        return True
+    cache_time = datetime.fromisoformat(cached['cache_time'])
+    stale_at = cache_time + timedelta(seconds=fresh_ttl_seconds(cached))
+    return stale_at - datetime.now() < timedelta(seconds=app.config['PREWARM_LOOKAHEAD_SECONDS'])
+
+def warm_channel(channel, creds_data):
+    """Rebuild one channel's cache after a random delay, returning True on success"""
+    time.sleep(random.uniform(0, app.config['PREWARM_JITTER_SECONDS']))
+    channel_id = channel['id']
+    try:
+        from google.auth.transport.requests import Request
+        creds = credentials_from_dict(creds_data)
+        creds.refresh(Request())
+        credential_store.update_credentials(channel_id, credentials_to_dict(creds))
+
+        video_fetches.do(
+            channel_id,
+            lambda: refresh_channel_videos(creds, channel),
+            lambda: load_cached_videos(channel_id, fresh_only=True)
+        )
+        logger.info("Pre-warmed cache for %s", channel_id)
+        return True
+    except Exception as e:
+        logger.error("Pre-warm failed for %s: %s", channel_id, e)
+        return False
+
+@contextmanager
+def run_lock():
+    """Non-blocking lock so only one worker/CLI runs a pre-warm at a time; yields False if busy"""
+    if fcntl is None:
+        yield True
+        return
+
+    os.makedirs(app.config['FETCH_LOCK_DIR'], exist_ok=True)
+    with open(os.path.join(app.config['FETCH_LOCK_DIR'], 'prewarm.lock'), 'w') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def run_prewarm():
+    """Warm every active channel that needs it, within the per-run quota budget"""
+    with run_lock() as acquired:
+        if not acquired:
+            logger.info("Pre-warm already running in another process, skipping")
+            return None
+
+        if quota_guard.is_open('youtube'):
+            logger.info("YouTube quota breaker is open, skipping pre-warm")
+            return None
+
+        since = time.time() - app.config['PREWARM_ACTIVE_DAYS'] * 24 * 60 * 60
+        candidates = [
+            (channel, creds_data)
+            for channel, creds_data in credential_store.active_channels(since)
+            if needs_warming(channel['id'])
+        ]
+
+        # Most recently active first; stop scheduling once the budget is spent
+        # Never plan past what is left of today's project-wide quota
+        budget = min(
+            app.config['PREWARM_QUOTA_BUDGET'],
+            max(0, quota_guard.daily_budget - quota_guard.units_used('youtube'))
+        )
+        planned = []
+        planned_units = 0
+        skipped = 0
+        for channel, creds_data in candidates:
+            cost = estimate_quota_cost(channel['id'])
+            if cost > budget:
+                skipped += 1
+                continue
+            budget -= cost
+            planned_units += cost
+            planned.append((channel, creds_data))
+
+        logger.info("Pre-warming %d channels (%d skipped for quota budget)", len(planned), skipped)
+        with ThreadPoolExecutor(max_workers=app.config['PREWARM_MAX_WORKERS']) as executor:
+            results = list(executor.map(lambda job: warm_channel(*job), planned))
+
+        summary = {
+            'warmed': sum(results),
+            'failed': len(results) - sum(results),
+            'skipped_budget': skipped,
+            'quota_units_planned': planned_units
+        }
+        logger.info("Pre-warm finished", extra={'fields': summary})
+        return summary
+
+def seconds_until_next_run(now=None):
+    """Seconds until the next configured PREWARM_HOURS slot"""
+    now = now or datetime.now()
+    upcoming = []
+    for hour in app.config['PREWARM_HOURS']:
+        slot = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+        if slot <= now:
+            slot += timedelta(days=1)
+        upcoming.append(slot)
+    return (min(upcoming) - now).total_seconds()
+
+def run_scheduler():
+    """Sleep until each PREWARM_HOURS slot and pre-warm, forever"""
+    while True:
+        time.sleep(seconds_until_next_run())
+        try:
+            run_prewarm()
+        except Exception as e:
+            logger.exception("Pre-warm run failed: %s", e)
+
+def start_scheduler():
+    """Run the scheduler on a daemon thread inside the web process"""
+    thread = threading.Thread(target=run_scheduler, name='cache-prewarm', daemon=True)
+    thread.start()
+    return thread
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pre-warm video caches for active channels')
+    parser.add_argument('--schedule', action='store_true', help='keep running and warm at PREWARM_HOURS')
+    args = parser.parse_args()
+
+    if args.schedule:
+        run_scheduler()
+    else:
+        run_prewarm()
@@ -0,0 +1,196 @@
+"""Quota-aware circuit breaker and retry policy for the YouTube APIs.
+
+Quota belongs to the Google Cloud project, not to a user or a worker, so the
+breaker state and the day's usage live in SQLite where every worker (and the
+CLI pre-warmer) sees them:
+
+- quotaExceeded / dailyLimitExceeded open the API's breaker until the quota
+  day resets (midnight Pacific time); calls then fail fast with QuotaExhausted
+  instead of spending a round trip on a guaranteed error.
+- Data API units are counted locally per quota day, and the breaker also
+  opens once the configured daily budget would be exceeded.
+- Rate limits, 429s and 5xx responses are retried with full-jitter
+  exponential backoff.
+"""
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+
+from db import SQLiteStore
+from instrumentation import QUOTA_COSTS, error_class, metrics, timed_call
+
+logger = logging.getLogger(__name__)
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+except Exception:  # no tz database: fall back to PST
+    from datetime import timezone
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+
+# Error reasons meaning the project's daily quota is gone
+QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded', 'dailyLimitExceededUnreg'}
+
+# Error reasons worth retrying after a pause
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded', 'backendError'}
+
+class QuotaExhausted(Exception):
+    """Calls to an API are blocked until its breaker closes"""
+    def __init__(self, api, reason, open_until):
+        super().__init__(f"{api} quota exhausted ({reason}); retrying after "
+                         f"{datetime.fromtimestamp(open_until).isoformat(timespec='minutes')}")
+        self.api = api
+        self.reason = reason
+        self.open_until = open_until
+
+def quota_day(now=None):
+    """The quota day (Pacific date) for an epoch time"""
+    return datetime.fromtimestamp(now or time.time(), QUOTA_TIMEZONE).date().isoformat()
+
+def next_quota_reset(now=None):
+    """Epoch time of the next Pacific midnight"""
+    local = datetime.fromtimestamp(now or time.time(), QUOTA_TIMEZONE)
+    midnight = (local + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight.timestamp()
+
+def api_of(endpoint):
+    """API name of a method ID ('youtube.videos.list' -> 'youtube')"""
+    return endpoint.split('.', 1)[0]
+
+def error_status(error):
+    """HTTP status of an HttpError / ApiError, if any"""
+    status = getattr(error, 'status', None) or getattr(getattr(error, 'resp', None), 'status', None)
+    try:
+        return int(status) if status else None
+    except (TypeError, ValueError):
+        return None
+
+def is_retryable(error):
+    """True for rate limits and transient server errors"""
+    status = error_status(error)
+    return error_class(error) in RATE_LIMIT_REASONS or status == 429 or (status is not None and status >= 500)
+
+def backoff_delay(attempt, base, cap):
+    """Full-jitter exponential backoff for retry number `attempt` (0-based)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class QuotaGuard(SQLiteStore):
+    """Shared breaker state and per-day quota usage"""
+
+    def __init__(self, path, daily_budget=10000, max_retries=3, backoff_base=0.5, backoff_cap=8.0):
+        super().__init__(path)
+        self.daily_budget = daily_budget
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+    def create_schema(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS breakers (
+                api TEXT PRIMARY KEY,
+                open_until REAL NOT NULL,
+                reason TEXT NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS quota_usage (
+                day TEXT NOT NULL,
+                api TEXT NOT NULL,
+                units INTEGER NOT NULL,
+                calls INTEGER NOT NULL,
+                PRIMARY KEY (day, api)
+            )
+        ''')
+
+    def check(self, endpoint):
+        """Raise QuotaExhausted if the endpoint's API is blocked or the call would bust the budget"""
+        api = api_of(endpoint)
+        row = self._connect().execute(
+            'SELECT open_until, reason FROM breakers WHERE api = ? AND open_until > ?',
+            (api, time.time())
+        ).fetchone()
+        if row:
+            raise QuotaExhausted(api, row[1], row[0])
+
+        cost = QUOTA_COSTS.get(endpoint, 0)
+        if cost and self.daily_budget and self.units_used(api) + cost > self.daily_budget:
+            self.trip(api, 'localBudget')
+            raise QuotaExhausted(api, 'localBudget', next_quota_reset())
+
+    def record(self, endpoint, error=None):
+        """Count a completed call against today's quota; open the breaker on quota errors"""
+        api = api_of(endpoint)
+        self._connect().execute(
+            'INSERT INTO quota_usage (day, api, units, calls) VALUES (?, ?, ?, 1) '
+            'ON CONFLICT (day, api) DO UPDATE SET units = units + excluded.units, calls = calls + 1',
+            (quota_day(), api, QUOTA_COSTS.get(endpoint, 0))
+        )
+        if error is not None and error_class(error) in QUOTA_REASONS:
+            self.trip(api, error_class(error))
+
+    def trip(self, api, reason):
+        """Open an API's breaker until the next quota reset"""
+        open_until = next_quota_reset()
+        self._connect().execute(
+            'INSERT OR REPLACE INTO breakers (api, open_until, reason) VALUES (?, ?, ?)',
+            (api, open_until, reason)
+        )
+        logger.warning("%s breaker open until %s (%s)", api, datetime.fromtimestamp(open_until).isoformat(timespec='minutes'), reason)
+
+    def is_open(self, api):
+        """True while calls to an API are blocked"""
+        return self._connect().execute(
+            'SELECT 1 FROM breakers WHERE api = ? AND open_until > ?',
+            (api, time.time())
+        ).fetchone() is not None
+
+    def units_used(self, api):
+        """Quota units recorded for an API today"""
+        row = self._connect().execute(
+            'SELECT units FROM quota_usage WHERE day = ? AND api = ?',
+            (quota_day(), api)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def status(self):
+        """Breaker and usage summary for /health"""
+        conn = self._connect()
+        now = time.time()
+        breakers = {
+            api: {'open_until': datetime.fromtimestamp(open_until).isoformat(timespec='seconds'), 'reason': reason}
+            for api, open_until, reason in conn.execute(
+                'SELECT api, open_until, reason FROM breakers WHERE open_until > ?', (now,)
+            )
+        }
+        usage = {
+            api: {'units': units, 'calls': calls}
+            for api, units, calls in conn.execute(
+                'SELECT api, units, calls FROM quota_usage WHERE day = ?', (quota_day(now),)
+            )
+        }
+        return {
+            'quota_day': quota_day(now),
+            'daily_budget': self.daily_budget,
+            'usage': usage,
+            'open_breakers': breakers
+        }
+
+    def call(self, endpoint, execute):
+        """Run a blocking API call through the breaker, with backoff on transient errors"""
+        for attempt in range(self.max_retries + 1):
+            self.check(endpoint)
+            try:
+                with timed_call(endpoint):
+                    result = execute()
+            except QuotaExhausted:
+                raise
+            except Exception as e:
+                self.record(endpoint, e)
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                metrics.record_retry(endpoint)
+                time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_cap))
+                continue
+            self.record(endpoint)
+            return result
@@ -0,0 +1,49 @@
+"""Background cache refresh.
+
+Stale datasets are served immediately and rebuilt here, off the request
+path, on a small bounded pool. Jobs are deduplicated by key so repeated
+requests for the same stale channel queue a single rebuild.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class BackgroundRefresher:
+    """Bounded, per-key deduplicated background job runner"""
+
+    def __init__(self, max_workers=2, max_pending=50):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cache-refresh')
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._counters = {'submitted': 0, 'deduplicated': 0, 'rejected': 0, 'completed': 0}
+
+    def submit(self, key, job):
+        """Queue job() unless one is already queued or running for key.
+
+        Returns True if the job was queued.
+        """
+        with self._lock:
+            if key in self._pending:
+                self._counters['deduplicated'] += 1
+                return False
+            if len(self._pending) >= self.max_pending:
+                self._counters['rejected'] += 1
+                return False
+            self._pending.add(key)
+            self._counters['submitted'] += 1
+
+        def run():
+            try:
+                job()
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+                    self._counters['completed'] += 1
+
+        self._executor.submit(run)
+        return True
+
+    def stats(self):
+        """Snapshot of the refresh counters for this process"""
+        with self._lock:
+            return dict(self._counters, pending=len(self._pending))
@@ -0,0 +1,98 @@
+"""Persisted videos().list resources and ETags for conditional refreshes.
+
+Each refresh stores, per channel:
+
+- every video's resource ETag and its parsed record (the few fields the
+  dashboard uses), and
+- every videos().list batch's list ETag and the video IDs it returned.
+
+The next refresh sends a batch's ETag as If-None-Match; a 304 reuses the
+stored records without downloading or parsing anything, and in a 200 only
+the resources whose ETag changed are parsed again (fetch_engine.VideoRevalidator).
+"""
+import hashlib
+import json
+
+from db import SQLiteStore
+from video_rows import parse_duration_seconds
+
+def batch_key(video_ids):
+    """Stable key for a videos().list batch (its exact ID list)"""
+    return hashlib.sha1(','.join(video_ids).encode('utf-8')).hexdigest()[:20]
+
+def video_record(resource):
+    """The fields the dashboard uses from a videos().list resource, parsed once"""
+    return {
+        'id': resource['id'],
+        'title': resource['snippet']['title'],
+        'thumbnail': resource['snippet']['thumbnails']['medium']['url'],
+        'publishedAt': resource['snippet']['publishedAt'],
+        'lengthSeconds': parse_duration_seconds(resource['contentDetails']['duration']),
+        'privacyStatus': resource.get('status', {}).get('privacyStatus')
+    }
+
+class VideoResourceStore(SQLiteStore):
+    """SQLite store of per-channel video records and videos().list ETags"""
+
+    def create_schema(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS video_resources (
+                channel_id TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                etag TEXT,
+                record TEXT NOT NULL,
+                PRIMARY KEY (channel_id, video_id)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS video_batches (
+                channel_id TEXT NOT NULL,
+                batch_key TEXT NOT NULL,
+                etag TEXT NOT NULL,
+                video_ids TEXT NOT NULL,
+                PRIMARY KEY (channel_id, batch_key)
+            ) WITHOUT ROWID
+        ''')
+
+    def load(self, channel_id):
+        """Return ({video_id: (etag, record)}, {batch key: (etag, video IDs)}) for a channel"""
+        conn = self._connect()
+        resources = {
+            video_id: (etag, json.loads(record))
+            for video_id, etag, record in conn.execute(
+                'SELECT video_id, etag, record FROM video_resources WHERE channel_id = ?', (channel_id,)
+            )
+        }
+        batches = {
+            key: (etag, json.loads(video_ids))
+            for key, etag, video_ids in conn.execute(
+                'SELECT batch_key, etag, video_ids FROM video_batches WHERE channel_id = ?', (channel_id,)
+            )
+        }
+        return resources, batches
+
+    def save(self, channel_id, resources, batches):
+        """Replace a channel's stored resources and batches with what the latest refresh saw"""
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM video_resources WHERE channel_id = ?', (channel_id,))
+            conn.execute('DELETE FROM video_batches WHERE channel_id = ?', (channel_id,))
+            conn.executemany(
+                'INSERT INTO video_resources (channel_id, video_id, etag, record) VALUES (?, ?, ?, ?)',
+                [
+                    (channel_id, video_id, etag, json.dumps(record, separators=(',', ':')))
+                    for video_id, (etag, record) in resources.items()
+                ]
+            )
+            conn.executemany(
+                'INSERT INTO video_batches (channel_id, batch_key, etag, video_ids) VALUES (?, ?, ?, ?)',
+                [
+                    (channel_id, key, etag, json.dumps(video_ids))
+                    for key, (etag, video_ids) in batches.items()
+                ]
+            )
+
+    def delete(self, channel_id):
+        """Forget a channel's stored resources (the next refresh downloads everything)"""
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM video_resources WHERE channel_id = ?', (channel_id,))
+            conn.execute('DELETE FROM video_batches WHERE channel_id = ?', (channel_id,))
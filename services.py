@@ -0,0 +1,115 @@
+"""Process-wide factory for YouTube API service objects.
+
+Calling googleapiclient's build() on every request re-reads and re-parses the
+discovery document each time. Here each API surface's bundled (static)
+discovery document is loaded once per worker, and per-request services are
+stamped out from it with the caller's credentials bound to a pooled transport.
+Every request they issue is recorded by the instrumentation layer and
+passes through the quota circuit breaker.
+
+The Google client stack (googleapiclient, httplib2, google-auth) is imported
+on first use, so workers boot and answer /health and static pages without it.
+"""
+import json
+import threading
+from functools import lru_cache
+
+from fetch_engine import NOT_MODIFIED
+from instrumentation import timed_call
+
+# Socket timeout (seconds) for the pooled transports
+HTTP_TIMEOUT = 60
+
+_local = threading.local()
+
+# QuotaGuard every request goes through (installed by the app); None = timing only
+_quota_guard = None
+
+# Root URL overriding the discovery documents' (e.g. a local stand-in server); None = Google
+_api_root = None
+
+def set_quota_guard(guard):
+    """Route every API request through a quota.QuotaGuard"""
+    global _quota_guard
+    _quota_guard = guard
+
+def set_api_root(root_url):
+    """Send every API request to root_url instead of the Google endpoints"""
+    global _api_root
+    _api_root = root_url.rstrip('/') + '/' if root_url else None
+
+@lru_cache(maxsize=None)
+def get_discovery_document(api_name, api_version):
+    """Load and parse the bundled discovery document for an API, once per process"""
+    from googleapiclient.discovery_cache import get_static_doc
+    document = get_static_doc(api_name, api_version)
+    if document is None:
+        raise ValueError(f"No bundled discovery document for {api_name} {api_version}")
+    return json.loads(document)
+
+def get_pooled_http():
+    """Return this thread's shared httplib2 transport.
+
+    httplib2.Http keeps its connections alive between requests but is not
+    thread-safe, so each thread (request worker or pool thread) gets its own.
+    """
+    http = getattr(_local, 'http', None)
+    if http is None:
+        import httplib2
+        http = httplib2.Http(timeout=HTTP_TIMEOUT)
+        _local.http = http
+    return http
+
+def authorized_http(credentials):
+    """Bind credentials to this thread's pooled transport"""
+    from google_auth_httplib2 import AuthorizedHttp
+    return AuthorizedHttp(credentials, http=get_pooled_http())
+
+@lru_cache(maxsize=None)
+def instrumented_request_class():
+    """HttpRequest subclass used for every API request (defined on first use with googleapiclient)"""
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import HttpRequest
+
+    class InstrumentedHttpRequest(HttpRequest):
+        """HttpRequest whose execute() is timed and counted per API method (e.g. youtube.videos.list)
+        and, once a quota guard is installed, runs behind its breaker and backoff.
+
+        A 304 to a conditional request (If-None-Match in .headers) returns NOT_MODIFIED.
+        """
+
+        def execute(self, http=None, num_retries=0):
+            endpoint = self.methodId or 'unknown'
+
+            def execute():
+                try:
+                    return HttpRequest.execute(self, http=http, num_retries=num_retries)
+                except HttpError as e:
+                    if e.resp.status == 304:
+                        return NOT_MODIFIED
+                    raise
+
+            if _quota_guard is not None:
+                return _quota_guard.call(endpoint, execute)
+            with timed_call(endpoint):
+                return execute()
+
+    return InstrumentedHttpRequest
+
+def get_service(api_name, api_version, credentials):
+    """Build a service for `credentials` from the cached discovery document"""
+    from googleapiclient.discovery import build_from_document
+    return build_from_document(
+        get_discovery_document(api_name, api_version),
+        http=authorized_http(credentials),
+        requestBuilder=instrumented_request_class(),
+        client_options={'api_endpoint': _api_root} if _api_root else None
+    )
+
+def get_youtube(credentials):
+    """YouTube Data API v3 service"""
+    return get_service('youtube', 'v3', credentials)
+
+def get_youtube_analytics(credentials):
+    """YouTube Analytics API v2 service"""
+    return get_service('youtubeAnalytics', 'v2', credentials)
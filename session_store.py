@@ -0,0 +1,162 @@
+"""Server-side Flask sessions stored in SQLite.
+
+The cookie only carries an opaque random session ID; the session data
+lives in a sessions table every worker shares. Sessions are only written
+back when a request changes them, and clearing a session (sign-in,
+logout) rotates its ID.
+
+Signed cookies issued before the switch are read once with Flask's own
+serializer and moved into the store, so existing users stay signed in.
+"""
+import json
+import logging
+import secrets
+import time
+
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from db import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Seconds between sweeps of expired sessions (per worker)
+PRUNE_INTERVAL_SECONDS = 60 * 60
+
+class SessionStore(SQLiteStore):
+    """SQLite-backed session ID -> session data store"""
+
+    def create_schema(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                sid TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)')
+
+    def load(self, sid):
+        """Return a session's data dict, or None if it is unknown or expired"""
+        row = self._connect().execute(
+            'SELECT data FROM sessions WHERE sid = ? AND expires_at > ?', (sid, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, sid, data, lifetime_seconds):
+        """Store (or replace) a session's data"""
+        now = time.time()
+        self._connect().execute(
+            'INSERT OR REPLACE INTO sessions (sid, data, expires_at, updated_at) VALUES (?, ?, ?, ?)',
+            (sid, json.dumps(data), now + lifetime_seconds, now)
+        )
+
+    def delete(self, sid):
+        """Forget a session"""
+        self._connect().execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+    def delete_expired(self):
+        """Drop expired sessions, returning how many were removed"""
+        return self._connect().execute('DELETE FROM sessions WHERE expires_at <= ?', (time.time(),)).rowcount
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session dict that tracks modification and rotates its ID when cleared"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid or secrets.token_urlsafe(32)
+        self.new = new
+        self.modified = False
+        # ID to delete on save (set when the session was cleared or migrated)
+        self.replaced_sid = None
+
+    def clear(self):
+        """Drop all data and move to a fresh ID so the old cookie can't be reused"""
+        super().clear()
+        if not self.new and self.replaced_sid is None:
+            self.replaced_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+class ServerSessionInterface(SessionInterface):
+    """Flask session interface backed by a SessionStore"""
+
+    def __init__(self, store):
+        self.store = store
+        self._legacy = SecureCookieSessionInterface()
+        self._pruned_at = 0
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.load(sid)
+            if data is not None:
+                return ServerSession(data, sid=sid)
+            legacy = self._load_legacy_cookie(app, sid)
+            if legacy:
+                session = ServerSession(legacy, new=True)
+                session.modified = True
+                return session
+            # Unknown or expired ID: start over and drop the stale cookie
+            session = ServerSession(new=True)
+            session.modified = True
+            return session
+        return ServerSession(new=True)
+
+    def _load_legacy_cookie(self, app, value):
+        """Session data from an old signed session cookie, or None"""
+        serializer = self._legacy.get_signing_serializer(app)
+        if serializer is None:
+            return None
+        try:
+            return serializer.loads(value, max_age=int(app.permanent_session_lifetime.total_seconds()))
+        except Exception:
+            return None
+
+    def _prune(self):
+        """Drop expired sessions now and then"""
+        now = time.monotonic()
+        if now - self._pruned_at < PRUNE_INTERVAL_SECONDS:
+            return
+        self._pruned_at = now
+        try:
+            self.store.delete_expired()
+        except Exception as e:
+            logger.warning("Could not prune expired sessions: %s", e)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.replaced_sid:
+            self.store.delete(session.replaced_sid)
+            session.replaced_sid = None
+
+        if not session:
+            if not session.new or session.modified:
+                if not session.new:
+                    self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not session.modified:
+            return
+
+        lifetime = int(app.permanent_session_lifetime.total_seconds())
+        self.store.save(session.sid, dict(session), lifetime)
+        self._prune()
+        response.vary.add('Cookie')
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
@@ -0,0 +1,124 @@
+"""Single-flight execution of expensive fetches.
+
+Concurrent callers asking for the same key share one execution: threads in
+the same worker wait on the leader's result, and leaders in different worker
+processes serialise on a per-key lock file, re-checking the shared cache once
+they get the lock so only the first process actually hits the API.
+"""
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Non-POSIX dev machines get thread-level coalescing only
+    fcntl = None
+
+# How often a waiting process re-tries another process's lock
+LOCK_POLL_INTERVAL = 0.05
+
+class _Call:
+    """An in-flight execution that other threads can wait on"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Run at most one fetch per key at a time, sharing its result"""
+
+    def __init__(self, lock_dir, wait_timeout=120):
+        self.lock_dir = lock_dir
+        self.wait_timeout = wait_timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            'fetches': 0,               # fetches actually executed
+            'coalesced_threads': 0,     # callers served by another thread's fetch
+            'coalesced_processes': 0,   # callers served by another worker's fetch
+            'lock_timeouts': 0          # gave up waiting on another worker's lock
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        """Snapshot of the coalescing counters for this process"""
+        with self._lock:
+            return dict(self._counters)
+
+    def do(self, key, fetch, check=None):
+        """Return fetch() for key, coalescing with any fetch already running.
+
+        check() is called after waiting on another process and should return
+        that process's result from the shared cache, or None to fetch anyway.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                raise TimeoutError(f"Timed out waiting for in-flight fetch of {key}")
+            self._count('coalesced_threads')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run_exclusive(key, fetch, check)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _run_exclusive(self, key, fetch, check):
+        with self._process_lock(key) as waited:
+            if waited and check is not None:
+                result = check()
+                if result is not None:
+                    self._count('coalesced_processes')
+                    return result
+            self._count('fetches')
+            return fetch()
+
+    @contextmanager
+    def _process_lock(self, key):
+        """Hold an exclusive per-key file lock, yielding whether we had to wait for it"""
+        if fcntl is None:
+            yield False
+            return
+
+        os.makedirs(self.lock_dir, exist_ok=True)
+        safe_key = re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+        with open(os.path.join(self.lock_dir, f"{safe_key}.lock"), 'w') as lock_file:
+            waited = False
+            locked = False
+            deadline = time.monotonic() + self.wait_timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked = True
+                    break
+                except BlockingIOError:
+                    waited = True
+                    if time.monotonic() >= deadline:
+                        # Other worker is stuck; fetch without the lock rather than fail
+                        self._count('lock_timeouts')
+                        break
+                    time.sleep(LOCK_POLL_INTERVAL)
+            try:
+                yield waited
+            finally:
+                if locked:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -9,6 +9,12 @@ const REFRESH_COOLDOWN = 30000; // 30 seconds cooldown
 let refreshCount = 0;
 const MAX_REFRESHES_PER_HOUR = 10; // Max 10 refreshes per hour
 
+// Stale-cache polling: the server rebuilds stale data in the background
+const STALE_POLL_INTERVAL = 15000; // 15 seconds between polls
+const MAX_STALE_POLLS = 8;
+let stalePollTimer = null;
+let stalePollCount = 0;
+
 // Format numbers with commas
 function formatNumber(num) {
     return new Intl.NumberFormat().format(num);
@@ -271,103 +277,192 @@ async function refreshData() {
     }
 }
 
-// Load videos data
-async function loadVideos(forceRefresh = false) {
-    try {
-        // Show loading state
+// Poll again while the server is refreshing a stale dataset
+function scheduleStalePoll() {
+    if (stalePollTimer || stalePollCount >= MAX_STALE_POLLS) {
+        return;
+    }
+    stalePollTimer = setTimeout(() => {
+        stalePollTimer = null;
+        stalePollCount++;
+        loadVideos(false, true);
+    }, STALE_POLL_INTERVAL);
+}
+
+// Format seconds as "MM:SS" (matches the server's display strings)
+function formatClock(seconds) {
+    const minutes = Math.floor(seconds / 60).toString().padStart(2, '0');
+    const remainingSeconds = Math.floor(seconds % 60).toString().padStart(2, '0');
+    return `${minutes}:${remainingSeconds}`;
+}
+
+// Rebuild video objects from a columnar /api/videos payload
+function decodeColumnarVideos(table) {
+    const { strings, columns } = table;
+    const videos = new Array(table.count);
+    
+    for (let i = 0; i < table.count; i++) {
+        videos[i] = {
+            id: strings[columns.id[i]],
+            title: strings[columns.title[i]],
+            thumbnail: strings[columns.thumbnail[i]],
+            publishedAt: strings[columns.publishedAt[i]],
+            views: columns.views[i],
+            likes: columns.likes[i],
+            length: formatClock(columns.lengthSeconds[i]),
+            lengthSeconds: columns.lengthSeconds[i],
+            watchTime: formatClock(columns.watchTimeSeconds[i]),
+            watchTimeSeconds: columns.watchTimeSeconds[i],
+            percentWatched: columns.percentWatched[i],
+            subsGained: columns.subsGained[i]
+        };
+        if (columns.channelId) {
+            videos[i].channelId = strings[columns.channelId[i]];
+        }
+    }
+    return videos;
+}
+
+// Render a /api/videos payload (JSON response or the stream's done event)
+function renderVideosPayload(data) {
+    if (data.authenticated) {
+        // Degraded with nothing saved to fall back on
+        if (data.degraded && !(data.videos && data.videos.length)) {
+            document.getElementById('videos-table').innerHTML = `
+                <tr>
+                    <td colspan="8" class="px-6 py-4 text-center text-red-500">
+                        YouTube data is temporarily unavailable. Please try again later.
+                    </td>
+                </tr>
+            `;
+            return;
+        }
+        
+        // User is authenticated - handle video data
+        if (data.videos && data.last_updated) {
+            videosData = data.videos;
+            prepareSortKeys(videosData);
+            sortVideos(currentSort.column, currentSort.direction);
+            totalVideosFetched = data.total_videos_fetched || data.videos.length;
+            totalVideosAvailable = data.total_videos_available || data.videos.length;
+            
+            // Last updated timestamp removed - now showing static API delay message
+            
+            // Update video count indicator
+            updateVideoCount();
+            
+            // Show cache status if available
+            if (data.cached) {
+                console.log('📦 Loaded from cache - fast response!');
+            } else {
+                console.log('🔄 Fresh data loaded from YouTube APIs');
+            }
+            
+            // YouTube quota is exhausted (or the fetch failed) - this is the last saved data
+            if (data.degraded) {
+                showToast('YouTube API quota reached - showing your last saved data', 'warning');
+            }
+            
+            // Stale data is being rebuilt on the server - pick it up on a later poll
+            if (data.stale && !data.degraded) {
+                scheduleStalePoll();
+            } else {
+                stalePollCount = 0;
+            }
+            
+            // Check if there are no videos
+            if (data.videos.length === 0) {
+                document.getElementById('videos-table').innerHTML = `
+                    <tr>
+                        <td colspan="8" class="px-6 py-12 text-center">
+                            <div class="flex flex-col items-center space-y-6">
+                                <div class="w-16 h-16 bg-gray-100 rounded-full flex items-center justify-center">
+                                    <i class="fas fa-video-slash text-gray-400 text-2xl"></i>
+                                </div>
+                                <div class="text-center">
+                                    <h3 class="text-lg font-medium text-gray-900 mb-2">No public videos found</h3>
+                                    <p class="text-gray-500 mb-6">This channel doesn't have any publicly published videos, or all videos are private/unlisted.</p>
+                                    <button onclick="refreshData()" class="inline-flex items-center px-6 py-3 bg-blue-600 text-white font-medium rounded-lg hover:bg-blue-700 transition-colors">
+                                        <i class="fas fa-sync-alt mr-2"></i>
+                                        Try Again
+                                    </button>
+                                </div>
+                            </div>
+                        </td>
+                    </tr>
+                `;
+            } else {
+                updateTable();
+            }
+        } else {
+            // Fallback for old data structure
+            videosData = data;
+            prepareSortKeys(videosData);
+            totalVideosFetched = data.length;
+            totalVideosAvailable = data.length;
+            updateTable();
+        }
+    } else {
+        // User is not authenticated - show sign in placeholder
         document.getElementById('videos-table').innerHTML = `
             <tr>
-                <td colspan="8" class="px-6 py-8 text-center">
-                    <div class="flex flex-col items-center justify-center space-y-2">
-                        <div class="flex items-center space-x-2">
-                            <div class="animate-spin rounded-full h-6 w-6 border-b-2 border-blue-600"></div>
-                            <span class="text-gray-600">Loading videos...</span>
+                <td colspan="8" class="px-6 py-12 text-center">
+                    <div class="flex flex-col items-center space-y-6">
+                        <div class="w-16 h-16 bg-blue-100 rounded-full flex items-center justify-center">
+                            <i class="fas fa-chart-line text-blue-600 text-2xl"></i>
+                        </div>
+                        <div class="text-center">
+                            <h3 class="text-lg font-medium text-gray-900 mb-2">Sign in to view your YouTube analytics</h3>
+                            <p class="text-gray-500 mb-6">Connect your Google account to see detailed metrics for your videos</p>
+                            <a href="/auth/google" class="inline-flex items-center px-6 py-3 bg-blue-600 text-white font-medium rounded-lg hover:bg-blue-700 transition-colors" onclick="console.log('Sign In clicked in table'); return true;">
+                                <i class="fab fa-google mr-2"></i>
+                                Sign in with Google
+                            </a>
                         </div>
-                        <div class="text-sm text-gray-500">Retrieving up to 50 videos</div>
                     </div>
                 </td>
             </tr>
         `;
         
-        const url = `/api/videos?sort_by=${currentSort.column}&sort_direction=${currentSort.direction}&refresh=${forceRefresh}`;
-        const response = await fetch(url);
-        const data = await response.json();
-        
-        if (data.authenticated) {
-            // User is authenticated - handle video data
-            if (data.videos && data.last_updated) {
-                videosData = data.videos;
-                totalVideosFetched = data.total_videos_fetched || data.videos.length;
-                totalVideosAvailable = data.total_videos_available || data.videos.length;
-                
-                // Last updated timestamp removed - now showing static API delay message
-                
-                // Update video count indicator
-                updateVideoCount();
-                
-                // Show cache status if available
-                if (data.cached) {
-                    console.log('📦 Loaded from cache - fast response!');
-                } else {
-                    console.log('🔄 Fresh data loaded from YouTube APIs');
-                }
-                
-                // Check if there are no videos
-                if (data.videos.length === 0) {
-                    document.getElementById('videos-table').innerHTML = `
-                        <tr>
-                            <td colspan="8" class="px-6 py-12 text-center">
-                                <div class="flex flex-col items-center space-y-6">
-                                    <div class="w-16 h-16 bg-gray-100 rounded-full flex items-center justify-center">
-                                        <i class="fas fa-video-slash text-gray-400 text-2xl"></i>
-                                    </div>
-                                    <div class="text-center">
-                                        <h3 class="text-lg font-medium text-gray-900 mb-2">No public videos found</h3>
-                                        <p class="text-gray-500 mb-6">This channel doesn't have any publicly published videos, or all videos are private/unlisted.</p>
-                                        <button onclick="refreshData()" class="inline-flex items-center px-6 py-3 bg-blue-600 text-white font-medium rounded-lg hover:bg-blue-700 transition-colors">
-                                            <i class="fas fa-sync-alt mr-2"></i>
-                                            Try Again
-                                        </button>
-                                    </div>
-                                </div>
-                            </td>
-                        </tr>
-                    `;
-                } else {
-                    updateTable();
-                }
-            } else {
-                // Fallback for old data structure
-                videosData = data;
-                totalVideosFetched = data.length;
-                totalVideosAvailable = data.length;
-                updateTable();
-            }
-        } else {
-            // User is not authenticated - show sign in placeholder
+        // Update video count to show sign in message
+        updateVideoCount();
+    }
+}
+
+// Load videos data
+async function loadVideos(forceRefresh = false, silent = false) {
+    try {
+        // Show loading state (background polls keep the current table)
+        if (!silent) {
             document.getElementById('videos-table').innerHTML = `
                 <tr>
-                    <td colspan="8" class="px-6 py-12 text-center">
-                        <div class="flex flex-col items-center space-y-6">
-                            <div class="w-16 h-16 bg-blue-100 rounded-full flex items-center justify-center">
-                                <i class="fas fa-chart-line text-blue-600 text-2xl"></i>
-                            </div>
-                            <div class="text-center">
-                                <h3 class="text-lg font-medium text-gray-900 mb-2">Sign in to view your YouTube analytics</h3>
-                                <p class="text-gray-500 mb-6">Connect your Google account to see detailed metrics for your videos</p>
-                                <a href="/auth/google" class="inline-flex items-center px-6 py-3 bg-blue-600 text-white font-medium rounded-lg hover:bg-blue-700 transition-colors" onclick="console.log('Sign In clicked in table'); return true;">
-                                    <i class="fab fa-google mr-2"></i>
-                                    Sign in with Google
-                                </a>
+                    <td colspan="8" class="px-6 py-8 text-center">
+                        <div class="flex flex-col items-center justify-center space-y-2">
+                            <div class="flex items-center space-x-2">
+                                <div class="animate-spin rounded-full h-6 w-6 border-b-2 border-blue-600"></div>
+                                <span class="text-gray-600">Loading videos...</span>
                             </div>
+                            <div class="text-sm text-gray-500">Retrieving all uploads from your channel</div>
                         </div>
                     </td>
                 </tr>
             `;
-            
-            // Update video count to show sign in message
-            updateVideoCount();
         }
+        
+        // Foreground loads stream rows in as they arrive; polls use the compact JSON format
+        if (!silent && window.EventSource) {
+            return await streamVideos(forceRefresh);
+        }
+        
+        const url = `/api/videos?sort_by=${currentSort.column}&sort_direction=${currentSort.direction}&refresh=${forceRefresh}&format=columnar`;
+        const response = await fetch(url);
+        const data = await response.json();
+        
+        if (data.format === 'columnar') {
+            data.videos = decodeColumnarVideos(data.videos);
+        }
+        
+        renderVideosPayload(data);
     } catch (error) {
         console.error('Error loading videos:', error);
         
@@ -381,6 +476,73 @@ async function loadVideos(forceRefresh = false) {
     }
 }
 
+// Stream a load from /api/videos/stream, rendering rows as metadata and metrics arrive
+function streamVideos(forceRefresh) {
+    return new Promise(resolve => {
+        const source = new EventSource(`/api/videos/stream?refresh=${forceRefresh}`);
+        const rowsById = new Map();
+        let renderFrame = null;
+        let finished = false;
+        
+        const finish = () => {
+            finished = true;
+            source.close();
+            if (renderFrame !== null) {
+                cancelAnimationFrame(renderFrame);
+                renderFrame = null;
+            }
+        };
+        
+        // Merge streamed rows by video ID and re-render at most once per frame
+        const mergeRows = event => {
+            JSON.parse(event.data).videos.forEach(row => rowsById.set(row.id, row));
+            if (renderFrame === null) {
+                renderFrame = requestAnimationFrame(() => {
+                    renderFrame = null;
+                    videosData = Array.from(rowsById.values());
+                    prepareSortKeys(videosData);
+                    sortVideos(currentSort.column, currentSort.direction);
+                    totalVideosFetched = videosData.length;
+                    totalVideosAvailable = videosData.length;
+                    updateVideoCount();
+                    updateTable();
+                });
+            }
+        };
+        
+        source.addEventListener('videos', mergeRows);
+        source.addEventListener('metrics', mergeRows);
+        
+        source.addEventListener('done', event => {
+            finish();
+            renderVideosPayload(JSON.parse(event.data));
+            resolve();
+        });
+        
+        source.addEventListener('failed', event => {
+            finish();
+            console.error('Streamed load failed:', JSON.parse(event.data).error);
+            document.getElementById('videos-table').innerHTML = `
+                <tr>
+                    <td colspan="8" class="px-6 py-4 text-center text-red-500">
+                        Error loading videos. Please try again.
+                    </td>
+                </tr>
+            `;
+            resolve();
+        });
+        
+        // Stream unavailable (or dropped): fall back to the regular endpoint
+        source.onerror = () => {
+            if (finished) {
+                return;
+            }
+            finish();
+            resolve(loadVideos(forceRefresh, true));
+        };
+    });
+}
+
 // Update video count indicator
 function updateVideoCount() {
     const countElement = document.getElementById('video-count');
@@ -428,53 +590,39 @@ function updateRefreshButtonStatus() {
     }
 }
 
+// Parse "MM:SS" into seconds (for data cached before numeric columns existed)
+function parseDurationLabel(label) {
+    const parts = label.split(':');
+    return parseInt(parts[0]) * 60 + parseInt(parts[1]);
+}
+
+// Pre-parse sortable columns once per load so header clicks only compare plain values
+function prepareSortKeys(videos) {
+    videos.forEach(video => {
+        video.sortKeys = {
+            title: video.title.toLowerCase(),
+            published: Date.parse(video.publishedAt),
+            views: video.views,
+            likes: video.likes,
+            length: video.lengthSeconds ?? parseDurationLabel(video.length),
+            watchTime: video.watchTimeSeconds ?? parseDurationLabel(video.watchTime),
+            watched: video.percentWatched,
+            subs: video.subsGained
+        };
+    });
+}
+
 // Sort videos function
 function sortVideos(column, direction) {
+    const sign = direction === 'asc' ? 1 : -1;
+    
     videosData.sort((a, b) => {
-        let aVal, bVal;
-        
-        switch(column) {
-            case 'title':
-                aVal = a.title.toLowerCase();
-                bVal = b.title.toLowerCase();
-                break;
-            case 'published':
-                aVal = new Date(a.publishedAt);
-                bVal = new Date(b.publishedAt);
-                break;
-            case 'views':
-                aVal = a.views;
-                bVal = b.views;
-                break;
-            case 'likes':
-                aVal = a.likes;
-                bVal = b.likes;
-                break;
-            case 'length':
-                aVal = parseInt(a.length.split(':')[0]) * 60 + parseInt(a.length.split(':')[1]);
-                bVal = parseInt(b.length.split(':')[0]) * 60 + parseInt(b.length.split(':')[1]);
-                break;
-            case 'watchTime':
-                aVal = parseInt(a.watchTime.split(':')[0]) * 60 + parseInt(a.watchTime.split(':')[1]);
-                bVal = parseInt(b.watchTime.split(':')[0]) * 60 + parseInt(b.watchTime.split(':')[1]);
-                break;
-            case 'watched':
-                aVal = a.percentWatched;
-                bVal = b.percentWatched;
-                break;
-            case 'subs':
-                aVal = a.subsGained;
-                bVal = b.subsGained;
-                break;
-            default:
-                return 0;
-        }
+        const aVal = a.sortKeys[column];
+        const bVal = b.sortKeys[column];
         
-        if (direction === 'asc') {
-            return aVal > bVal ? 1 : -1;
-        } else {
-            return aVal < bVal ? 1 : -1;
-        }
+        if (aVal < bVal) return -sign;
+        if (aVal > bVal) return sign;
+        return 0;
     });
 }
 
@@ -491,8 +639,11 @@ function sortTable(column) {
     // Update sort icons
     updateSortIcons(column, currentSort.direction);
     
-    // Load videos with new sort
-    loadVideos();
+    // Re-sort the data we already have - no server round trip
+    if (videosData.length) {
+        sortVideos(currentSort.column, currentSort.direction);
+        updateTable();
+    }
 }
 
 
@@ -511,11 +662,125 @@ function updateSortIcons(activeColumn, direction) {
     });
 }
 
+// Windowed table rendering: only rows in view (plus overscan) exist in the DOM
+const ROW_OVERSCAN = 10;
+let rowHeight = 73; // re-measured from the first rendered row
+let rowPool = []; // reusable <tr> nodes, filled in place on scroll and sort
+let topSpacer = null;
+let bottomSpacer = null;
+let renderedRange = { start: -1, end: -1 };
+let scrollFrame = null;
+
+// Create a spacer row that stands in for the rows outside the window
+function createSpacerRow() {
+    const row = document.createElement('tr');
+    row.innerHTML = '<td colspan="8" style="padding: 0;"></td>';
+    return row;
+}
+
+// Create an empty video row; fillVideoRow sets its contents
+function createVideoRow() {
+    const row = document.createElement('tr');
+    row.className = 'hover:bg-gray-50';
+    row.innerHTML = `
+        <td class="px-6 py-4">
+            <div class="flex items-start">
+                <img class="h-10 w-16 object-cover rounded flex-shrink-0" loading="lazy" decoding="async">
+                <div class="ml-4 min-w-0 flex-1">
+                    <div class="text-sm font-medium text-gray-900 leading-tight line-clamp-2"></div>
+                </div>
+            </div>
+        </td>
+        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900"></td>
+        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900"></td>
+        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900"></td>
+        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900"></td>
+        <td class="px-6 py-4 whitespace-nowrap text-sm"></td>
+        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900"></td>
+        <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900"></td>
+    `;
+    row.thumbnail = row.querySelector('img');
+    row.titleText = row.querySelector('.line-clamp-2');
+    return row;
+}
+
+// Point a pooled row at a video
+function fillVideoRow(row, video) {
+    if (row.videoId === video.id) {
+        return;
+    }
+    row.videoId = video.id;
+    
+    row.thumbnail.src = video.thumbnail;
+    row.thumbnail.alt = video.title;
+    row.titleText.textContent = video.title;
+    
+    const cells = row.cells;
+    cells[1].textContent = formatNumber(video.views);
+    cells[2].textContent = formatNumber(video.likes);
+    cells[3].textContent = video.length;
+    cells[4].textContent = video.watchTime;
+    cells[5].textContent = `${video.percentWatched}%`;
+    cells[5].className = `px-6 py-4 whitespace-nowrap text-sm ${getWatchPercentageColor(video.percentWatched, video.length)}`;
+    cells[6].textContent = formatNumber(video.subsGained);
+    cells[7].textContent = formatDate(video.publishedAt);
+}
+
+// Render the rows that intersect the scroll viewport
+function renderVisibleRows(force = false) {
+    const container = document.getElementById('videos-scroll');
+    const tbody = document.getElementById('videos-table');
+    
+    const scrollTop = Math.max(0, container.scrollTop - tbody.offsetTop);
+    const start = Math.max(0, Math.floor(scrollTop / rowHeight) - ROW_OVERSCAN);
+    const end = Math.min(videosData.length, Math.ceil((scrollTop + container.clientHeight) / rowHeight) + ROW_OVERSCAN);
+    
+    if (!force && start === renderedRange.start && end === renderedRange.end) {
+        return;
+    }
+    renderedRange = { start, end };
+    
+    // Grow or shrink the pool to the window size, keeping existing nodes
+    const count = end - start;
+    while (rowPool.length < count) {
+        const row = createVideoRow();
+        rowPool.push(row);
+        tbody.insertBefore(row, bottomSpacer);
+    }
+    while (rowPool.length > count) {
+        rowPool.pop().remove();
+    }
+    
+    for (let i = 0; i < count; i++) {
+        fillVideoRow(rowPool[i], videosData[start + i]);
+    }
+    
+    const topHeight = start * rowHeight;
+    const bottomHeight = (videosData.length - end) * rowHeight;
+    topSpacer.style.display = topHeight ? '' : 'none';
+    topSpacer.firstChild.style.height = `${topHeight}px`;
+    bottomSpacer.style.display = bottomHeight ? '' : 'none';
+    bottomSpacer.firstChild.style.height = `${bottomHeight}px`;
+}
+
+// Re-render on scroll, at most once per animation frame
+function onTableScroll() {
+    if (scrollFrame === null) {
+        scrollFrame = requestAnimationFrame(() => {
+            scrollFrame = null;
+            if (videosData.length && topSpacer && topSpacer.isConnected) {
+                renderVisibleRows();
+            }
+        });
+    }
+}
+
 // Update videos table
 function updateTable() {
     const tbody = document.getElementById('videos-table');
     
     if (!videosData.length) {
+        rowPool = [];
         tbody.innerHTML = `
             <tr>
                 <td colspan="8" class="px-6 py-4 text-center text-gray-500">
@@ -526,30 +791,32 @@ function updateTable() {
         return;
     }
     
-    // Display all videos
-    tbody.innerHTML = videosData.map(video => `
-        <tr class="hover:bg-gray-50">
-            <td class="px-6 py-4">
-                <div class="flex items-start">
-                    <img class="h-10 w-16 object-cover rounded flex-shrink-0" src="${video.thumbnail}" alt="${video.title}">
-                    <div class="ml-4 min-w-0 flex-1">
-                        <div class="text-sm font-medium text-gray-900 leading-tight line-clamp-2">${video.title}</div>
-                    </div>
-                </div>
-            </td>
-            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900">${formatNumber(video.views)}</td>
-            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900">${formatNumber(video.likes)}</td>
-            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900">${video.length}</td>
-            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900">${video.watchTime}</td>
-            <td class="px-6 py-4 whitespace-nowrap text-sm ${getWatchPercentageColor(video.percentWatched, video.length)}">${video.percentWatched}%</td>
-            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900">${formatNumber(video.subsGained)}</td>
-            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900">${formatDate(video.publishedAt)}</td>
-        </tr>
-    `).join('');
+    // The tbody may have been replaced by a loading or error message
+    if (!topSpacer || !topSpacer.isConnected) {
+        topSpacer = createSpacerRow();
+        bottomSpacer = createSpacerRow();
+        rowPool = [];
+        tbody.replaceChildren(topSpacer, bottomSpacer);
+    }
+    
+    // Rows keep their DOM nodes but may now show different videos
+    rowPool.forEach(row => { row.videoId = null; });
+    renderVisibleRows(true);
+    
+    // Rows are fixed-layout, so one measurement sizes the spacers
+    const measured = rowPool.length ? rowPool[0].offsetHeight : 0;
+    if (measured && measured !== rowHeight) {
+        rowHeight = measured;
+        renderVisibleRows(true);
+    }
 }
 
 // Initialize dashboard
 document.addEventListener('DOMContentLoaded', async function() {
+    // Windowed table rendering follows the table's own scroll container
+    document.getElementById('videos-scroll').addEventListener('scroll', onTableScroll, { passive: true });
+    window.addEventListener('resize', onTableScroll);
+    
     // Initialize refresh button status timer
     updateRefreshButtonStatus();
     setInterval(updateRefreshButtonStatus, 1000); // Update every second
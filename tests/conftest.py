@@ -0,0 +1,25 @@
+"""Shared test setup: the app's modules live at the repository root."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """The app module, with every store in a scratch directory (imported once per run)"""
+    work_dir = str(tmp_path_factory.mktemp('app'))
+    os.environ.update({
+        'CACHE_DB_PATH': os.path.join(work_dir, 'cache.db'),
+        'METRICS_DB_PATH': os.path.join(work_dir, 'metrics.db'),
+        'CREDENTIALS_DB_PATH': os.path.join(work_dir, 'credentials.db'),
+        'QUOTA_DB_PATH': os.path.join(work_dir, 'quota.db'),
+        'SESSION_DB_PATH': os.path.join(work_dir, 'sessions.db'),
+        'VIDEO_RESOURCES_DB_PATH': os.path.join(work_dir, 'resources.db'),
+        'FETCH_LOCK_DIR': os.path.join(work_dir, 'locks'),
+        'PREWARM_ENABLED': '0',
+        'LOG_LEVEL': 'WARNING'
+    })
+    import app
+    return app
@@ -0,0 +1,126 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+class FakeEngine:
+    """fetch_metrics() that reports one view per day in the window.
+
+    Settle queries for `failing` IDs fail, and late-window queries for `failing_late` IDs.
+    """
+
+    def __init__(self, failing=(), failing_late=()):
+        self.failing = set(failing)
+        self.failing_late = set(failing_late)
+        self.calls = []
+
+    def fetch_metrics(self, video_ids, start_date, end_date, on_chunk=None):
+        self.calls.append((list(video_ids), start_date, end_date))
+        days = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1
+        settling = end_date != date.today().isoformat()
+        failing = self.failing if settling else self.failing_late
+        failed = {video_id for video_id in video_ids if video_id in failing}
+        metrics = {
+            video_id: {'views': days, 'likes': 0, 'averageViewDuration': 0, 'subscribersGained': 0}
+            for video_id in video_ids if video_id not in failed
+        }
+        return metrics, failed
+
+def test_failed_settle_does_not_lose_days(app_module, monkeypatch):
+    start = date.today() - timedelta(days=59)
+    monkeypatch.setitem(app_module.app.config, 'METRICS_START_DATE', start.isoformat())
+    lifetime_days = (date.today() - start).days + 1
+
+    first, incomplete = app_module.get_video_metrics_incremental(FakeEngine(), 'UCsettle', ['a', 'b'])
+    assert incomplete == set()
+    assert first['a']['views'] == first['b']['views'] == lifetime_days
+
+    # Pretend the last refresh was 10 days ago, so the settle window moves forward
+    old_cutoff = date.today() - timedelta(days=app_module.app.config['METRICS_LATE_DATA_DAYS'] + 10)
+    stored = app_module.metrics_store.load_totals('UCsettle')
+    for video_id, (_, totals) in stored.items():
+        totals['views'] = (old_cutoff - start).days + 1
+        app_module.metrics_store.save_totals('UCsettle', old_cutoff.isoformat(), {video_id: totals})
+
+    engine = FakeEngine(failing={'b'})
+    second, _ = app_module.get_video_metrics_incremental(engine, 'UCsettle', ['a', 'b'])
+    assert second['a']['views'] == lifetime_days
+    assert second['b']['views'] == lifetime_days
+    # b's late window starts right after its own (old) cut-off
+    assert (['b'], (old_cutoff + timedelta(days=1)).isoformat(), date.today().isoformat()) in engine.calls
+
+def test_failed_late_window_is_reported(app_module, monkeypatch):
+    start = date.today() - timedelta(days=59)
+    monkeypatch.setitem(app_module.app.config, 'METRICS_START_DATE', start.isoformat())
+
+    metrics, incomplete = app_module.get_video_metrics_incremental(
+        FakeEngine(failing_late={'b'}), 'UClate', ['a', 'b']
+    )
+    assert incomplete == {'b'}
+    assert metrics['b']['views'] < metrics['a']['views']
+
+def test_partial_datasets_go_stale_sooner(app_module):
+    cache_time = (datetime.now() - timedelta(seconds=app_module.app.config['PARTIAL_CACHE_TTL_SECONDS'] + 1)).isoformat()
+    assert not app_module.is_cache_stale({'cache_time': cache_time})
+    assert app_module.is_cache_stale({'cache_time': cache_time, 'partial': True})
+
+def test_videos_query_defaults(app_module):
+    assert app_module.parse_videos_query({}) == {
+        'sort_by': 'published', 'sort_direction': 'desc', 'offset': 0, 'limit': None, 'filters': {}
+    }
+
+def test_videos_query_rejects_bad_values(app_module):
+    for args in ({'limit': '0'}, {'limit': '-5'}, {'sort_direction': 'up'}, {'offset': 'x'}, {'min_views': 'x'},
+                 {'sort_by': 'nope'}):
+        with pytest.raises(ValueError):
+            app_module.parse_videos_query(args)
+
+def test_videos_query_resolves_sort_aliases(app_module):
+    assert app_module.parse_videos_query({'sort_by': 'subsGained'})['sort_by'] == 'subs'
+
+def test_videos_query_clamps_negative_offsets(app_module):
+    assert app_module.parse_videos_query({'offset': '-3', 'limit': '1'})['offset'] == 0
+
+def test_timing_out_on_another_fetch_is_a_fetch_error(app_module, monkeypatch):
+    def timed_out(key, fetch, check=None):
+        raise TimeoutError(f"Timed out waiting for in-flight fetch of {key}")
+    monkeypatch.setattr(app_module.video_fetches, 'do', timed_out)
+    with pytest.raises(app_module.FetchError) as error:
+        app_module.coalesced_fetch('UC1', lambda: None)
+    assert error.value.stage == 'wait'
+
+class FakePlaylist:
+    """youtube.playlistItems() stand-in serving fixed pages"""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def playlistItems(self):
+        return self
+
+    def list(self, pageToken=None, **params):
+        index = int(pageToken or 0)
+        page = {'items': [{'contentDetails': {'videoId': video_id}} for video_id in self.pages[index]]}
+        if index + 1 < len(self.pages):
+            page['nextPageToken'] = str(index + 1)
+        self.response = page
+        return self
+
+    def execute(self):
+        return self.response
+
+def walk(app_module, pages, max_videos):
+    return [video_id for ids, _ in app_module.iter_upload_pages(FakePlaylist(pages), 'UU1', max_videos) for video_id in ids]
+
+def test_video_ceiling_warning_only_when_videos_are_cut_off(app_module, caplog):
+    with caplog.at_level('WARNING', logger='fetch_engine'):
+        assert walk(app_module, [['a', 'b'], ['c']], max_videos=3) == ['a', 'b', 'c']
+    assert 'video ceiling' not in caplog.text
+
+    with caplog.at_level('WARNING', logger='fetch_engine'):
+        assert walk(app_module, [['a', 'b'], ['c', 'd']], max_videos=3) == ['a', 'b', 'c']
+    assert 'video ceiling' in caplog.text
+
+    caplog.clear()
+    with caplog.at_level('WARNING', logger='fetch_engine'):
+        assert walk(app_module, [['a', 'b'], ['c']], max_videos=2) == ['a', 'b']
+    assert 'video ceiling' in caplog.text
@@ -0,0 +1,36 @@
+from cache import MemoryCache
+from wire import EncodedResponses, encode_body
+
+def sized(max_bytes, max_entries=100):
+    return MemoryCache(max_entries, max_bytes, lambda key, value: len(value))
+
+def test_least_recently_used_entries_go_past_the_byte_budget():
+    memory = sized(10)
+    memory.set('a', 'x' * 4, 60)
+    memory.set('b', 'x' * 4, 60)
+    memory.get('a')
+    memory.set('c', 'x' * 4, 60)
+    assert (memory.get('a'), memory.get('b'), memory.get('c')) == ('xxxx', None, 'xxxx')
+    assert memory.total_bytes == 8
+
+def test_replacing_and_deleting_entries_frees_their_bytes():
+    memory = sized(10)
+    memory.set('a', 'x' * 8, 60)
+    memory.set('a', 'x' * 2, 60)
+    assert memory.total_bytes == 2
+    memory.delete('a')
+    assert memory.total_bytes == 0
+
+def test_an_entry_larger_than_the_budget_is_not_kept():
+    memory = sized(10)
+    memory.set('a', 'x' * 4, 60)
+    memory.set('b', 'x' * 11, 60)
+    assert (memory.get('a'), memory.get('b')) == ('xxxx', None)
+
+def test_response_memo_is_bounded_by_bytes():
+    body = encode_body({'videos': ['x' * 1000]})
+    memo = EncodedResponses(max_entries=1000, ttl=60, max_bytes=10 * EncodedResponses.size_of('k00', body))
+    for i in range(50):
+        memo.get_or_encode(f"k{i:02d}", lambda: {'videos': ['x' * 1000]})
+    assert memo.memory.total_bytes <= memo.memory.max_bytes
+    assert len(memo.memory._entries) == 10
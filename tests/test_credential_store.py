@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from credential_store import CredentialStore
+
+CHANNEL = {'id': 'UC1', 'uploads_playlist_id': 'UU1'}
+
+@pytest.fixture
+def store(tmp_path):
+    return CredentialStore(str(tmp_path / 'credentials.db'))
+
+def channel_ids(store):
+    return [channel['id'] for channel, _ in store.active_channels(0)]
+
+def channel_credentials(store):
+    return [credentials for _, credentials in store.active_channels(0)]
+
+def test_channel_stays_until_its_last_session_releases_it(store):
+    store.save(CHANNEL, {'token': 'a'}, 'session-a')
+    store.save(CHANNEL, {'token': 'b'}, 'session-b')
+
+    assert store.release('UC1', 'session-a') is False
+    assert channel_ids(store) == ['UC1']
+    assert store.release('UC1', 'session-b') is True
+    assert channel_ids(store) == []
+
+def test_channels_saved_without_references_are_released_right_away(store):
+    store.save(CHANNEL, {'token': 'a'})
+    assert store.release('UC1', 'session-a') is True
+
+def test_deleting_a_sign_in_drops_its_references(store):
+    first = store.add_user({'token': 'a'}, None)
+    second = store.add_user({'token': 'b'}, None)
+    store.save(CHANNEL, {'token': 'a'}, first)
+    store.save(CHANNEL, {'token': 'b'}, second)
+
+    store.delete_user(first)
+    assert store.release('UC1', second) is True
+
+def test_deleting_the_last_sign_in_deletes_its_channels(store):
+    user = store.add_user({'token': 'a'}, None)
+    store.save(CHANNEL, {'token': 'a'}, user)
+    store.save({'id': 'UC2', 'uploads_playlist_id': 'UU2'}, {'token': 'legacy'})
+
+    store.delete_user(user)
+    # Channels saved without references are left to release()
+    assert channel_ids(store) == ['UC2']
+
+def test_released_channel_switches_to_a_remaining_sign_in(store):
+    first = store.add_user({'token': 'a'}, None)
+    second = store.add_user({'token': 'b'}, None)
+    store.save(CHANNEL, {'token': 'a'}, first)
+    store.save(CHANNEL, {'token': 'b'}, second)
+
+    assert store.release('UC1', second) is False
+    assert channel_credentials(store) == [{'token': 'a'}]
+
+def test_logged_out_sign_in_hands_its_channels_over(store):
+    first = store.add_user({'token': 'a'}, None)
+    second = store.add_user({'token': 'b'}, None)
+    store.save(CHANNEL, {'token': 'a'}, first)
+    store.save(CHANNEL, {'token': 'b'}, second)
+
+    store.delete_user(second)
+    assert channel_credentials(store) == [{'token': 'a'}]
+
+def test_sweeping_unused_sign_ins_drops_their_references(store):
+    stale = store.add_user({'token': 'a'}, None)
+    active = store.add_user({'token': 'b'}, None)
+    store.save(CHANNEL, {'token': 'a'}, stale)
+    store.save(CHANNEL, {'token': 'b'}, active)
+    store._connect().execute('UPDATE user_credentials SET last_used_at = 0 WHERE credentials_id = ?', (stale,))
+
+    assert store.delete_unused_users(time.time() - 60) == 1
+    assert store.release('UC1', active) is True
+
+def test_sweeping_the_last_sign_in_deletes_its_channels(store):
+    stale = store.add_user({'token': 'a'}, None)
+    store.save(CHANNEL, {'token': 'a'}, stale)
+    store._connect().execute('UPDATE user_credentials SET last_used_at = 0')
+
+    assert store.delete_unused_users(time.time() - 60) == 1
+    assert channel_ids(store) == []
@@ -0,0 +1,132 @@
+from fetch_engine import (
+    ANALYTICS_FILTER_MAX_CHARS, NOT_MODIFIED, BatchAligner, VideoRevalidator,
+    cap_playlist_page, chunk_video_ids_for_filter, metrics_query_params
+)
+from resource_store import batch_key
+
+def video_ids(count, length=11):
+    return [f"{i:0{length}d}" for i in range(count)]
+
+def test_chunks_stay_under_the_filter_cap():
+    ids = video_ids(500)
+    chunks = chunk_video_ids_for_filter(ids)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(metrics_query_params(chunk, '2024-01-01', '2024-01-31')['filters']) <= ANALYTICS_FILTER_MAX_CHARS
+
+def test_chunks_keep_every_id_in_order():
+    ids = video_ids(500)
+    assert [video_id for chunk in chunk_video_ids_for_filter(ids) for video_id in chunk] == ids
+
+def test_chunks_are_filled_up_to_the_cap():
+    # 'video==' + 10 IDs of 11 chars + 9 commas = 126 chars
+    chunks = chunk_video_ids_for_filter(video_ids(20), max_chars=126)
+    assert [len(chunk) for chunk in chunks] == [10, 10]
+    chunks = chunk_video_ids_for_filter(video_ids(20), max_chars=125)
+    assert [len(chunk) for chunk in chunks] == [9, 9, 2]
+
+def test_no_ids_no_chunks():
+    assert chunk_video_ids_for_filter([]) == []
+
+def test_an_id_longer_than_the_cap_gets_its_own_chunk():
+    assert chunk_video_ids_for_filter(['a' * 20, 'b'], max_chars=10) == [['a' * 20], ['b']]
+
+def test_pages_below_the_ceiling_are_kept_whole(caplog):
+    assert cap_playlist_page(['a', 'b'], 0, 3, 'next') == (['a', 'b'], False)
+    assert cap_playlist_page(['a', 'b'], 0, None, 'next') == (['a', 'b'], False)
+    assert 'video ceiling' not in caplog.text
+
+def test_ceiling_warns_only_when_videos_are_left_out(caplog):
+    with caplog.at_level('WARNING', logger='fetch_engine'):
+        assert cap_playlist_page(['c'], 2, 3, None) == (['c'], True)
+    assert 'video ceiling' not in caplog.text
+
+    with caplog.at_level('WARNING', logger='fetch_engine'):
+        assert cap_playlist_page(['c', 'd'], 2, 3, None) == (['c'], True)
+    assert 'video ceiling' in caplog.text
+
+    caplog.clear()
+    with caplog.at_level('WARNING', logger='fetch_engine'):
+        assert cap_playlist_page(['c'], 2, 3, 'next') == (['c'], True)
+    assert 'video ceiling' in caplog.text
+
+def aligned_batches(ids, total, page_size=50):
+    aligner = BatchAligner()
+    batches = []
+    for start in range(0, len(ids), page_size):
+        batches.extend(aligner.add(ids[start:start + page_size], total))
+    return batches + aligner.flush()
+
+def test_batches_are_aligned_to_the_oldest_upload():
+    ids = video_ids(120)
+    batches = aligned_batches(ids, total=120)
+    assert [len(batch) for batch in batches] == [20, 50, 50]
+    assert [video_id for batch in batches for video_id in batch] == ids
+
+def test_new_uploads_only_change_the_newest_batch():
+    ids = video_ids(120)
+    before = aligned_batches(ids, total=120)
+    after = aligned_batches(['new'] + ids, total=121)
+    assert after[0] == ['new'] + before[0]
+    assert after[1:] == before[1:]
+
+def test_single_partial_batch():
+    assert aligned_batches(video_ids(7), total=7) == [video_ids(7)]
+    assert aligned_batches([], total=0) == []
+
+def resource(video_id, etag, title='Title', duration='PT1M5S'):
+    return {
+        'id': video_id,
+        'etag': etag,
+        'snippet': {
+            'title': title,
+            'publishedAt': '2024-05-01T10:00:00Z',
+            'thumbnails': {'medium': {'url': f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg"}}
+        },
+        'contentDetails': {'duration': duration},
+        'status': {'privacyStatus': 'public'}
+    }
+
+def stored_revalidator(batch):
+    """A revalidator holding what a previous refresh saw for one batch"""
+    first = VideoRevalidator()
+    first.records_for(batch, {'etag': 'list-1', 'items': [resource(video_id, f"e-{video_id}") for video_id in batch]})
+    return VideoRevalidator(first.resources, first.batches)
+
+def test_etag_only_for_batches_seen_before():
+    revalidator = stored_revalidator(['v1', 'v2'])
+    assert revalidator.etag_for(['v1', 'v2']) == 'list-1'
+    assert revalidator.etag_for(['v1']) is None
+    assert VideoRevalidator().etag_for(['v1', 'v2']) is None
+
+def test_no_etag_when_a_stored_record_is_missing():
+    revalidator = stored_revalidator(['v1', 'v2'])
+    del revalidator.stored_resources['v2']
+    assert revalidator.etag_for(['v1', 'v2']) is None
+
+def test_not_modified_reuses_stored_records():
+    revalidator = stored_revalidator(['v1', 'v2'])
+    records = revalidator.records_for(['v1', 'v2'], NOT_MODIFIED)
+    assert [record['id'] for record in records] == ['v1', 'v2']
+    assert records[0]['lengthSeconds'] == 65
+    assert (revalidator.not_modified, revalidator.unchanged, revalidator.changed) == (1, 2, 0)
+    # Carried forward, so the next refresh can revalidate the batch again
+    assert revalidator.batches == revalidator.stored_batches
+    assert set(revalidator.resources) == {'v1', 'v2'}
+
+def test_only_changed_resources_are_parsed_again():
+    revalidator = stored_revalidator(['v1', 'v2'])
+    stored_v1 = revalidator.stored_resources['v1'][1]
+    records = revalidator.records_for(['v1', 'v2'], {
+        'etag': 'list-2',
+        'items': [resource('v1', 'e-v1'), resource('v2', 'e-v2-edited', title='Edited')]
+    })
+    assert records[0] is stored_v1
+    assert records[1]['title'] == 'Edited'
+    assert (revalidator.unchanged, revalidator.changed) == (1, 1)
+    assert revalidator.batches[batch_key(['v1', 'v2'])] == ('list-2', ['v1', 'v2'])
+
+def test_deleted_videos_drop_out_of_the_batch():
+    revalidator = stored_revalidator(['v1', 'v2'])
+    revalidator.records_for(['v1', 'v2'], {'etag': 'list-2', 'items': [resource('v1', 'e-v1')]})
+    assert revalidator.batches[batch_key(['v1', 'v2'])] == ('list-2', ['v1'])
@@ -0,0 +1,32 @@
+import logging
+import random
+
+import logs
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+def test_access_log_keeps_the_sample_rate(app_module, monkeypatch):
+    monkeypatch.setattr(logs, '_sample_rate', 0.1)
+    handler = Collect()
+    logger = app_module.access_log.logger
+    logger.addHandler(handler)
+    monkeypatch.setattr(logger, 'level', logging.INFO)
+    random.seed(1234)
+    try:
+        with app_module.app.test_request_context('/api/videos'):
+            for _ in range(10000):
+                app_module.log_request(app_module.app.response_class('ok'))
+    finally:
+        logger.removeHandler(handler)
+    assert 900 <= len(handler.records) <= 1100
+
+def test_warnings_are_never_sampled_out(monkeypatch):
+    monkeypatch.setattr(logs, '_sample_rate', 0.0)
+    assert all(logs.sampled(logging.WARNING) for _ in range(100))
+    assert not any(logs.sampled(logging.INFO) for _ in range(100))
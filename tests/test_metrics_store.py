@@ -0,0 +1,47 @@
+import pytest
+
+from metrics_store import EMPTY_TOTALS, MetricsStore, add_totals, metrics_from_totals, totals_from_metrics
+
+def row(views, average_view_duration, average_view_percentage, likes=0, subscribers_gained=0):
+    return {
+        'views': views,
+        'likes': likes,
+        'averageViewDuration': average_view_duration,
+        'averageViewPercentage': average_view_percentage,
+        'subscribersGained': subscribers_gained
+    }
+
+def test_round_trip_of_a_single_window():
+    metrics = row(100, 42.0, 35.5, likes=7, subscribers_gained=2)
+    assert metrics_from_totals(totals_from_metrics(metrics)) == metrics
+
+def test_averages_are_weighted_by_views():
+    # 90 views at 10s / 20% and 10 views at 110s / 80%
+    totals = add_totals(totals_from_metrics(row(90, 10, 20)), totals_from_metrics(row(10, 110, 80)))
+    metrics = metrics_from_totals(totals)
+    assert metrics['views'] == 100
+    assert metrics['averageViewDuration'] == pytest.approx(20.0)
+    assert metrics['averageViewPercentage'] == pytest.approx(26.0)
+
+def test_counts_add_up():
+    totals = add_totals(
+        totals_from_metrics(row(5, 1, 1, likes=2, subscribers_gained=1)),
+        totals_from_metrics(row(3, 1, 1, likes=4, subscribers_gained=0))
+    )
+    assert (totals['views'], totals['likes'], totals['subscribersGained']) == (8, 6, 1)
+
+def test_zero_views_have_zero_averages():
+    assert metrics_from_totals(dict(EMPTY_TOTALS)) == row(0, 0, 0)
+    # A window with no views contributes nothing to the weighted sums
+    totals = add_totals(totals_from_metrics(row(50, 30, 40)), totals_from_metrics(row(0, 999, 99)))
+    assert metrics_from_totals(totals)['averageViewDuration'] == pytest.approx(30.0)
+
+def test_missing_fields_count_as_zero():
+    assert totals_from_metrics({}) == EMPTY_TOTALS
+
+def test_settled_totals_round_trip(tmp_path):
+    store = MetricsStore(str(tmp_path / 'metrics.db'))
+    totals = totals_from_metrics(row(12, 30, 50, likes=3, subscribers_gained=1))
+    store.save_totals('UC1', '2024-05-01', {'v1': totals})
+    store.save_totals('UC2', '2024-05-01', {'v1': dict(EMPTY_TOTALS)})
+    assert store.load_totals('UC1') == {'v1': ('2024-05-01', totals)}
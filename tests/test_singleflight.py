@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight, fcntl
+
+def start_leader(flight, key, fetch):
+    """Run flight.do(key, fetch) on a thread; returns (thread, outcome dict)"""
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = flight.do(key, fetch)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+def blocking_fetch(release, result=None, error=None):
+    started = threading.Event()
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        if error:
+            raise error
+        return result
+    return fetch, started
+
+def test_concurrent_callers_share_one_fetch(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+    release = threading.Event()
+    fetch, started = blocking_fetch(release, result={'videos': [1]})
+    leader, outcome = start_leader(flight, 'UC1', fetch)
+    started.wait(5)
+
+    waiter, waited = start_leader(flight, 'UC1', lambda: pytest.fail('second fetch ran'))
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+
+    assert outcome['result'] == waited['result'] == {'videos': [1]}
+    assert flight.stats()['fetches'] == 1
+    assert flight.stats()['coalesced_threads'] == 1
+
+def test_leader_error_reaches_waiters(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+    release = threading.Event()
+    fetch, started = blocking_fetch(release, error=ValueError('upstream failed'))
+    leader, outcome = start_leader(flight, 'UC1', fetch)
+    started.wait(5)
+
+    waiter, waited = start_leader(flight, 'UC1', lambda: None)
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+
+    assert isinstance(outcome['error'], ValueError)
+    assert waited['error'] is outcome['error']
+
+def test_waiter_times_out(tmp_path):
+    flight = SingleFlight(str(tmp_path), wait_timeout=0.05)
+    release = threading.Event()
+    fetch, started = blocking_fetch(release, result='late')
+    leader, _ = start_leader(flight, 'UC1', fetch)
+    started.wait(5)
+    try:
+        with pytest.raises(TimeoutError):
+            flight.do('UC1', lambda: None)
+    finally:
+        release.set()
+        leader.join(5)
+
+def test_key_is_free_again_after_a_failure(tmp_path):
+    def fail():
+        raise ValueError('boom')
+
+    flight = SingleFlight(str(tmp_path))
+    with pytest.raises(ValueError):
+        flight.do('UC1', fail)
+    assert flight.do('UC1', lambda: 'ok') == 'ok'
+
+@pytest.mark.skipif(fcntl is None, reason='cross-process locking needs fcntl')
+def test_waiting_on_another_process_uses_its_cached_result(tmp_path):
+    flight = SingleFlight(str(tmp_path), wait_timeout=5)
+    release = threading.Event()
+    fetch, started = blocking_fetch(release, result='from first')
+    # A second instance stands in for another worker process (separate in-flight table)
+    other_process = SingleFlight(str(tmp_path), wait_timeout=5)
+    leader, _ = start_leader(other_process, 'UC1', fetch)
+    started.wait(5)
+
+    def release_soon():
+        time.sleep(0.1)
+        release.set()
+    threading.Thread(target=release_soon).start()
+
+    result = flight.do('UC1', lambda: pytest.fail('fetched again'), check=lambda: 'from cache')
+    leader.join(5)
+    assert result == 'from cache'
+    assert flight.stats()['coalesced_processes'] == 1
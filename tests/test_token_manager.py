@@ -0,0 +1,41 @@
+import time
+
+import pytest
+from google.oauth2.credentials import Credentials
+
+from credential_store import CredentialStore
+from token_manager import TokenManager, credentials_from_dict
+
+@pytest.fixture
+def manager(tmp_path):
+    return TokenManager(CredentialStore(str(tmp_path / 'credentials.db')), refresh_margin=300, lease_seconds=5,
+                        sweep_interval=3600, active_window=3600, retention=86400)
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    calls = []
+
+    def refresh(creds, request):
+        calls.append(creds.token)
+        creds.token = f"token-{len(calls)}"
+    monkeypatch.setattr(Credentials, 'refresh', refresh)
+    return calls
+
+def signed_in(manager):
+    creds = credentials_from_dict({
+        'token': 'token-0', 'refresh_token': 'r', 'token_uri': 'https://oauth2.googleapis.com/token',
+        'client_id': 'c', 'client_secret': 's', 'scopes': None
+    }, time.time() + 3600)
+    return manager.add(creds)
+
+def test_rejected_token_is_refreshed_and_stored(manager, refreshes):
+    credentials_id = signed_in(manager)
+    assert manager.refresh(credentials_id, 'token-0').token == 'token-1'
+    assert manager.store.load_user(credentials_id)[0]['token'] == 'token-1'
+
+def test_token_already_replaced_is_not_refreshed_again(manager, refreshes):
+    credentials_id = signed_in(manager)
+    manager.refresh(credentials_id, 'token-0')
+    # A second request that was rejected with the old token picks up the new one
+    assert manager.refresh(credentials_id, 'token-0').token == 'token-1'
+    assert refreshes == ['token-0']
@@ -0,0 +1,94 @@
+import pytest
+
+from video_index import build_sort_orders, merge_datasets, parse_filters, query_videos, sort_column
+
+def video(video_id, published_at, views=0, title=None):
+    return {
+        'id': video_id,
+        'title': title or video_id,
+        'publishedAt': published_at,
+        'views': views,
+        'likes': 0,
+        'lengthSeconds': 60,
+        'watchTimeSeconds': 30,
+        'percentWatched': 50.0,
+        'subsGained': 0
+    }
+
+@pytest.fixture
+def dataset():
+    videos = [
+        video('a', '2024-04-30T23:59:59Z', views=5, title='Banana'),
+        video('b', '2024-05-01T00:00:00Z', views=50, title='apple'),
+        video('c', '2024-05-01T10:00:00Z', views=20, title='Cherry'),
+        video('d', '2024-05-02T08:00:00Z', views=10, title='date')
+    ]
+    return {'videos': videos, 'sort_orders': build_sort_orders(videos)}
+
+def ids(page):
+    return [video['id'] for video in page[0]]
+
+def test_sorts_both_directions(dataset):
+    assert ids(query_videos(dataset, 'views', 'desc')) == ['b', 'c', 'd', 'a']
+    assert ids(query_videos(dataset, 'views', 'asc')) == ['a', 'd', 'c', 'b']
+
+def test_titles_sort_case_insensitively(dataset):
+    assert ids(query_videos(dataset, 'title', 'asc')) == ['b', 'a', 'c', 'd']
+
+def test_sort_aliases(dataset):
+    assert ids(query_videos(dataset, 'publishedAt', 'desc')) == ids(query_videos(dataset, 'published', 'desc'))
+
+def test_unknown_column_is_rejected(dataset):
+    with pytest.raises(ValueError):
+        sort_column('nope')
+    with pytest.raises(ValueError):
+        query_videos(dataset, 'nope', 'desc')
+
+def test_pages_report_the_total_matching(dataset):
+    assert query_videos(dataset, 'views', 'desc', offset=1, limit=2) == (
+        [dataset['videos'][2], dataset['videos'][3]], 4
+    )
+    assert query_videos(dataset, 'views', 'desc', offset=10, limit=2) == ([], 4)
+
+def test_numeric_range_filters(dataset):
+    filters = parse_filters({'min_views': '10', 'max_views': '20'})
+    assert filters == {'min_views': 10.0, 'max_views': 20.0}
+    assert ids(query_videos(dataset, 'views', 'asc', filters=filters)) == ['d', 'c']
+
+def test_non_numeric_filter_is_rejected():
+    with pytest.raises(ValueError):
+        parse_filters({'min_views': 'lots'})
+
+def test_empty_filters_are_ignored():
+    assert parse_filters({'min_views': '', 'published_after': ''}) == {}
+
+def test_date_only_published_bounds_cover_the_whole_day(dataset):
+    filters = parse_filters({'published_after': '2024-05-01', 'published_before': '2024-05-01'})
+    assert ids(query_videos(dataset, 'published', 'asc', filters=filters)) == ['b', 'c']
+
+def test_timestamp_published_bounds_are_exact(dataset):
+    filters = parse_filters({'published_before': '2024-05-01T09:00:00Z'})
+    assert ids(query_videos(dataset, 'published', 'asc', filters=filters)) == ['a', 'b']
+
+def channel_dataset(prefix, views):
+    videos = [video(f"{prefix}{i}", f"2024-05-0{i + 1}T00:00:00Z", views=count) for i, count in enumerate(views)]
+    return {'videos': videos, 'sort_orders': build_sort_orders(videos)}
+
+def test_merged_sort_orders_match_a_full_sort():
+    datasets = [('UC1', channel_dataset('a', [5, 50, 7])), ('UC2', channel_dataset('b', [1, 50, 30, 2])),
+                ('UC3', channel_dataset('c', []))]
+    merged = merge_datasets(datasets)
+    assert merged['sort_orders'] == build_sort_orders(merged['videos'])
+    assert ids(query_videos(merged, 'views', 'desc', limit=3)) == ['b1', 'a1', 'b2']
+
+def test_merged_rows_are_tagged_with_their_channel():
+    first, second = channel_dataset('a', [1]), channel_dataset('b', [2, 3])
+    merged = merge_datasets([('UC1', first), ('UC2', second)])
+    assert [(row['id'], row['channelId']) for row in merged['videos']] == [('a0', 'UC1'), ('b0', 'UC2'), ('b1', 'UC2')]
+    # The channels' own (cached) datasets are left untouched
+    assert 'channelId' not in first['videos'][0]
+
+def test_merging_indexes_datasets_cached_without_sort_orders():
+    legacy = {'videos': [dict(video('a0', '2024-05-01T00:00:00Z', views=9), length='01:00', watchTime='00:30')]}
+    merged = merge_datasets([('UC1', legacy), ('UC2', channel_dataset('b', [4]))])
+    assert ids(query_videos(merged, 'views', 'asc')) == ['b0', 'a0']
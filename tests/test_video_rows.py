@@ -0,0 +1,63 @@
+import contextlib
+import io
+import os
+import sys
+
+import isodate
+import pytest
+
+from resource_store import video_record
+from video_rows import build_video_rows, clock, parse_duration_seconds
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from bench_rows import reference_record, reference_rows, synthetic_channel  # noqa: E402
+
+@pytest.mark.parametrize('value, seconds', [
+    ('PT0S', 0),
+    ('P0D', 0),
+    ('PT45S', 45),
+    ('PT1M', 60),
+    ('PT1M5S', 65),
+    ('PT2H', 7200),
+    ('PT1H2M3S', 3723),
+    ('P1DT1S', 86401),
+    ('P2D', 172800)
+])
+def test_youtube_durations(value, seconds):
+    assert parse_duration_seconds(value) == seconds
+    assert parse_duration_seconds(value) == int(isodate.parse_duration(value).total_seconds())
+
+def test_other_iso_durations_go_through_isodate():
+    assert parse_duration_seconds('PT1.5S') == 1
+    assert parse_duration_seconds('P1W') == 7 * 86400
+
+def test_malformed_durations_behave_like_isodate():
+    for value in ('P', 'nonsense'):
+        with pytest.raises(isodate.ISO8601Error):
+            parse_duration_seconds(value)
+    assert parse_duration_seconds('PT') == int(isodate.parse_duration('PT').total_seconds()) == 0
+
+def test_clock_keeps_counting_minutes_past_an_hour():
+    assert clock(0) == '00:00'
+    assert clock(65) == '01:05'
+    assert clock(3723) == '62:03'
+
+def test_rows_without_metrics_are_zero():
+    record = {'id': 'v1', 'title': 'T', 'thumbnail': 'u', 'publishedAt': 'p', 'lengthSeconds': 0}
+    assert build_video_rows([record], {}) == [{
+        'id': 'v1', 'title': 'T', 'thumbnail': 'u', 'publishedAt': 'p',
+        'views': 0, 'likes': 0, 'length': '00:00', 'lengthSeconds': 0,
+        'watchTime': '00:00', 'watchTimeSeconds': 0, 'percentWatched': 0, 'subsGained': 0
+    }]
+
+def test_percent_watched():
+    record = {'id': 'v1', 'title': 'T', 'thumbnail': 'u', 'publishedAt': 'p', 'lengthSeconds': 200}
+    row, = build_video_rows([record], {'v1': {'views': 3, 'averageViewDuration': 50}})
+    assert (row['percentWatched'], row['watchTime'], row['length']) == (25.0, '00:50', '03:20')
+
+def test_batch_rows_match_the_per_row_reference():
+    resources, metrics = synthetic_channel(2000)
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = reference_rows([reference_record(resource) for resource in resources], metrics)
+    assert build_video_rows([video_record(resource) for resource in resources], metrics) == expected
@@ -0,0 +1,243 @@
+"""Live OAuth credentials per signed-in user, refreshed before they expire.
+
+Sessions only hold an opaque credentials ID; the credentials themselves sit
+in the credential store (shared by every worker) and, once used, in this
+worker's memory. Access tokens are refreshed ahead of expiry so requests
+never wait on Google's token endpoint:
+
+- a per-process sweeper thread refreshes recently used credentials that
+  expire within the refresh margin (plus one sweep interval), and
+- a request that finds its token inside the margin schedules a background
+  refresh and carries on with the still-valid token.
+
+Refreshes are deduplicated per credentials ID within a process (a lock)
+and across workers (a lease row in the credential store): the worker that
+loses the race adopts the winner's token instead of refreshing again. Only
+a token that has already expired - e.g. the first request after a long
+idle spell - is refreshed on the request path.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from instrumentation import timed_call
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks while another worker holds the refresh lease
+REFRESH_POLL_SECONDS = 0.1
+
+# Seconds between last-used updates for the same credentials (per worker)
+TOUCH_INTERVAL_SECONDS = 60
+
+# google-auth treats a token as expired this long before its expiry (its
+# REFRESH_THRESHOLD) and then refreshes it inline on the next API call
+EXPIRY_SKEW_SECONDS = 225
+
+def credentials_to_dict(creds):
+    """Serialise OAuth credentials for the credential store"""
+    return {
+        'token': creds.token,
+        'refresh_token': creds.refresh_token,
+        'token_uri': creds.token_uri,
+        'client_id': creds.client_id,
+        'client_secret': creds.client_secret,
+        'scopes': creds.scopes
+    }
+
+def credentials_from_dict(creds_data, expires_at=None):
+    """Rebuild OAuth credentials from a credentials_to_dict() payload"""
+    from google.oauth2.credentials import Credentials
+    creds = Credentials(
+        token=creds_data['token'],
+        refresh_token=creds_data['refresh_token'],
+        token_uri=creds_data['token_uri'],
+        client_id=creds_data['client_id'],
+        client_secret=creds_data['client_secret'],
+        scopes=creds_data['scopes']
+    )
+    if expires_at is not None:
+        # google-auth compares expiry as a naive UTC datetime
+        creds.expiry = datetime.fromtimestamp(expires_at, timezone.utc).replace(tzinfo=None)
+    return creds
+
+def expiry_timestamp(creds):
+    """Epoch seconds when the access token expires, or None if unknown"""
+    if creds.expiry is None:
+        return None
+    return creds.expiry.replace(tzinfo=timezone.utc).timestamp()
+
+class TokenManager:
+    """Per-process cache of live credentials with proactive, deduplicated refreshes"""
+
+    def __init__(self, store, refresh_margin, lease_seconds, sweep_interval, active_window, retention):
+        self.store = store
+        self.refresh_margin = refresh_margin
+        self.lease_seconds = lease_seconds
+        self.sweep_interval = sweep_interval
+        self.active_window = active_window
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._credentials = {}    # credentials ID -> Credentials
+        self._refresh_locks = {}  # credentials ID -> Lock
+        self._scheduled = set()
+        self._touched = {}        # credentials ID -> monotonic time of last touch
+        self._sweeper_pid = None
+
+    def add(self, creds):
+        """Store freshly granted credentials and return their opaque ID"""
+        credentials_id = self.store.add_user(credentials_to_dict(creds), expiry_timestamp(creds))
+        with self._lock:
+            self._credentials[credentials_id] = creds
+            self._touched[credentials_id] = time.monotonic()
+        self._ensure_sweeper()
+        return credentials_id
+
+    def get(self, credentials_id):
+        """Return usable credentials for an ID, or None if they are gone or can't be refreshed"""
+        self._ensure_sweeper()
+        creds = self._credentials.get(credentials_id)
+        if creds is None:
+            creds = self._load(credentials_id)
+            if creds is None:
+                return None
+        self._touch(credentials_id)
+
+        remaining = self._seconds_left(creds)
+        if remaining is None or remaining > self.refresh_margin:
+            return creds
+        if remaining > 0:
+            # Still valid: refresh off the request path
+            self._schedule_refresh(credentials_id)
+            return creds
+        return self._refresh(credentials_id)
+
+    def refresh(self, credentials_id, rejected_token=None):
+        """Refresh now, e.g. after the API rejected rejected_token, unless someone already replaced it"""
+        return self._refresh(credentials_id, rejected_token)
+
+    def forget(self, credentials_id):
+        """Drop credentials for good (on logout)"""
+        with self._lock:
+            self._credentials.pop(credentials_id, None)
+            self._touched.pop(credentials_id, None)
+        self.store.delete_user(credentials_id)
+
+    def _seconds_left(self, creds):
+        """Seconds until google-auth sees the token as expired; 0 if unknown but refreshable, None if unknown"""
+        expires_at = expiry_timestamp(creds)
+        if expires_at is None:
+            # Credentials from before expiries were stored: refresh once to learn it
+            return 0 if creds.refresh_token else None
+        return expires_at - EXPIRY_SKEW_SECONDS - time.time()
+
+    def _load(self, credentials_id):
+        """Read credentials from the store into this worker's cache"""
+        row = self.store.load_user(credentials_id)
+        with self._lock:
+            if row is None:
+                self._credentials.pop(credentials_id, None)
+                return None
+            creds = credentials_from_dict(row[0], row[1])
+            self._credentials[credentials_id] = creds
+            return creds
+
+    def _touch(self, credentials_id):
+        """Record use (throttled) so the sweeper keeps these credentials refreshed"""
+        now = time.monotonic()
+        if now - self._touched.get(credentials_id, 0) < TOUCH_INTERVAL_SECONDS:
+            return
+        self._touched[credentials_id] = now
+        try:
+            self.store.touch_user(credentials_id)
+        except Exception as e:
+            logger.warning("Could not mark credentials active: %s", e)
+
+    def _refresh_lock(self, credentials_id):
+        with self._lock:
+            return self._refresh_locks.setdefault(credentials_id, threading.Lock())
+
+    def _refresh(self, credentials_id, rejected_token=None):
+        """Refresh once across threads and workers, adopting anyone else's newer token"""
+        with self._refresh_lock(credentials_id):
+            deadline = time.monotonic() + self.lease_seconds
+            while True:
+                creds = self._load(credentials_id)
+                if creds is None:
+                    return None
+                remaining = self._seconds_left(creds)
+                rejected = rejected_token is not None and creds.token == rejected_token
+                if not rejected and (remaining is None or remaining > self.refresh_margin):
+                    return creds
+                if not creds.refresh_token:
+                    return creds if creds.valid else None
+                if self.store.claim_refresh(credentials_id, self.lease_seconds):
+                    return self._refresh_claimed(credentials_id, creds)
+                # Another worker is refreshing: wait for its token
+                if time.monotonic() >= deadline:
+                    return creds if creds.valid else None
+                time.sleep(REFRESH_POLL_SECONDS)
+
+    def _refresh_claimed(self, credentials_id, creds):
+        """Refresh credentials whose lease this worker holds and publish the new token"""
+        from google.auth.transport.requests import Request
+        try:
+            with timed_call('oauth2.token'):
+                creds.refresh(Request())
+        except Exception:
+            self.store.release_refresh(credentials_id)
+            raise
+        self.store.update_user(credentials_id, credentials_to_dict(creds), expiry_timestamp(creds))
+        with self._lock:
+            self._credentials[credentials_id] = creds
+        logger.info("Refreshed access token %s…", credentials_id[:8])
+        return creds
+
+    def _refresh_quietly(self, credentials_id):
+        try:
+            self._refresh(credentials_id)
+        except Exception as e:
+            logger.error("Token refresh failed for %s…: %s", credentials_id[:8], e)
+        finally:
+            with self._lock:
+                self._scheduled.discard(credentials_id)
+
+    def _schedule_refresh(self, credentials_id):
+        """Refresh on a background thread unless one is already pending for this ID"""
+        with self._lock:
+            if credentials_id in self._scheduled:
+                return
+            self._scheduled.add(credentials_id)
+        threading.Thread(target=self._refresh_quietly, args=(credentials_id,), daemon=True).start()
+
+    def refresh_expiring(self):
+        """Refresh every recently used credential that expires before the next sweep is done"""
+        now = time.time()
+        expiring = self.store.expiring_users(
+            now + EXPIRY_SKEW_SECONDS + self.refresh_margin + self.sweep_interval,
+            now - self.active_window
+        )
+        for credentials_id in expiring:
+            self._refresh_quietly(credentials_id)
+        return len(expiring)
+
+    def _ensure_sweeper(self):
+        """Start this process's sweeper thread (again after a fork)"""
+        if self._sweeper_pid == os.getpid():
+            return
+        with self._lock:
+            if self._sweeper_pid == os.getpid():
+                return
+            self._sweeper_pid = os.getpid()
+        threading.Thread(target=self._sweep_forever, name='token-refresh', daemon=True).start()
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.refresh_expiring()
+                self.store.delete_unused_users(time.time() - self.retention)
+            except Exception as e:
+                logger.error("Token refresh sweep failed: %s", e)
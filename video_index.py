@@ -0,0 +1,131 @@
+"""Precomputed sort orders and range filters for cached video datasets.
+
+Sort orders are built once when a dataset is written to the cache: for each
+sortable column, the list of video positions in ascending order. Serving a
+sorted page is then a slice of that list (reversed for descending) instead
+of a full sort per request. Durations are sorted on numeric seconds, not on
+their "MM:SS" display strings.
+
+Several channels' datasets are combined by k-way merging their existing
+sort orders rather than sorting the combined rows again.
+"""
+import heapq
+
+# Sortable columns: request name -> key function over a video dict
+SORT_KEYS = {
+    'title': lambda video: video['title'].lower(),
+    'published': lambda video: video['publishedAt'],
+    'views': lambda video: video['views'],
+    'likes': lambda video: video['likes'],
+    'length': lambda video: video['lengthSeconds'],
+    'watchTime': lambda video: video['watchTimeSeconds'],
+    'watched': lambda video: video['percentWatched'],
+    'subs': lambda video: video['subsGained']
+}
+
+# Alternate names accepted for sort_by
+SORT_ALIASES = {
+    'subsGained': 'subs',
+    'percentWatched': 'watched',
+    'publishedAt': 'published'
+}
+
+# Range filters: query parameter -> (video field, comparison)
+RANGE_FILTERS = {
+    'min_views': ('views', 'min'),
+    'max_views': ('views', 'max'),
+    'min_watched': ('percentWatched', 'min'),
+    'max_watched': ('percentWatched', 'max'),
+    'published_after': ('publishedAt', 'min'),
+    'published_before': ('publishedAt', 'max')
+}
+
+def parse_duration_label(label):
+    """Seconds from an "MM:SS" label (used for datasets cached before numeric columns)"""
+    minutes, seconds = label.split(':')
+    return int(minutes) * 60 + int(seconds)
+
+def add_numeric_columns(videos):
+    """Ensure every video has numeric lengthSeconds / watchTimeSeconds"""
+    for video in videos:
+        if 'lengthSeconds' not in video:
+            video['lengthSeconds'] = parse_duration_label(video['length'])
+        if 'watchTimeSeconds' not in video:
+            video['watchTimeSeconds'] = parse_duration_label(video['watchTime'])
+    return videos
+
+def build_sort_orders(videos):
+    """Ascending position order for every sortable column"""
+    positions = range(len(videos))
+    return {
+        column: sorted(positions, key=lambda i, key=key: key(videos[i]))
+        for column, key in SORT_KEYS.items()
+    }
+
+def ensure_index(data):
+    """Add numeric columns and sort orders to a cached dataset that lacks them"""
+    if 'sort_orders' not in data:
+        add_numeric_columns(data['videos'])
+        data['sort_orders'] = build_sort_orders(data['videos'])
+    return data
+
+def merge_datasets(datasets):
+    """One indexed dataset from several [(channel ID, dataset)]; rows are tagged with channelId"""
+    videos = []
+    offsets = []
+    for channel_id, data in datasets:
+        ensure_index(data)
+        offsets.append(len(videos))
+        videos.extend(dict(video, channelId=channel_id) for video in data['videos'])
+
+    sort_orders = {}
+    for column, key in SORT_KEYS.items():
+        orders = [
+            [position + offset for position in data['sort_orders'][column]]
+            for offset, (_, data) in zip(offsets, datasets)
+        ]
+        sort_orders[column] = list(heapq.merge(*orders, key=lambda i, key=key: key(videos[i])))
+    return {'videos': videos, 'sort_orders': sort_orders}
+
+def sort_column(sort_by):
+    """Canonical column for a sort_by value or alias; raises ValueError on unknown columns"""
+    column = SORT_ALIASES.get(sort_by, sort_by)
+    if column not in SORT_KEYS:
+        raise ValueError(f"sort_by must be one of: {', '.join(list(SORT_KEYS) + list(SORT_ALIASES))}")
+    return column
+
+def parse_filters(args):
+    """Read range filters from request args; raises ValueError on bad values"""
+    filters = {}
+    for name, (field, bound) in RANGE_FILTERS.items():
+        value = args.get(name)
+        if value is None or value == '':
+            continue
+        filters[name] = value if field == 'publishedAt' else float(value)
+    return filters
+
+def _matches(video, filters):
+    for name, value in filters.items():
+        field, bound = RANGE_FILTERS[name]
+        actual = video[field]
+        if field == 'publishedAt':
+            # Compare at the bound's precision, so a date-only bound covers that whole day
+            actual = actual[:len(value)]
+        if bound == 'min' and actual < value:
+            return False
+        if bound == 'max' and actual > value:
+            return False
+    return True
+
+def query_videos(data, sort_by='published', sort_direction='desc', offset=0, limit=None, filters=None):
+    """Return (page, total_matching) by walking the precomputed order for sort_by"""
+    videos = data['videos']
+    order = data['sort_orders'][sort_column(sort_by)]
+    if sort_direction == 'desc':
+        order = order[::-1]
+
+    if filters:
+        order = [i for i in order if _matches(videos[i], filters)]
+
+    end = None if limit is None else offset + limit
+    return [videos[i] for i in order[offset:end]], len(order)
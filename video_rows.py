@@ -0,0 +1,66 @@
+"""Batch transform from video records and Analytics metrics to dashboard rows.
+
+Rows are built column by column: each derived column (length and watch
+time as MM:SS, % watched) is computed for the whole batch in one
+comprehension, then the rows are zipped together in a single pass.
+Durations and MM:SS strings repeat heavily across a channel, so both
+are memoized.
+"""
+import re
+from functools import lru_cache
+
+# YouTube's contentDetails.duration: P[nD]T[nH][nM][nS] (P0D for live streams)
+DURATION_PATTERN = re.compile(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+# Distinct durations / clock strings remembered per process
+MEMO_ENTRIES = 65536
+
+@lru_cache(maxsize=MEMO_ENTRIES)
+def parse_duration_seconds(value):
+    """Whole seconds in an ISO-8601 duration; anything beyond YouTube's format goes through isodate"""
+    match = DURATION_PATTERN.match(value)
+    if match is None or value.endswith(('P', 'T')):
+        import isodate
+        return int(isodate.parse_duration(value).total_seconds())
+    days, hours, minutes, seconds = (int(group) if group else 0 for group in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+@lru_cache(maxsize=MEMO_ENTRIES)
+def clock(seconds):
+    """MM:SS (minutes keep counting past an hour)"""
+    return f"{int(seconds // 60):02d}:{int(seconds % 60):02d}"
+
+def build_video_rows(videos, metrics_by_video):
+    """Dashboard rows for video records (resource_store.video_record) and their Analytics metrics"""
+    no_metrics = {}
+    metrics = [metrics_by_video.get(video['id'], no_metrics) for video in videos]
+
+    # Columns
+    lengths = [video['lengthSeconds'] for video in videos]
+    watch_seconds = [video_metrics.get('averageViewDuration', 0) for video_metrics in metrics]
+    percent_watched = [
+        round(watched / length * 100, 1) if length > 0 else 0
+        for watched, length in zip(watch_seconds, lengths)
+    ]
+    length_clocks = [clock(length) for length in lengths]
+    watch_clocks = [clock(watched) for watched in watch_seconds]
+
+    return [
+        {
+            'id': video['id'],
+            'title': video['title'],
+            'thumbnail': video['thumbnail'],
+            'publishedAt': video['publishedAt'],
+            'views': video_metrics.get('views', 0),
+            'likes': video_metrics.get('likes', 0),
+            'length': length_clock,
+            'lengthSeconds': int(length),
+            'watchTime': watch_clock,
+            'watchTimeSeconds': int(watched),
+            'percentWatched': percent,
+            'subsGained': video_metrics.get('subscribersGained', 0)
+        }
+        for video, video_metrics, length, length_clock, watched, watch_clock, percent in zip(
+            videos, metrics, lengths, length_clocks, watch_seconds, watch_clocks, percent_watched
+        )
+    ]
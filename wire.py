@@ -0,0 +1,92 @@
+"""Response encoding for /api/videos: columnar format, gzip, ETags and SSE.
+
+The default JSON format is a list of per-video dicts. The opt-in columnar
+format sends one array per field instead, with every string field stored as
+an index into a shared string table, and drops the "MM:SS" display strings
+that the client can rebuild from the numeric seconds columns.
+
+Encoded bodies are memoized per dataset version (channel + cache_time) so
+repeat requests, including 304 revalidations, skip serialization and
+compression entirely.
+"""
+import gzip
+import hashlib
+import json
+from collections import namedtuple
+
+from cache import MemoryCache
+from instrumentation import timed_phase
+
+# Columnar fields, in wire order
+STRING_COLUMNS = ['id', 'title', 'thumbnail', 'publishedAt']
+# String fields only some datasets have (aggregate views tag rows with their channel)
+OPTIONAL_STRING_COLUMNS = ['channelId']
+NUMBER_COLUMNS = ['views', 'likes', 'lengthSeconds', 'watchTimeSeconds', 'percentWatched', 'subsGained']
+
+GZIP_LEVEL = 6
+
+EncodedBody = namedtuple('EncodedBody', ['etag', 'body', 'gzipped'])
+
+def to_columnar(videos):
+    """Parallel per-field arrays, with string fields interned into a string table"""
+    strings = []
+    index = {}
+
+    def intern(value):
+        position = index.get(value)
+        if position is None:
+            position = index[value] = len(strings)
+            strings.append(value)
+        return position
+
+    string_columns = STRING_COLUMNS + [field for field in OPTIONAL_STRING_COLUMNS if videos and field in videos[0]]
+    columns = {field: [intern(video[field]) for video in videos] for field in string_columns}
+    columns.update({field: [video[field] for video in videos] for field in NUMBER_COLUMNS})
+    return {
+        'count': len(videos),
+        'strings': strings,
+        'columns': columns
+    }
+
+def encode_body(payload):
+    """Serialize a payload once and compress it, with a strong ETag over the JSON bytes"""
+    body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    return EncodedBody(etag, body, gzip.compress(body, GZIP_LEVEL))
+
+class EncodedResponses:
+    """Per-process memo of encoded response bodies for recent dataset versions.
+
+    Keys include the query, so every filter combination is a separate entry;
+    the memo is bounded by the bytes it holds as well as by entry count.
+    """
+
+    def __init__(self, max_entries=64, ttl=3600, max_bytes=None):
+        self.memory = MemoryCache(max_entries, max_bytes, self.size_of)
+        self.ttl = ttl
+
+    @staticmethod
+    def size_of(key, encoded):
+        return len(key) + len(encoded.body) + len(encoded.gzipped)
+
+    @staticmethod
+    def key(channel_id, data, response_format, query, extra):
+        # cache_time changes on every refresh, so old versions are simply never looked up again
+        return json.dumps(
+            [channel_id, data.get('cache_time'), response_format, query, extra],
+            sort_keys=True
+        )
+
+    def get_or_encode(self, key, build_payload):
+        """Return the memoized EncodedBody for key, encoding build_payload() on a miss"""
+        encoded = self.memory.get(key)
+        if encoded is None:
+            payload = build_payload()
+            with timed_phase('serialize'):
+                encoded = encode_body(payload)
+            self.memory.set(key, encoded, self.ttl)
+        return encoded
+
+def sse_event(event, payload):
+    """One Server-Sent Events message with a JSON data line"""
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
@@ -1,4 +1,9 @@
 from app import app
+import prewarm
+
+# Optional in-process pre-warmer (or run `python prewarm.py --schedule` separately)
+if app.config['PREWARM_ENABLED']:
+    prewarm.start_scheduler()
 
 if __name__ == "__main__":
-    app.run() 
\ No newline at end of file
+    app.run()
\ No newline at end of file